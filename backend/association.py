@@ -0,0 +1,70 @@
+import numpy as np
+
+# Per-class IoU thresholds used to decide whether a PPE box belongs to a person.
+# Keys are matched against the lower-cased YOLO class name.
+IOU_THRESHOLDS = {
+    "vest": 0.4,
+    "helmet": 0.01,
+    "boots": 0.02,
+    "gloves": 0.01,
+}
+DEFAULT_IOU_THRESHOLD = 0.01
+
+
+def get_iou_threshold(ppe_name):
+    return IOU_THRESHOLDS.get(ppe_name, DEFAULT_IOU_THRESHOLD)
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Computes the IoU between every box in boxes_a (N x 4) and every box in
+    boxes_b (M x 4), boxes given as [x1, y1, x2, y2]. Returns an N x M matrix.
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+
+    xA = np.maximum(a[:, None, 0], b[None, :, 0])
+    yA = np.maximum(a[:, None, 1], b[None, :, 1])
+    xB = np.minimum(a[:, None, 2], b[None, :, 2])
+    yB = np.minimum(a[:, None, 3], b[None, :, 3])
+
+    inter = np.clip(xB - xA, 0, None) * np.clip(yB - yA, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+
+    # Matches the scalar reference: a zero union gives an IoU of 0
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union != 0)
+
+
+class PPEAssociator:
+    """
+    Assigns detected PPE boxes to persons in a single vectorized pass.
+
+    Class names and IoU thresholds are resolved once per model and stored as
+    arrays indexed by class id, so nothing is looked up per (person, PPE) pair.
+    """
+
+    def __init__(self, class_names):
+        num_classes = max(class_names.keys()) + 1 if class_names else 0
+        self.ppe_names = [""] * num_classes
+        self.iou_thresholds = np.full(num_classes, DEFAULT_IOU_THRESHOLD, dtype=np.float32)
+        for cls_id, name in class_names.items():
+            name = name.lower()
+            self.ppe_names[cls_id] = name
+            self.iou_thresholds[cls_id] = get_iou_threshold(name)
+
+    def associate(self, person_boxes, ppe_boxes, ppe_classes):
+        """
+        Returns one list of equipped PPE names per person, in the same order as
+        the PPE detections (so duplicates are kept, as in the scalar loop).
+        """
+        ppe_classes = np.asarray(ppe_classes, dtype=np.int64).reshape(-1)
+        ious = iou_matrix(person_boxes, ppe_boxes)
+        if ious.size == 0:
+            return [[] for _ in range(ious.shape[0])]
+
+        matches = ious > self.iou_thresholds[ppe_classes][None, :]
+        return [[self.ppe_names[c] for c in ppe_classes[row]] for row in matches]
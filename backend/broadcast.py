@@ -0,0 +1,138 @@
+import queue
+import threading
+
+import cv2 as cv
+import numpy as np
+
+BOUNDARY_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+
+def mjpeg_chunk(jpeg_bytes):
+    return BOUNDARY_HEADER + jpeg_bytes + b'\r\n'
+
+
+def waiting_chunk():
+    blank = np.zeros((360, 640, 3), dtype=np.uint8)
+    cv.putText(blank, "Waiting for video...", (50, 180), cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    _, buffer = cv.imencode('.jpg', blank)
+    return mjpeg_chunk(buffer.tobytes())
+
+
+class FrameBroadcaster:
+    """
+    Single producer per stream that fans MJPEG frames out to many viewers.
+
+    One thread pulls processed frames from the pipeline, JPEG-encodes each
+    frame once and offers the bytes to every subscriber's small queue. A slow
+    client loses its oldest queued frame rather than holding anyone back.
+    StreamManager starts it as soon as the stream has a source, so with no
+    subscribers the pipeline keeps running (violations are still logged)
+    but nothing is encoded.
+    """
+
+    def __init__(self, pipeline, client_queue_size=2, jpeg_quality=70):
+        self.pipeline = pipeline
+        self.client_queue_size = client_queue_size
+        self.jpeg_quality = jpeg_quality
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.metrics = {
+            "frames_processed": 0,
+            "frames_encoded": 0,
+            "client_frames_dropped": 0,
+        }
+
+    def stats(self):
+        return dict(self.metrics, subscribers=len(self._subscribers))
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=f"broadcast-{self.pipeline.name}", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        with self._lock:
+            for q in self._subscribers:
+                self._offer(q, None)
+
+    def subscribe(self):
+        """Generator of multipart MJPEG chunks for one viewer."""
+        q = queue.Queue(maxsize=self.client_queue_size)
+        with self._lock:
+            self._subscribers.add(q)
+        self.start()
+        try:
+            capture = self.pipeline.capture
+            if capture is None or not capture.is_opened():
+                yield waiting_chunk()
+            while not self._stop.is_set():
+                try:
+                    chunk = q.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            with self._lock:
+                self._subscribers.discard(q)
+
+    def _offer(self, q, chunk):
+        try:
+            q.put_nowait(chunk)
+        except queue.Full:
+            # Slow client: drop its oldest frame to make room for the newest
+            try:
+                q.get_nowait()
+                self.metrics["client_frames_dropped"] += 1
+            except queue.Empty:
+                pass
+            try:
+                q.put_nowait(chunk)
+            except queue.Full:
+                pass
+
+    def _pump(self):
+        for processed_frame in self.pipeline.iter_processed_frames():
+            self.metrics["frames_processed"] += 1
+            with self._lock:
+                subscribers = list(self._subscribers)
+            if not subscribers:
+                continue  # nobody watching: skip the encode entirely
+            with self.pipeline.timer.stage("encode"):
+                ret, buffer = cv.imencode('.jpg', processed_frame, [int(cv.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+            if not ret:
+                continue
+            self.metrics["frames_encoded"] += 1
+            chunk = mjpeg_chunk(buffer.tobytes())
+            for q in subscribers:
+                self._offer(q, chunk)
+            if self._stop.is_set():
+                break
+
+    def _run(self):
+        while not self._stop.is_set():
+            capture = self.pipeline.capture
+            if capture is None or not capture.is_opened():
+                self._stop.wait(0.5)
+                continue
+
+            try:
+                self._pump()
+            except Exception as e:
+                # e.g. a detection timed out or the batcher closed; retry unless stopping
+                print(f"[ERROR] Stream '{self.pipeline.name}' frame processing failed: {e}")
+                self._stop.wait(0.5)
+                continue
+
+            # Source ended or was replaced; wait for the next one
+            while not self._stop.is_set() and self.pipeline.capture is capture and capture.finished:
+                self._stop.wait(0.5)
@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2 as cv
+
+CAPTURE_CONFIG = {
+    "frame_stride": 3,        # process every Nth frame; the rest are grab()-ed but never decoded
+    "buffer_size": 4,         # ring capacity; the oldest frame is dropped when full
+    "max_width": 1280,        # frames wider than this are downscaled on the capture thread
+    "loop_files": True,       # restart video files at EOF (demo behaviour)
+    "reconnect_delay": 1.0,   # seconds between reopen attempts for live sources
+    "growing_poll_s": 0.5,    # wait at the end of a file that is still being uploaded
+}
+
+
+class FrameCapture:
+    """
+    Decodes a video source on its own thread into a bounded ring buffer.
+
+    Skipped frames are only grab()-ed (demuxed, not decoded); kept frames are
+    retrieve()-d, resized and pushed into a drop-oldest ring so that decode
+    and inference overlap and the consumer always sees recent frames. Video
+    files are paced at their native frame rate so they behave like a camera.
+
+    `growing` is an object with a `complete` attribute (an UploadSession) for
+    a file that is still being written: at its current end the capture
+    waits, reopens and seeks back to where it was instead of looping.
+    """
+
+    def __init__(self, source, config=None, growing=None):
+        self.config = dict(CAPTURE_CONFIG, **(config or {}))
+        self.source = source
+        self.growing = growing
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self._cap = cv.VideoCapture(source)
+        fps = self._cap.get(cv.CAP_PROP_FPS) if self._cap.isOpened() else 0
+        self.source_fps = fps if fps and fps > 0 else 25.0
+
+        self._ring = deque(maxlen=self.config["buffer_size"])
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self.finished = False
+
+        self._grabbed = 0
+        self._decoded = 0
+        self._skipped = 0
+        self._dropped = 0
+        self._fps_window = deque(maxlen=60)
+
+    # -------------------- LIFECYCLE --------------------
+
+    def is_opened(self):
+        return self._cap is not None and self._cap.isOpened()
+
+    def start(self):
+        if self._thread is None and self.is_opened():
+            self._thread = threading.Thread(target=self._run, name=f"capture-{self.source}", daemon=True)
+            self._thread.start()
+        return self
+
+    def release(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    # -------------------- CONSUMER --------------------
+
+    def read(self, timeout=1.0):
+        """Pops the oldest buffered frame. Returns (ok, frame)."""
+        with self._cond:
+            if not self._ring and not self.finished:
+                self._cond.wait(timeout)
+            if self._ring:
+                return True, self._ring.popleft()
+        return False, None
+
+    def stats(self):
+        window = list(self._fps_window)
+        fps = (len(window) - 1) / (window[-1] - window[0]) if len(window) > 1 and window[-1] > window[0] else 0.0
+        return {
+            "capture_fps": round(fps, 2),
+            "source_fps": self.source_fps,
+            "frames_grabbed": self._grabbed,
+            "frames_decoded": self._decoded,
+            "frames_skipped": self._skipped,
+            "frames_dropped": self._dropped,
+            "queue_depth": len(self._ring),
+            "queue_capacity": self._ring.maxlen,
+            "finished": self.finished,
+            "growing": self.growing is not None,
+        }
+
+    # -------------------- PRODUCER --------------------
+
+    def _reopen(self):
+        if self._cap is not None:
+            self._cap.release()
+        self._cap = cv.VideoCapture(self.source)
+
+    def _run(self):
+        stride = max(1, self.config["frame_stride"])
+        frame_interval = 1.0 / self.source_fps
+        next_due = time.time()
+        index = 0
+        position = 0   # frames grabbed since the start of the file
+        failures = 0
+
+        while not self._stop.is_set():
+            if not self._cap.grab():
+                failures += 1
+                if self.growing is not None:
+                    # End of what has been uploaded so far: reopen to see the new bytes.
+                    # Once the upload is complete, one last reopen reads the tail.
+                    if self.growing.complete:
+                        self.growing = None
+                    else:
+                        self._stop.wait(self.config["growing_poll_s"])
+                    self._reopen()
+                    if position:
+                        self._cap.set(cv.CAP_PROP_POS_FRAMES, position)
+                    next_due = time.time()
+                    failures = 0
+                elif self.is_file and self.config["loop_files"] and failures <= 2:
+                    self._cap.set(cv.CAP_PROP_POS_FRAMES, 0)
+                    position = 0
+                elif self.is_file:
+                    break
+                else:
+                    # Live source hiccup: back off and reconnect instead of spinning
+                    self._stop.wait(self.config["reconnect_delay"])
+                    self._reopen()
+                continue
+            failures = 0
+            self._grabbed += 1
+            index += 1
+            position += 1
+
+            if self.is_file:
+                # Pace files at their native rate
+                next_due += frame_interval
+                delay = next_due - time.time()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    next_due = time.time()
+
+            if index % stride != 0:
+                self._skipped += 1
+                continue
+
+            ok, frame = self._cap.retrieve()
+            if not ok or frame is None:
+                continue
+            if frame.shape[1] > self.config["max_width"]:
+                scale = self.config["max_width"] / frame.shape[1]
+                frame = cv.resize(frame, (0, 0), fx=scale, fy=scale)
+            self._decoded += 1
+            self._fps_window.append(time.time())
+
+            with self._cond:
+                if len(self._ring) == self._ring.maxlen:
+                    self._dropped += 1  # deque drops the oldest on append
+                self._ring.append(frame)
+                self._cond.notify()
+
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import threading
+from collections import deque
+
+EVENT_BUS_CONFIG = {
+    "history": 2000,           # events kept for resuming clients
+    "subscriber_queue": 256,   # per-connection backlog before the oldest event is dropped
+    "keepalive_s": 15,
+}
+
+
+def format_sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+class EventBus:
+    """
+    In-process pub/sub feeding the /events server-sent-events endpoint.
+
+    Pipelines publish from their worker threads; every event gets a
+    monotonically increasing id and is kept in a bounded history, so a client
+    that reconnects with Last-Event-ID receives exactly what it missed.
+    Async subscribers are woken through their event loop.
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(EVENT_BUS_CONFIG, **(config or {}))
+        self._history = deque(maxlen=self.config["history"])
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    @property
+    def last_id(self):
+        return self._seq
+
+    def publish(self, event_type, data):
+        with self._lock:
+            self._seq += 1
+            event = {"id": self._seq, "type": event_type, "data": data}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for loop, q in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, q, event)
+            except RuntimeError:
+                pass  # loop already closed; the connection is going away
+        return event["id"]
+
+    @staticmethod
+    def _deliver(q, event):
+        if q.full():
+            q.get_nowait()  # lagging client: drop its oldest event
+        q.put_nowait(event)
+
+    def subscriber_backlog(self):
+        """Events queued for delivery across all connected clients."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return sum(q.qsize() for _, q in subscribers)
+
+    def since(self, cursor):
+        """Events after cursor, plus whether the history no longer reaches back that far."""
+        with self._lock:
+            events = [e for e in self._history if e["id"] > cursor]
+            oldest = self._history[0]["id"] if self._history else self._seq + 1
+        return events, cursor < oldest - 1
+
+    async def stream(self, cursor=None, snapshot=None):
+        """
+        Async generator of SSE-formatted strings for one client.
+        cursor: last event id the client has seen (None for a fresh client).
+        snapshot: callable returning initial state, sent to fresh or out-of-range clients.
+        """
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue(maxsize=self.config["subscriber_queue"])
+        entry = (loop, q)
+        # Subscribe before reading history so nothing falls in between
+        with self._lock:
+            self._subscribers.add(entry)
+        try:
+            if cursor is None:
+                last = self.last_id
+                missed, gap = [], True
+            else:
+                last = cursor
+                missed, gap = self.since(cursor)
+            if gap and snapshot is not None:
+                yield format_sse({"id": self.last_id if cursor is None else last, "type": "snapshot", "data": snapshot()})
+            for event in missed:
+                last = event["id"]
+                yield format_sse(event)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(q.get(), timeout=self.config["keepalive_s"])
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event["id"] <= last:
+                    continue  # already sent from history
+                last = event["id"]
+                yield format_sse(event)
+        finally:
+            with self._lock:
+                self._subscribers.discard(entry)
+
+
+event_bus = EventBus()
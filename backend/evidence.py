@@ -0,0 +1,282 @@
+"""
+Evidence image store: violation and registration snapshots.
+
+Images are keyed by a relative path such as
+
+    alerts/2026/10/17/3f/violation_12_3fa9c1d2e4b84f0a9d1c2b3a4e5f6071.jpg
+
+(category / date / two hex shard characters / prefix_uuid), so names never
+collide and no directory grows without bound. save() copies the crop,
+allocates the key and returns at once; a small thread pool encodes the
+JPEG and a thumbnail next to it (<name>.thumb.jpg). A background pruner
+scans the store and deletes the oldest files once it is over its disk
+budget or past max_age_days.
+"""
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import cv2 as cv
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EVIDENCE_CONFIG = {
+    "root": os.path.join(BASE_DIR, "storage"),
+    "categories": ("alerts", "faces"),
+    "workers": 2,
+    "max_pending": 256,              # queued writes before save() falls back to writing inline
+    "jpeg_quality": 90,
+    "thumb_width": 240,
+    "thumb_quality": 70,
+    "max_bytes": 5 * 1024 ** 3,      # disk budget for all categories
+    "max_age_days": 30,              # 0 keeps files until the budget is hit
+    "prune_interval_s": 600.0,
+    "cache_max_age_s": 365 * 24 * 3600,   # keys are never reused, so responses are immutable
+}
+
+THUMB_SUFFIX = ".thumb.jpg"
+
+
+class EvidenceStore:
+    """Sharded, asynchronously written evidence images with thumbnails and retention."""
+
+    def __init__(self, config=None):
+        self.config = dict(EVIDENCE_CONFIG, **(config or {}))
+        self.root = os.path.abspath(self.config["root"])
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = {}   # key -> Future
+        self._stop = threading.Event()
+        self._pruner = None
+        self.metrics = {
+            "saved": 0,
+            "written": 0,
+            "inline_writes": 0,
+            "failed": 0,
+            "pruned_files": 0,
+            "pruned_bytes": 0,
+            "bytes": 0,
+            "last_prune_ms": 0.0,
+        }
+
+    # -------------------- KEYS --------------------
+
+    def new_key(self, category, prefix=""):
+        now = datetime.now()
+        name = uuid.uuid4().hex
+        filename = f"{prefix}_{name}.jpg" if prefix else f"{name}.jpg"
+        return "/".join((category, now.strftime("%Y"), now.strftime("%m"), now.strftime("%d"), name[:2], filename))
+
+    def path(self, key, thumb=False):
+        """Absolute path for a key; raises ValueError for keys that escape the store."""
+        path = os.path.abspath(os.path.join(self.root, *key.split("/")))
+        if not path.startswith(self.root + os.sep) or key.split("/", 1)[0] not in self.config["categories"]:
+            raise ValueError(f"Invalid evidence key: {key}")
+        if thumb:
+            path = path[:-len(".jpg")] + THUMB_SUFFIX if path.endswith(".jpg") else path + THUMB_SUFFIX
+        return path
+
+    def key_for(self, stored, category="alerts"):
+        """
+        Normalizes what the DB holds to a key: new rows store the key itself,
+        older ones an absolute path or a bare filename under storage/<category>.
+        """
+        if not stored:
+            return ""
+        if os.path.isabs(stored):
+            rel = os.path.relpath(stored, self.root)
+            if not rel.startswith(".."):
+                return rel.replace(os.sep, "/")
+            stored = os.path.basename(stored)
+        return stored if "/" in stored else f"{category}/{stored}"
+
+    # -------------------- WRITES --------------------
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.config["workers"], thread_name_prefix="evidence")
+        return self._executor
+
+    def save(self, category, image, prefix=""):
+        """Queues an image for writing and returns its key immediately."""
+        key = self.new_key(category, prefix)
+        image = image.copy()   # crops are views into a frame that is drawn on next
+        self.metrics["saved"] += 1
+        with self._lock:
+            backed_up = len(self._pending) >= self.config["max_pending"]
+        if backed_up:
+            # Evidence is never dropped: when the pool falls behind, write on the caller's thread
+            self.metrics["inline_writes"] += 1
+            self._write(key, image)
+            return key
+        future = self._pool().submit(self._write, key, image)
+        with self._lock:
+            self._pending[key] = future
+        future.add_done_callback(lambda _: self._done(key))
+        return key
+
+    def _done(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _write(self, key, image):
+        path = self.path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            ok, data = cv.imencode(".jpg", image, [cv.IMWRITE_JPEG_QUALITY, self.config["jpeg_quality"]])
+            if not ok:
+                raise RuntimeError("JPEG encode failed")
+            thumb = self._thumbnail(image)
+            # Write to a temp name and rename, so readers never see a partial file
+            for target, payload in ((path, data), (self.path(key, thumb=True), thumb)):
+                tmp = target + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(payload.tobytes())
+                os.replace(tmp, target)
+                self.metrics["bytes"] += len(payload)
+            self.metrics["written"] += 1
+        except Exception as e:
+            self.metrics["failed"] += 1
+            print(f"[ERROR] Evidence write failed for {key}: {e}")
+
+    def _thumbnail(self, image):
+        h, w = image.shape[:2]
+        width = self.config["thumb_width"]
+        if w > width:
+            image = cv.resize(image, (width, max(1, round(h * width / w))), interpolation=cv.INTER_AREA)
+        ok, data = cv.imencode(".jpg", image, [cv.IMWRITE_JPEG_QUALITY, self.config["thumb_quality"]])
+        if not ok:
+            raise RuntimeError("Thumbnail encode failed")
+        return data
+
+    def wait(self, key, timeout=None):
+        """Blocks until a queued key has been written (no-op if it is not pending)."""
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            future.result(timeout=timeout)
+
+    def flush(self, timeout=None):
+        """Waits for every queued write."""
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            future.result(timeout=timeout)
+
+    def ensure_thumbnail(self, key):
+        """Path of the key's thumbnail, creating it for images stored before thumbnails existed."""
+        thumb = self.path(key, thumb=True)
+        if not os.path.exists(thumb):
+            image = cv.imread(self.path(key))
+            if image is None:
+                raise FileNotFoundError(key)
+            data = self._thumbnail(image)
+            tmp = thumb + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data.tobytes())
+            os.replace(tmp, thumb)
+        return thumb
+
+    # -------------------- RETENTION --------------------
+
+    def _files(self):
+        for category in self.config["categories"]:
+            top = os.path.join(self.root, category)
+            for dirpath, _, filenames in os.walk(top):
+                for name in filenames:
+                    if name.endswith(".tmp"):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield st.st_mtime, st.st_size, path
+
+    def prune(self, now=None):
+        """Deletes files past max_age_days, then the oldest until under max_bytes. Returns files removed."""
+        start = time.perf_counter()
+        now = time.time() if now is None else now
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        max_age = self.config["max_age_days"] * 86400
+        removed = freed = 0
+        for mtime, size, path in files:
+            expired = max_age and now - mtime > max_age
+            if not expired and total - freed <= self.config["max_bytes"]:
+                break   # sorted oldest first: nothing later is expired either
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += size
+        if removed:
+            self._remove_empty_dirs()
+            print(f"[INFO] Evidence retention: removed {removed} files ({freed / 1024 ** 2:.1f} MiB)")
+        self.metrics["pruned_files"] += removed
+        self.metrics["pruned_bytes"] += freed
+        self.metrics["bytes"] = total - freed
+        self.metrics["last_prune_ms"] = round((time.perf_counter() - start) * 1000.0, 1)
+        return removed
+
+    def _remove_empty_dirs(self):
+        for category in self.config["categories"]:
+            top = os.path.join(self.root, category)
+            for dirpath, dirnames, filenames in os.walk(top, topdown=False):
+                if dirpath != top and not dirnames and not filenames:
+                    try:
+                        os.rmdir(dirpath)
+                    except OSError:
+                        pass   # a writer just created something in it
+
+    def start(self, interval_s=None):
+        """Runs prune() now and every interval_s seconds on a daemon thread."""
+        interval_s = interval_s or self.config["prune_interval_s"]
+        if self._pruner is not None:
+            return self
+
+        def run():
+            while True:
+                try:
+                    self.prune()
+                except Exception as e:
+                    print(f"[ERROR] Evidence pruning failed: {e}")
+                if self._stop.wait(interval_s):
+                    return
+
+        self._stop.clear()
+        self._pruner = threading.Thread(target=run, name="evidence-pruner", daemon=True)
+        self._pruner.start()
+        return self
+
+    def close(self):
+        """Stops the pruner and finishes queued writes."""
+        self._stop.set()
+        if self._pruner is not None:
+            self._pruner.join(timeout=5)
+            self._pruner = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        usage = shutil.disk_usage(self.root) if os.path.isdir(self.root) else None
+        return dict(
+            self.metrics,
+            pending=pending,
+            max_bytes=self.config["max_bytes"],
+            disk_free=usage.free if usage else None,
+        )
+
+
+evidence_store = EvidenceStore()
@@ -0,0 +1,185 @@
+"""
+Exports the YOLO detector and the OSNet ReID model to ONNX, optionally with
+INT8 quantization, for INFERENCE_CONFIG["backend"] = "onnx".
+
+    python -m backend.export_onnx                                  # fp32 only
+    python -m backend.export_onnx --quantize dynamic
+    python -m backend.export_onnx --quantize static --calib videos/uploads/site.mp4
+
+Static quantization calibrates activations on real data: frames from --calib
+(a video or a folder of images) for YOLO, and person crops from --reid-calib
+(defaults to storage/faces, where the pipeline saves its snapshots) for OSNet.
+Check the result with benchmarks/bench_onnx.py before switching backends.
+"""
+import argparse
+import glob
+import os
+import shutil
+
+import cv2 as cv
+import numpy as np
+
+from backend.models import MODEL_PATH
+from backend.onnx_backend import BASE_DIR, ONNX_DIR, onnx_model_path, yolo_input
+from backend.reid_batch import BatchedReID
+
+EXPORT_CONFIG = {
+    "imgsz": 640,
+    "opset": 17,
+    "calib_samples": 200,
+    "reid_calib_dir": os.path.join(BASE_DIR, "storage", "faces"),
+}
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+# -------------------- EXPORT --------------------
+
+def export_yolo(model_path=MODEL_PATH, imgsz=640, opset=17):
+    from ultralytics import YOLO
+
+    exported = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True, opset=opset)
+    target = onnx_model_path("yolo")
+    shutil.move(exported, target)
+    print(f"[INFO] YOLO exported to {target}")
+    return target
+
+
+def export_reid(opset=17):
+    import torch
+    from reid_manger import embedding_model
+
+    model, _ = embedding_model()
+    model = model.cpu().eval()
+    h, w = BatchedReID(None).input_size
+    target = onnx_model_path("osnet")
+    torch.onnx.export(
+        model, torch.randn(1, 3, h, w), target,
+        input_names=["images"], output_names=["embeddings"],
+        dynamic_axes={"images": {0: "batch"}, "embeddings": {0: "batch"}},
+        opset_version=opset,
+    )
+    print(f"[INFO] OSNet exported to {target}")
+    return target
+
+
+# -------------------- CALIBRATION --------------------
+
+def load_images(source, limit):
+    """Up to `limit` BGR images from a video (evenly spaced frames) or an image folder."""
+    if source is None:
+        return []
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+        step = max(1, len(paths) // limit)
+        images = [cv.imread(p) for p in paths[::step][:limit]]
+        return [img for img in images if img is not None]
+
+    cap = cv.VideoCapture(source)
+    total = int(cap.get(cv.CAP_PROP_FRAME_COUNT)) or limit
+    indices = set(np.linspace(0, max(0, total - 1), num=min(limit, total), dtype=int).tolist())
+    images, index = [], 0
+    while cap.grab():
+        if index in indices:
+            ok, frame = cap.retrieve()
+            if ok:
+                images.append(frame)
+        index += 1
+    cap.release()
+    return images
+
+
+class _BatchReader:
+    """onnxruntime CalibrationDataReader over pre-built input batches."""
+
+    def __init__(self, input_name, batches):
+        self.input_name = input_name
+        self._batches = iter(batches)
+
+    def get_next(self):
+        batch = next(self._batches, None)
+        return None if batch is None else {self.input_name: batch}
+
+
+def _random_crops(frames, count, rng):
+    crops = []
+    for _ in range(count):
+        frame = frames[rng.integers(len(frames))]
+        h, w = frame.shape[:2]
+        ch, cw = int(h * rng.uniform(0.3, 0.8)), int(w * rng.uniform(0.1, 0.3))
+        y, x = rng.integers(0, h - ch + 1), rng.integers(0, w - cw + 1)
+        crops.append(frame[y:y + ch, x:x + cw])
+    return crops
+
+
+# -------------------- QUANTIZATION --------------------
+
+def quantize(name, mode, calib_batches=None):
+    """Writes model/onnx/<name>.int8-<mode>.onnx from the fp32 export."""
+    import onnx
+    from onnxruntime.quantization import (
+        quantize_dynamic, quantize_static, QuantType, QuantFormat,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    source = onnx_model_path(name)
+    target = onnx_model_path(name, mode)
+    prepared = source.replace(".onnx", ".prep.onnx")
+    quant_pre_process(source, prepared)
+
+    if mode == "dynamic":
+        # Weights to INT8, activations quantized on the fly; no calibration needed
+        quantize_dynamic(prepared, target, weight_type=QuantType.QInt8)
+    else:
+        if not calib_batches:
+            raise ValueError(f"Static quantization of {name} needs calibration data")
+        input_name = onnx.load(prepared, load_external_data=False).graph.input[0].name
+        quantize_static(
+            prepared, target, _BatchReader(input_name, calib_batches),
+            quant_format=QuantFormat.QDQ, per_channel=True,
+            activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+        )
+    os.remove(prepared)
+    print(f"[INFO] {name} quantized ({mode}) to {target}")
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export YOLO and OSNet to ONNX")
+    parser.add_argument("--model", default=MODEL_PATH, help="YOLO .pt weights")
+    parser.add_argument("--imgsz", type=int, default=EXPORT_CONFIG["imgsz"])
+    parser.add_argument("--opset", type=int, default=EXPORT_CONFIG["opset"])
+    parser.add_argument("--quantize", choices=["dynamic", "static"], help="also write an INT8 variant")
+    parser.add_argument("--calib", help="video or image folder for static calibration (YOLO)")
+    parser.add_argument("--reid-calib", default=EXPORT_CONFIG["reid_calib_dir"], help="folder of person crops (OSNet)")
+    parser.add_argument("--samples", type=int, default=EXPORT_CONFIG["calib_samples"])
+    parser.add_argument("--skip-export", action="store_true", help="only quantize existing fp32 exports")
+    args = parser.parse_args()
+
+    os.makedirs(ONNX_DIR, exist_ok=True)
+    if not args.skip_export:
+        export_yolo(args.model, args.imgsz, args.opset)
+        export_reid(args.opset)
+    if not args.quantize:
+        return
+
+    yolo_batches = reid_batches = None
+    if args.quantize == "static":
+        frames = load_images(args.calib, args.samples)
+        if not frames:
+            raise SystemExit("[ERROR] --calib is required for static quantization")
+        yolo_batches = [yolo_input([f], args.imgsz) for f in frames]
+
+        crops = load_images(args.reid_calib, args.samples) if os.path.isdir(args.reid_calib) else []
+        if not crops:
+            print("[WARN] No person crops found for OSNet calibration; using random frame crops")
+            crops = _random_crops(frames, args.samples, np.random.default_rng(0))
+        reid = BatchedReID(None)
+        reid_batches = [reid.preprocess(crops[i:i + 16]) for i in range(0, len(crops), 16)]
+
+    quantize("yolo", args.quantize, yolo_batches)
+    quantize("osnet", args.quantize, reid_batches)
+
+
+if __name__ == "__main__":
+    main()
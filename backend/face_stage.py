@@ -0,0 +1,108 @@
+import os
+import cv2 as cv
+import numpy as np
+from deepface import DeepFace
+
+# Same Haar cascade DeepFace uses for detector_backend='opencv'
+FACE_CASCADE_PATH = os.path.join(cv.data.haarcascades, "haarcascade_frontalface_default.xml")
+
+
+class FaceStage:
+    """
+    Detects faces once per frame and embeds them with FaceNet in batches.
+
+    Instead of running DeepFace.represent (detector + single-face embedding)
+    on every person crop, the cascade runs once over the region covering the
+    heads of all candidate persons, each face is assigned to the innermost
+    person box whose head region contains its centre, and all assigned faces
+    go through the FaceNet model together.
+    """
+
+    def __init__(self, model_name="Facenet", max_batch_size=32, min_face_size=20, head_fraction=0.5):
+        self.model = DeepFace.build_model(model_name=model_name)
+        self.input_size = tuple(getattr(self.model, "input_shape", (160, 160)))
+        self.max_batch_size = max_batch_size
+        self.min_face_size = min_face_size
+        self.head_fraction = head_fraction
+        self.detector = cv.CascadeClassifier(FACE_CASCADE_PATH)
+
+    # -------------------- DETECTION --------------------
+
+    def _head_region(self, box):
+        x1, y1, x2, y2 = box
+        return x1, y1, x2, y1 + int((y2 - y1) * self.head_fraction)
+
+    def detect(self, frame, person_boxes):
+        """
+        Runs the face detector once and returns {track_id: (x1, y1, x2, y2)},
+        keeping the largest face assigned to each person.
+        """
+        if not person_boxes:
+            return {}
+        heads = {tid: self._head_region(box) for tid, box in person_boxes.items()}
+        h, w = frame.shape[:2]
+        rx1 = max(0, min(r[0] for r in heads.values()))
+        ry1 = max(0, min(r[1] for r in heads.values()))
+        rx2 = min(w, max(r[2] for r in heads.values()))
+        ry2 = min(h, max(r[3] for r in heads.values()))
+        if rx2 - rx1 < self.min_face_size or ry2 - ry1 < self.min_face_size:
+            return {}
+
+        gray = cv.cvtColor(frame[ry1:ry2, rx1:rx2], cv.COLOR_BGR2GRAY)
+        detections = self.detector.detectMultiScale(
+            gray, scaleFactor=1.1, minNeighbors=10, minSize=(self.min_face_size, self.min_face_size)
+        )
+
+        faces = {}
+        for fx, fy, fw, fh in detections:
+            fx, fy = int(fx) + rx1, int(fy) + ry1
+            cx, cy = fx + fw / 2, fy + fh / 2
+            owner, owner_area = None, None
+            for tid, (hx1, hy1, hx2, hy2) in heads.items():
+                if hx1 <= cx <= hx2 and hy1 <= cy <= hy2:
+                    x1, y1, x2, y2 = person_boxes[tid]
+                    area = (x2 - x1) * (y2 - y1)
+                    if owner_area is None or area < owner_area:
+                        owner, owner_area = tid, area
+            if owner is None:
+                continue
+            prev = faces.get(owner)
+            if prev is None or fw * fh > (prev[2] - prev[0]) * (prev[3] - prev[1]):
+                faces[owner] = (fx, fy, fx + int(fw), fy + int(fh))
+        return faces
+
+    # -------------------- EMBEDDING --------------------
+
+    def _preprocess(self, face):
+        # Mirrors DeepFace's resize_image: keep aspect ratio, zero-pad, scale to [0, 1]
+        th, tw = self.input_size
+        factor = min(th / face.shape[0], tw / face.shape[1])
+        resized = cv.resize(face, (max(1, int(face.shape[1] * factor)), max(1, int(face.shape[0] * factor))))
+        out = np.zeros((th, tw, 3), dtype=np.float32)
+        oy = (th - resized.shape[0]) // 2
+        ox = (tw - resized.shape[1]) // 2
+        out[oy:oy + resized.shape[0], ox:ox + resized.shape[1]] = resized
+        return out / 255.0
+
+    def _forward(self, batch):
+        return np.asarray(self.model.model(batch, training=False)).reshape(len(batch), -1)
+
+    def embed(self, frame, faces):
+        """Embeds the given {track_id: face_box} crops; returns {track_id: embedding}."""
+        items = []
+        for tid, (x1, y1, x2, y2) in faces.items():
+            face = frame[max(0, y1):y2, max(0, x1):x2]
+            if face.size > 0:
+                items.append((tid, face))
+
+        embeddings = {}
+        for start in range(0, len(items), self.max_batch_size):
+            chunk = items[start:start + self.max_batch_size]
+            batch = np.stack([self._preprocess(face) for _, face in chunk])
+            for (tid, _), emb in zip(chunk, self._forward(batch)):
+                embeddings[tid] = emb
+        return embeddings
+
+    def process(self, frame, person_boxes):
+        """Detect + assign + embed in one call. Returns {track_id: embedding}."""
+        return self.embed(frame, self.detect(frame, person_boxes))
@@ -1,20 +1,31 @@
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, WebSocket
+from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-import shutil
+from fastapi.responses import StreamingResponse, JSONResponse, Response, FileResponse
+from fastapi.encoders import jsonable_encoder
+import asyncio
+import functools
 import os
-import cv2 as cv
-import numpy as np
-from pathlib import Path
-from typing import List
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import List, Optional
 
-from backend.schemas import ViolationResponse, StatsResponse, WorkerResponse
-from backend.pipeline_service import PPEPipeline
-from database.database import get_recent_violations, get_all_workers
+from backend.schemas import ViolationResponse, StatsResponse, WorkerResponse, StreamCreate, StreamInfo, UploadCreate, UploadStatus, MotionSettings
+from backend.stream_manager import StreamManager
+from backend.models import ModelLoader
+from backend.gallery_snapshot import gallery_snapshot
+from backend.evidence import evidence_store
+from backend.uploads import upload_manager, UploadError
+from backend.webcam_session import WebcamSession, active_sessions, INFERENCE_EXECUTOR
+from backend.events import event_bus
+from backend.response_cache import response_cache, encode_cursor, decode_cursor
+from backend.jobs import JobManager
+from backend import metrics
+from database.database import (
+    get_violations_page, get_workers_page, get_table_state, close_pool, pool_stats, health_check, DB_CALL_HOOKS,
+)
+from database.write_behind import write_queue
 
 app = FastAPI(title="PPE Detection System")
 
-from fastapi.staticfiles import StaticFiles
 
 # CORS Setup
 app.add_middleware(
@@ -23,33 +34,127 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Upload-Offset", "Upload-Length", "Location"],
 )
 
 # Directories
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-UPLOAD_DIR = os.path.join(BASE_DIR, "videos", "uploads")
-STORAGE_DIR = os.path.join(BASE_DIR, "storage")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-os.makedirs(STORAGE_DIR, exist_ok=True)
 
-# Mount Storage for Static Access (Snapshots)
-app.mount("/storage", StaticFiles(directory=STORAGE_DIR), name="storage")
+# Uploads are written under videos/uploads with unique names (see backend/uploads.py)
+
+# Snapshots are served by /evidence/{key} (with thumbnails and cache headers), not a static mount
+
+# One stream manager holds every camera; models and the identity gallery are shared.
+# The legacy single-stream endpoints map to DEFAULT_STREAM, the webcam socket to WEBCAM_STREAM.
+DEFAULT_STREAM = "default"
+WEBCAM_STREAM = "webcam"
+
+# Models load off the import path (see MODEL_LOADER_CONFIG); the default streams
+# are created once they are warm, and /readyz reports ready after that.
+model_loader = ModelLoader()
+stream_manager = StreamManager(loader=model_loader)
+
+def _on_models_ready(models):
+    # Known workers are recognised from the first frame instead of re-registered
+    gallery_snapshot.warm_start(models.gallery)
+    gallery_snapshot.start(models.gallery)
+    stream_manager.create(DEFAULT_STREAM)
+    stream_manager.create(WEBCAM_STREAM)
+
+model_loader.on_ready(_on_models_ready)
+
+# Offline video audits run in their own process pool, away from the live streams
+job_manager = JobManager()
+
+# Metrics: DB call latencies/errors via hook, everything else read at scrape time
+DB_CALL_HOOKS.append(metrics.observe_db_call)
+metrics.registry.register_collector(lambda: metrics.collect_streams(stream_manager))
+metrics.registry.register_collector(lambda: metrics.collect_write_queue(write_queue))
+metrics.registry.register_collector(lambda: metrics.collect_db_pool(pool_stats))
+metrics.registry.register_collector(lambda: metrics.collect_sessions(active_sessions))
+metrics.registry.register_collector(lambda: metrics.collect_event_bus(event_bus))
+metrics.registry.register_collector(lambda: metrics.collect_evidence(evidence_store))
+metrics.registry.register_collector(lambda: metrics.collect_uploads(upload_manager))
+
+# Tell dashboards when a provisional worker id is replaced by the real row id (new_id null: dropped)
+write_queue.add_listener(
+    lambda old_id, new_id: event_bus.publish("worker_resolved", {"old_id": old_id, "new_id": new_id})
+)
+# New violations are pushed once committed, with their row id and the real worker id
+def publish_violations(rows):
+    for row in rows:
+        event_bus.publish("violation", dict(row, timestamp=row["timestamp"].isoformat(), worker_name=None))
+
+write_queue.add_violation_listener(publish_violations)
+
+def require_models():
+    """503 until the models are loaded and warm (starts the load in lazy mode)."""
+    if not model_loader.ready:
+        model_loader.start()
+        raise HTTPException(status_code=503, detail=f"Models not ready ({model_loader.state})",
+                            headers={"Retry-After": "5"})
 
-# Global Pipeline Instance (Singleton-ish for now)
-pipeline_instance = PPEPipeline()
+def get_stream(stream_id):
+    require_models()
+    pipeline = stream_manager.get(stream_id)
+    if pipeline is None:
+        raise HTTPException(status_code=404, detail=f"Unknown stream '{stream_id}'")
+    return pipeline
+
+async def save_upload(file: UploadFile):
+    """Streams a multipart upload to disk off the event loop; returns its unique path."""
+    try:
+        return await upload_manager.save_file(file)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=str(e))
+
+async def start_stream(stream_id, source, growing=None):
+    """stream_manager.create off the event loop: opening a capture and joining the old one can block."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, functools.partial(stream_manager.create, stream_id, source=source, growing=growing))
+
+@app.on_event("startup")
+def startup_event():
+    if model_loader.config["mode"] == "background":
+        model_loader.start()
+    evidence_store.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    gallery_snapshot.stop()
+    stream_manager.close()
+    job_manager.shutdown()
+    INFERENCE_EXECUTOR.shutdown(wait=False)
+    # Flush queued writes before the pool goes away
+    evidence_store.close()
+    write_queue.close()
+    close_pool()
 
 @app.get("/")
 def read_root():
     return {"status": "System Operational"}
 
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: models loaded and warmed, default streams created and the database reachable."""
+    status = model_loader.status()
+    status["database"] = "ok" if health_check() else "unreachable"
+    ready = model_loader.ready and status["database"] == "ok"
+    return JSONResponse(status, status_code=200 if ready else 503)
+
 @app.post("/upload_video")
 async def upload_video(file: UploadFile = File(...)):
-    file_location = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_location, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    require_models()
+    file_location = await save_upload(file)
     
     # Initialize pipeline with new video
-    pipeline_instance.set_source(file_location)
+    await start_stream(DEFAULT_STREAM, file_location)
     
     return {"filename": file.filename, "status": "Uploaded and Pipeline Initialized"}
 
@@ -59,28 +164,21 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         await websocket.accept()
         print("[DEBUG] WebSocket Accepted")
+        if not model_loader.ready:
+            model_loader.start()
+            await websocket.close(code=1013, reason="Models are loading")  # try again later
+            return
         
+        # The webcam gets its own stream so it does not disturb the video feed
+        pipeline_instance = stream_manager.get_or_create(WEBCAM_STREAM)
         pipeline_instance.reset_session()
         print("[INFO] WebSocket Connected: Webcam Mode")
         
-        while True:
-            data = await websocket.receive_bytes()
-            # print(f"[DEBUG] Received frame data: {len(data)} bytes") # Commented out to reduce noise
-            
-            nparr = np.frombuffer(data, np.uint8)
-            frame = cv.imdecode(nparr, cv.IMREAD_COLOR)
-
-            if frame is None:
-                print("[WARN] Received empty/invalid frame")
-                continue
-
-            # Process frame
-            processed_frame = pipeline_instance._process_frame(frame)
-
-            # Encode and send back
-            _, buffer = cv.imencode('.jpg', processed_frame)
-            await websocket.send_bytes(buffer.tobytes())
+        # Receiving and inference are decoupled; inference runs on INFERENCE_EXECUTOR
+        await WebcamSession(websocket, pipeline_instance).run()
             
+    except WebSocketDisconnect:
+        print("[INFO] WebSocket Disconnected")
     except Exception as e:
         print(f"[ERROR] WebSocket Error: {e}")
         import traceback
@@ -91,39 +189,357 @@ async def websocket_endpoint(websocket: WebSocket):
             pass
 
 
+@app.get("/ws_stream/stats")
+def get_ws_stats():
+    """Per-connection latency and dropped-frame counters for open webcam sockets."""
+    return [session.snapshot() for session in list(active_sessions.values())]
+
 @app.get("/video_feed")
 def video_feed():
     """
     Stream video frames from the pipeline.
     """
-    return StreamingResponse(pipeline_instance.generate_frames(), 
-                             media_type="multipart/x-mixed-replace; boundary=frame")
+    return stream_video_feed(DEFAULT_STREAM)
+
+def page_state(scope):
+    """DB state a page of `scope` depends on; violation pages also show worker names."""
+    violations_max, workers_max = get_table_state()
+    return (violations_max, workers_max) if scope == "violations" else workers_max
+
+def serve_page(request: Request, scope, query, fetch):
+    """
+    Serves a list page through the response cache. fetch() -> (rows, next_cursor).
+    Clients sending a current If-None-Match get a 304 after a max-id lookup,
+    without the page query.
+    """
+    try:
+        state = page_state(scope)
+        etag = response_cache.etag(scope, query, state)
+        if response_cache.not_modified(etag, request.headers.get("if-none-match")):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        page = response_cache.get(scope, query, state)
+        if page is None:
+            rows, next_cursor = fetch()
+            page = (jsonable_encoder(rows), next_cursor)
+            response_cache.put(scope, query, state, page)
+    except Exception as e:
+        print(f"[DB ERROR] {scope} page: {e}")
+        return JSONResponse(content=[])
+
+    rows, next_cursor = page
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return JSONResponse(content=rows, headers=headers)
+
+def parse_cursor(cursor):
+    try:
+        return decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/violations", response_model=List[ViolationResponse])
-def get_violations():
-    # Fetch violations from current session
-    violations = get_recent_violations(limit=50, from_timestamp=pipeline_instance.session_start_time)
-    
-    return [ViolationResponse(
-        id=v['id'],
-        worker_id=str(v['worker_id']), 
-        equipped_items=v['equipped_items'], 
-        violated_items=v['violated_items'],
-        evidence_path=os.path.basename(v['evidence_path']) if v['evidence_path'] else "", # Return only filename
-        timestamp=v['timestamp'],
-        worker_name=v.get('worker_name')
-    ) for v in violations]
+def get_violations(
+    request: Request,
+    stream_id: str = DEFAULT_STREAM,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    worker_id: Optional[str] = None,
+    violated_item: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+):
+    """
+    Violations newest first, keyset-paginated: pass the X-Next-Cursor header of
+    one page as ?cursor= to get the next. Defaults to the stream's current session.
+    """
+    if since is None:
+        # Fetch violations from current session
+        since = get_stream(stream_id).session_start_time
+    key_cursor = parse_cursor(cursor)
+    query = (limit, cursor, worker_id, violated_item, since, until)
+
+    def fetch():
+        violations = get_violations_page(limit, key_cursor, worker_id, violated_item, since, until)
+        rows = [ViolationResponse(
+            id=v['id'],
+            worker_id=str(v['worker_id']), 
+            equipped_items=v['equipped_items'], 
+            violated_items=v['violated_items'],
+            evidence_path=evidence_store.key_for(v['evidence_path']),  # served at /evidence/{key}
+            timestamp=v['timestamp'],
+            worker_name=v.get('worker_name')
+        ) for v in violations]
+        next_cursor = None
+        if len(violations) == limit:
+            next_cursor = encode_cursor(violations[-1]['timestamp'], violations[-1]['id'])
+        return rows, next_cursor
+
+    return serve_page(request, "violations", query, fetch)
 
 @app.get("/stats", response_model=StatsResponse)
 def get_stats():
-    # TODO: Aggregate from pipeline or DB
-    return pipeline_instance.get_stats()
+    """Counts summed over every stream (per-stream numbers are at /streams/{id}/stats)."""
+    stats = {"total_workers": 0, "helmet_count": 0, "vest_count": 0, "mask_count": 0, "violations_today": 0}
+    stats.update(stream_manager.aggregate_stats())
+    return stats
+
+@app.get("/events")
+async def events(request: Request, cursor: Optional[int] = None):
+    """
+    Server-sent events: 'stats' deltas and 'worker_resolved' id swaps as the
+    pipelines produce them, and new 'violation's once they are committed. Reconnecting clients send
+    Last-Event-ID (or ?cursor=) and receive only what they missed; fresh
+    clients start with a 'snapshot' of every stream's stats.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if cursor is None and last_event_id and last_event_id.isdigit():
+        cursor = int(last_event_id)
+
+    def snapshot():
+        return {"streams": {s["id"]: s["stats"] for s in stream_manager.list_streams()}}
+
+    return StreamingResponse(
+        event_bus.stream(cursor, snapshot=snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# -------------------- MULTI-STREAM --------------------
+
+@app.get("/streams", response_model=List[StreamInfo])
+def list_streams():
+    return stream_manager.list_streams()
+
+@app.post("/streams/{stream_id}", response_model=StreamInfo)
+def create_stream(stream_id: str, body: StreamCreate):
+    """Creates a stream (or re-points an existing one) at a file path, URL or camera index."""
+    require_models()
+    pipeline = stream_manager.create(stream_id, source=body.source)
+    return {"id": stream_id, "source": str(pipeline.source_path), "stats": pipeline.get_stats()}
+
+@app.delete("/streams/{stream_id}")
+def delete_stream(stream_id: str):
+    if not stream_manager.remove(stream_id):
+        raise HTTPException(status_code=404, detail=f"Unknown stream '{stream_id}'")
+    return {"id": stream_id, "status": "Removed"}
+
+@app.post("/streams/{stream_id}/upload_video")
+async def upload_stream_video(stream_id: str, file: UploadFile = File(...)):
+    require_models()
+    file_location = await save_upload(file)
+    await start_stream(stream_id, file_location)
+    return {"filename": file.filename, "stream_id": stream_id, "status": "Uploaded and Pipeline Initialized"}
+
+# -------------------- RESUMABLE UPLOADS --------------------
+
+def _upload_headers(session):
+    return {"Upload-Offset": str(session.offset), "Upload-Length": str(session.size)}
+
+def _upload_error(e):
+    headers = {"Upload-Offset": str(e.offset)} if e.offset is not None else None
+    return HTTPException(status_code=e.status, detail=str(e), headers=headers)
+
+@app.post("/uploads", response_model=UploadStatus, status_code=201)
+def create_upload(body: UploadCreate):
+    """Starts a resumable upload; send the bytes with PATCH /uploads/{id}."""
+    if body.stream_id:
+        require_models()
+    try:
+        session = upload_manager.create(body.filename, body.size, body.stream_id)
+    except UploadError as e:
+        raise _upload_error(e)
+    return JSONResponse(session.status(), status_code=201,
+                        headers=dict(_upload_headers(session), Location=f"/uploads/{session.id}"))
+
+@app.head("/uploads/{upload_id}")
+def head_upload(upload_id: str):
+    """Bytes received so far (Upload-Offset), to resume an interrupted upload."""
+    try:
+        session = upload_manager.get(upload_id)
+    except UploadError as e:
+        raise _upload_error(e)
+    return Response(headers=dict(_upload_headers(session), **{"Cache-Control": "no-store"}))
+
+@app.get("/uploads/{upload_id}", response_model=UploadStatus)
+def get_upload(upload_id: str):
+    try:
+        return upload_manager.get(upload_id).status()
+    except UploadError as e:
+        raise _upload_error(e)
+
+@app.patch("/uploads/{upload_id}", response_model=UploadStatus)
+async def patch_upload(upload_id: str, request: Request):
+    """
+    Appends the raw request body at Upload-Offset. The body is written as
+    it arrives; a dropped connection keeps what was received. The upload's
+    stream starts on the received prefix once it decodes.
+    """
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Upload-Offset header required")
+    try:
+        session = await upload_manager.append(upload_id, offset, request.stream())
+    except UploadError as e:
+        raise _upload_error(e)
+
+    if await upload_manager.should_start_stream(session):
+        growing = None if session.complete else session
+        await start_stream(session.stream_id, session.path, growing)
+        session.streaming = True
+        print(f"[INFO] Stream '{session.stream_id}' started on upload {session.id} at "
+              f"{session.offset}/{session.size} bytes")
+    return JSONResponse(session.status(), headers=_upload_headers(session))
+
+@app.delete("/uploads/{upload_id}")
+def delete_upload(upload_id: str):
+    try:
+        session = upload_manager.get(upload_id)
+    except UploadError as e:
+        raise _upload_error(e)
+    if session.streaming and not session.complete:
+        # A stream is reading the partial file: stop following it, keep what is there
+        pipeline = stream_manager.get(session.stream_id)
+        if pipeline is not None and pipeline.capture is not None:
+            pipeline.capture.growing = None
+    upload_manager.delete(upload_id)
+    return {"upload_id": upload_id, "status": "Deleted"}
+
+@app.get("/streams/{stream_id}/video_feed")
+def stream_video_feed(stream_id: str):
+    # Every viewer subscribes to the stream's single processing loop
+    get_stream(stream_id)
+    return StreamingResponse(stream_manager.subscribe(stream_id), 
+                             media_type="multipart/x-mixed-replace; boundary=frame")
+
+@app.get("/streams/{stream_id}/broadcast")
+def get_stream_broadcast_stats(stream_id: str):
+    """Viewer count, processed/encoded frames and frames dropped for slow viewers."""
+    get_stream(stream_id)
+    return stream_manager.broadcast_stats(stream_id)
+
+@app.get("/streams/{stream_id}/stats", response_model=StatsResponse)
+def get_stream_stats(stream_id: str):
+    return get_stream(stream_id).get_stats()
+
+@app.get("/streams/{stream_id}/capture")
+def get_stream_capture_stats(stream_id: str):
+    """Capture fps, dropped/skipped frame counts and ring buffer depth."""
+    return get_stream(stream_id).get_capture_stats() or {}
+
+@app.get("/streams/{stream_id}/tracks")
+def get_stream_tracks(stream_id: str):
+    """Live track count, evictions (idle / LRU), identity handoff cache usage and identification scheduling."""
+    pipeline = get_stream(stream_id)
+    return dict(pipeline.identity_manager.stats(), identification=pipeline.id_scheduler.stats())
+
+@app.get("/streams/{stream_id}/motion")
+def get_stream_motion(stream_id: str):
+    """Motion gate: frames inferred vs skipped, forced refreshes and the last measured change."""
+    return get_stream(stream_id).motion_gate.stats()
+
+@app.post("/streams/{stream_id}/motion")
+def configure_stream_motion(stream_id: str, body: MotionSettings):
+    """Adjusts the stream's motion gate (sensitivity, refresh, ignore / watch regions)."""
+    if body.method is not None and body.method not in ("diff", "mog2"):
+        raise HTTPException(status_code=422, detail="method must be 'diff' or 'mog2'")
+    gate = get_stream(stream_id).motion_gate
+    settings = {k: v for k, v in body.dict().items() if v is not None}
+    gate.configure(**settings)
+    # Applied by the stream thread on its next frame
+    return dict(gate.stats(), pending=settings)
+
+@app.get("/streams/{stream_id}/timings")
+def get_stream_timings(stream_id: str):
+    """Per-stage pipeline timings (count, total, mean, p50/p95/max in ms)."""
+    return get_stream(stream_id).timer.snapshot()
+
+@app.post("/jobs")
+async def submit_job(file: UploadFile = File(...)):
+    """Queue an uploaded video for offline analysis; returns the job id immediately."""
+    file_location = await save_upload(file)
+    job_id = job_manager.submit(file_location)
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/jobs")
+def list_jobs():
+    return job_manager.list_jobs()
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+@app.get("/jobs/{job_id}/evidence/{key:path}")
+def get_job_evidence(job_id: str, key: str, thumb: bool = False):
+    """A snapshot referenced by a job report (kept under the job's report directory)."""
+    store = job_manager.evidence_store(job_id)
+    if store is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return evidence_response(store, key, thumb)
+
+@app.get("/jobs/{job_id}/report")
+def get_job_report(job_id: str):
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    report_path = job_manager.report_path(job_id)
+    if report_path is None:
+        raise HTTPException(status_code=409, detail="Report not ready")
+    return FileResponse(report_path, media_type="application/json", filename=f"{job_id}.json")
+
+def evidence_response(store, key, thumb):
+    try:
+        store.wait(key, timeout=5)   # just saved and still being written
+        path = store.ensure_thumbnail(key) if thumb else store.path(key)
+    except FutureTimeout:
+        raise HTTPException(status_code=503, detail="Evidence is still being written",
+                            headers={"Retry-After": "2"})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid evidence key")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Evidence not found")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Evidence not found")
+    max_age = store.config["cache_max_age_s"]
+    return FileResponse(path, media_type="image/jpeg",
+                        headers={"Cache-Control": f"public, max-age={max_age}, immutable"})
+
+@app.get("/evidence/{key:path}")
+def get_evidence(key: str, thumb: bool = False):
+    """
+    A violation or registration snapshot; ?thumb=true returns the small
+    thumbnail. Keys are never reused, so responses are cacheable forever.
+    """
+    return evidence_response(evidence_store, key, thumb)
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of pipeline, socket and database metrics."""
+    return Response(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/db_queue")
+def get_db_queue_stats():
+    return write_queue.stats()
 
 @app.get("/workers", response_model=List[WorkerResponse])
-def get_workers():
-    workers = get_all_workers()
-    return [WorkerResponse(
-        id=w['id'],
-        display_name=w['display_name'],
-        created_at=w['created_at']
-    ) for w in workers]
+def get_workers(request: Request, limit: int = Query(100, ge=1, le=1000), cursor: Optional[str] = None):
+    """Workers newest first, keyset-paginated like /violations."""
+    key_cursor = parse_cursor(cursor)
+
+    def fetch():
+        workers = get_workers_page(limit, key_cursor)
+        rows = [WorkerResponse(
+            id=w['id'],
+            display_name=w['display_name'],
+            created_at=w['created_at']
+        ) for w in workers]
+        next_cursor = None
+        if len(workers) == limit:
+            next_cursor = encode_cursor(workers[-1]['created_at'], workers[-1]['id'])
+        return rows, next_cursor
+
+    return serve_page(request, "workers", (limit, cursor), fetch)
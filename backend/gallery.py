@@ -0,0 +1,209 @@
+import threading
+import numpy as np
+
+EMBEDDING_KINDS = ("face", "appearance")
+
+
+class _EmbeddingMatrix:
+    """Growable float32 matrix of L2-normalized rows with a row <-> id index."""
+
+    def __init__(self, initial_capacity=256):
+        self.initial_capacity = initial_capacity
+        self.clear()
+
+    def clear(self):
+        self.data = None
+        self.ids = []
+        self.rows = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _reserve(self, dim, needed):
+        if self.data is None:
+            capacity = max(self.initial_capacity, needed)
+            self.data = np.empty((capacity, dim), dtype=np.float32)
+        elif needed > self.data.shape[0]:
+            capacity = max(self.data.shape[0] * 2, needed)
+            grown = np.empty((capacity, self.data.shape[1]), dtype=np.float32)
+            grown[:len(self.ids)] = self.data[:len(self.ids)]
+            self.data = grown
+
+    def add(self, uuid, vector):
+        if self.data is not None and vector.shape[0] != self.data.shape[1]:
+            raise ValueError(f"Embedding dim {vector.shape[0]} does not match gallery dim {self.data.shape[1]}")
+        if uuid in self.rows:
+            self.data[self.rows[uuid]] = vector
+            return
+        self._reserve(vector.shape[0], len(self.ids) + 1)
+        self.data[len(self.ids)] = vector
+        self.rows[uuid] = len(self.ids)
+        self.ids.append(uuid)
+
+    def load(self, ids, data):
+        """Replaces the contents with N ids and an N x D matrix (used as is, no copy)."""
+        self.data = data
+        self.ids = list(ids)
+        self.rows = dict(zip(self.ids, range(len(self.ids))))
+
+    def remove(self, uuid):
+        row = self.rows.pop(uuid, None)
+        if row is None:
+            return False
+        # Swap the last row into the hole so the matrix stays contiguous
+        last = len(self.ids) - 1
+        if row != last:
+            self.data[row] = self.data[last]
+            moved = self.ids[last]
+            self.ids[row] = moved
+            self.rows[moved] = row
+        self.ids.pop()
+        return True
+
+    def rename(self, old, new):
+        if new in self.rows:
+            # Already loaded under its real id (e.g. by a snapshot refresh); drop the provisional row
+            return self.remove(old)
+        row = self.rows.pop(old, None)
+        if row is None:
+            return False
+        self.ids[row] = new
+        self.rows[new] = row
+        return True
+
+    def get(self, uuid):
+        row = self.rows.get(uuid)
+        return None if row is None else self.data[row]
+
+    def view(self):
+        if self.data is None:
+            return None
+        return self.data[:len(self.ids)]
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class EmbeddingGallery:
+    """
+    In-memory identity gallery keyed by worker UUID.
+
+    Face and appearance embeddings live in separate contiguous float32 matrices
+    and are normalized on insert, so a cosine search over the whole gallery is
+    a single matrix product. All methods are thread-safe so one gallery can
+    be shared by several streams.
+    """
+
+    def __init__(self, initial_capacity=256):
+        self._matrices = {kind: _EmbeddingMatrix(initial_capacity) for kind in EMBEDDING_KINDS}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.ids())
+
+    def __contains__(self, uuid):
+        with self._lock:
+            return any(uuid in m.rows for m in self._matrices.values())
+
+    def ids(self):
+        with self._lock:
+            seen = {}
+            for m in self._matrices.values():
+                seen.update(dict.fromkeys(m.ids))
+            return list(seen)
+
+    def size(self, emb_type="face"):
+        return len(self._matrices[emb_type])
+
+    def clear(self):
+        with self._lock:
+            for m in self._matrices.values():
+                m.clear()
+
+    def add(self, uuid, face=None, appearance=None):
+        """Registers (or replaces) the embeddings of a worker."""
+        with self._lock:
+            if face is not None:
+                self._matrices["face"].add(uuid, _normalize(face).reshape(-1))
+            if appearance is not None:
+                self._matrices["appearance"].add(uuid, _normalize(appearance).reshape(-1))
+
+    def load(self, emb_type, ids, vectors):
+        """
+        Bulk-replaces one embedding kind with already-normalized rows, e.g. a
+        memory-mapped snapshot. A copy-on-write mapping can be passed directly:
+        the matrix is only copied when it has to grow. vectors=None empties it.
+        """
+        if vectors is not None and len(ids) != len(vectors):
+            raise ValueError(f"{len(ids)} ids for {len(vectors)} {emb_type} embeddings")
+        with self._lock:
+            self._matrices[emb_type].load(ids, vectors)
+
+    def remove(self, uuid):
+        with self._lock:
+            removed = False
+            for m in self._matrices.values():
+                removed = m.remove(uuid) or removed
+            return removed
+
+    def rename(self, old_uuid, new_uuid):
+        """Re-keys a worker, e.g. once a provisional id is replaced by the DB row id."""
+        with self._lock:
+            renamed = False
+            for m in self._matrices.values():
+                renamed = m.rename(old_uuid, new_uuid) or renamed
+            return renamed
+
+    def get(self, uuid, emb_type="face"):
+        with self._lock:
+            vector = self._matrices[emb_type].get(uuid)
+            return None if vector is None else vector.copy()
+
+    def search(self, queries, emb_type="face", k=1):
+        """
+        Top-k cosine search for one (D,) or many (Q x D) query embeddings.
+
+        Returns, per query, a list of (uuid, score) pairs sorted best first.
+        A single query returns a single list.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        single = queries.ndim == 1
+        queries = _normalize(queries.reshape(1, -1) if single else queries)
+
+        m = self._matrices[emb_type]
+        with self._lock:
+            gallery = m.view()
+            if gallery is None or len(m) == 0:
+                results = [[] for _ in range(len(queries))]
+                return results[0] if single else results
+
+            if queries.shape[1] != gallery.shape[1]:
+                raise ValueError(f"Query dim {queries.shape[1]} does not match {emb_type} gallery dim {gallery.shape[1]}")
+            scores = queries @ gallery.T
+            ids = list(m.ids)
+        k = min(k, len(ids))
+        if k < len(ids):
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(len(ids)), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        results = [[(ids[i], float(s)) for i, s in zip(rows, row_scores)]
+                   for rows, row_scores in zip(top, top_scores)]
+        return results[0] if single else results
+
+    def best_match(self, embedding, emb_type="face", threshold=0.6):
+        """Returns (uuid, score) of the closest worker above threshold, else (None, best_score)."""
+        hits = self.search(embedding, emb_type, k=1)
+        if not hits:
+            return None, None
+        uuid, score = hits[0]
+        if score > threshold:
+            return uuid, score
+        return None, score
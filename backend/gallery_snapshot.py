@@ -0,0 +1,242 @@
+"""
+On-disk snapshot of worker embeddings for warm-starting EmbeddingGallery.
+
+    python -m backend.gallery_snapshot            # refresh from the workers table
+    python -m backend.gallery_snapshot --rebuild  # drop the snapshot and re-read everything
+
+Per embedding kind the snapshot is two append-only files: <kind>.f32, the
+L2-normalized rows as one contiguous float32 matrix, and <kind>.ids, the
+worker ids as fixed-width ASCII records in the same order. meta.json holds
+the row counts and the created_at watermark and is replaced atomically after
+each append, so bytes past its counts (an interrupted write) are ignored and
+truncated on the next refresh. Loading maps the matrix copy-on-write and
+hands it straight to the gallery; nothing is parsed or copied per row.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.gallery import EMBEDDING_KINDS, _normalize
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GALLERY_SNAPSHOT_CONFIG = {
+    # Not under storage/, which is served as static files
+    "dir": os.path.join(BASE_DIR, "data", "gallery"),
+    "refresh_interval_s": 300.0,
+    # Re-read this far behind the watermark: rows from transactions that
+    # started earlier can commit after a refresh. Known ids are skipped.
+    "watermark_overlap_s": 5.0,
+}
+
+SNAPSHOT_VERSION = 1
+ID_DTYPE = np.dtype("S36")   # worker row ids (INT) as the gallery keys them: decimal text, NUL-padded
+
+
+class GallerySnapshot:
+    """Memory-mapped worker embeddings, refreshed incrementally from the DB by created_at."""
+
+    def __init__(self, config=None):
+        self.config = dict(GALLERY_SNAPSHOT_CONFIG, **(config or {}))
+        self.dir = self.config["dir"]
+        self._lock = threading.Lock()
+        self._known = None    # ids already in the snapshot, built on first refresh
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -------------------- FILES --------------------
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def _empty_meta(self):
+        return {"version": SNAPSHOT_VERSION, "watermark": None, "kinds": {}}
+
+    def _read_meta(self):
+        try:
+            with open(self._path("meta.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return self._empty_meta()
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Unreadable gallery snapshot metadata, starting over: {e}")
+            return self._empty_meta()
+        if meta.get("version") != SNAPSHOT_VERSION:
+            return self._empty_meta()
+        for kind, entry in meta["kinds"].items():
+            dim, count = entry["dim"], entry["count"]
+            try:
+                short = (os.path.getsize(self._path(f"{kind}.f32")) < count * dim * 4
+                         or os.path.getsize(self._path(f"{kind}.ids")) < count * ID_DTYPE.itemsize)
+            except OSError:
+                short = True
+            if short:
+                print(f"[WARN] Gallery snapshot '{kind}' is shorter than its metadata, starting over")
+                return self._empty_meta()
+        return meta
+
+    def _write_meta(self, meta):
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path("meta.json"))
+
+    def _read_ids(self, meta, kind):
+        count = meta["kinds"].get(kind, {}).get("count", 0)
+        if not count:
+            return []
+        raw_ids = np.fromfile(self._path(f"{kind}.ids"), dtype=ID_DTYPE, count=count)
+        return [i.decode() for i in raw_ids.tolist()]
+
+    def _read(self, meta, kind):
+        ids = self._read_ids(meta, kind)
+        if not ids:
+            return [], None
+        count, dim = len(ids), meta["kinds"][kind]["dim"]
+        # Copy-on-write: the gallery may update rows in place without touching the file
+        matrix = np.memmap(self._path(f"{kind}.f32"), dtype=np.float32, mode="c", shape=(count, dim))
+        return ids, matrix
+
+    def _append(self, meta, kind, ids, vectors):
+        entry = meta["kinds"].setdefault(kind, {"dim": int(vectors.shape[1]), "count": 0})
+        count = entry["count"]
+        for name, width, payload in (
+            (f"{kind}.f32", vectors.shape[1] * 4, np.ascontiguousarray(vectors, dtype=np.float32).tobytes()),
+            (f"{kind}.ids", ID_DTYPE.itemsize, np.asarray(ids, dtype=ID_DTYPE).tobytes()),
+        ):
+            with open(self._path(name), "ab") as f:
+                f.truncate(count * width)   # drop any tail left by an interrupted append
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+        entry["count"] = count + len(ids)
+
+    # -------------------- LOAD / REFRESH --------------------
+
+    def load_into(self, gallery):
+        """Replaces the gallery's contents with the snapshot. Returns the number of rows loaded."""
+        with self._lock:
+            meta = self._read_meta()
+            loaded = 0
+            for kind in EMBEDDING_KINDS:
+                ids, matrix = self._read(meta, kind)
+                gallery.load(kind, ids, matrix)
+                loaded += len(ids)
+            return loaded
+
+    def refresh(self, gallery=None):
+        """
+        Appends workers created since the watermark to the snapshot (and to
+        `gallery`, if given). Returns the number of new rows.
+        """
+        from database.database import get_worker_embeddings_since
+        from database.embeddings import EMBEDDING_MODELS
+
+        with self._lock:
+            os.makedirs(self.dir, exist_ok=True)
+            meta = self._read_meta()
+            if self._known is None or not meta["kinds"]:
+                self._known = set()
+                for kind in meta["kinds"]:
+                    self._known.update(self._read_ids(meta, kind))
+
+            since = meta["watermark"]
+            if since is not None:
+                since = datetime.fromisoformat(since) - timedelta(seconds=self.config["watermark_overlap_s"])
+            added = 0
+            for model, (ids, vectors, created) in get_worker_embeddings_since(since).items():
+                stamps = [c for c in created if c is not None]
+                if stamps and (meta["watermark"] is None
+                               or max(stamps) > datetime.fromisoformat(meta["watermark"])):
+                    meta["watermark"] = max(stamps).isoformat()
+                new = [i for i, worker_id in enumerate(ids) if worker_id not in self._known]
+                if not new:
+                    continue
+                kind = EMBEDDING_MODELS[model]["kind"]
+                ids = [ids[i] for i in new]
+                vectors = _normalize(vectors[new])
+                self._known.update(ids)
+                self._append(meta, kind, ids, vectors)
+                if gallery is not None:
+                    for worker_id, vector in zip(ids, vectors):
+                        if worker_id not in gallery:
+                            gallery.add(worker_id, **{kind: vector})
+                added += len(ids)
+            if added or not os.path.exists(self._path("meta.json")):
+                self._write_meta(meta)
+            return added
+
+    def rebuild(self):
+        """Deletes the snapshot and re-reads every worker from the DB."""
+        with self._lock:
+            for name in os.listdir(self.dir) if os.path.isdir(self.dir) else []:
+                os.remove(self._path(name))
+            self._known = None
+        return self.refresh()
+
+    def warm_start(self, gallery, refresh=True):
+        """
+        Loads the snapshot into the gallery, then (optionally) catches up with
+        the DB. DB errors are reported, not raised: a stale gallery beats none.
+        """
+        start = time.perf_counter()
+        loaded = self.load_into(gallery)
+        added = 0
+        if refresh:
+            try:
+                added = self.refresh(gallery)
+            except Exception as e:
+                print(f"[DB ERROR] Gallery snapshot refresh failed: {e}")
+        print(f"[INFO] Gallery warm start: {loaded} from snapshot, {added} new from DB "
+              f"in {1000 * (time.perf_counter() - start):.0f} ms")
+        return loaded + added
+
+    # -------------------- BACKGROUND --------------------
+
+    def start(self, gallery, interval_s=None):
+        """Refreshes the snapshot (and gallery) every interval_s seconds on a daemon thread."""
+        interval_s = interval_s or self.config["refresh_interval_s"]
+        if self._thread is not None:
+            return self
+
+        def run():
+            while not self._stop.wait(interval_s):
+                try:
+                    added = self.refresh(gallery)
+                    if added:
+                        print(f"[INFO] Gallery snapshot: {added} new workers")
+                except Exception as e:
+                    print(f"[DB ERROR] Gallery snapshot refresh failed: {e}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="gallery-snapshot", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+gallery_snapshot = GallerySnapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the worker gallery snapshot")
+    parser.add_argument("--rebuild", action="store_true", help="discard the snapshot and re-read all workers")
+    args = parser.parse_args()
+    added = gallery_snapshot.rebuild() if args.rebuild else gallery_snapshot.refresh()
+    print(f"[INFO] {added} workers added to {gallery_snapshot.dir}")
+
+
+if __name__ == "__main__":
+    main()
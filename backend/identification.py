@@ -0,0 +1,181 @@
+import time
+
+import cv2 as cv
+
+IDENTIFICATION_CONFIG = {
+    "budget_ms": 30.0,           # identification work (quality gate + FaceNet + ReID) allowed per frame
+    "max_face_per_frame": 8,
+    "max_reid_per_frame": 8,
+    "min_per_frame": 1,          # always try this many of each, so a tight budget still makes progress
+    "quality_ttl_frames": 5,     # reuse a track's sharpness score for this many frames
+    "cooldown_frames": 3,        # after a failed attempt; doubles with each consecutive failure
+    "max_cooldown_frames": 48,
+    "cost_alpha": 0.2,           # EMA weight of new per-item cost samples
+    "initial_costs_ms": {"gate": 1.0, "face": 20.0, "reid": 6.0},
+    "reference_crop_area": 0.05, # crops this fraction of the frame (or larger) get full size priority
+    "weights": {"size": 1.0, "sharpness": 1.0, "trend": 0.5, "age": 0.75},
+}
+
+
+def sharpness(crop, min_size):
+    """Laplacian variance of the crop, or None if it is too small to hold a usable face."""
+    if crop is None or crop.size == 0 or crop.shape[0] < min_size or crop.shape[1] < min_size:
+        return None
+    return float(cv.Laplacian(cv.cvtColor(crop, cv.COLOR_BGR2GRAY), cv.CV_64F).var())
+
+
+class IdentificationScheduler:
+    """
+    Caps per-frame identification work for one stream.
+
+    Unidentified tracks compete for a per-frame time budget. They are ranked
+    by crop size, cached sharpness and its trend, and how long they have
+    waited; the sharpness score is kept on the TrackState and only
+    recomputed every quality_ttl_frames. Per-item costs of the quality gate,
+    FaceNet and ReID are learned from measured batch times, so the number
+    of embeddings scheduled tracks what actually fits in the budget. A track
+    whose attempt fails (blurry crop, no face found) is put on a cooldown that
+    doubles with each consecutive failure, so a crowd of unidentifiable
+    tracks cannot monopolise the budget. Face and ReID back off separately:
+    a face that never passes the gate does not hold up the appearance
+    fallback.
+    """
+
+    def __init__(self, config=None, min_face_size=40, sharpness_threshold=80, wait_for_face_limit=25):
+        self.config = dict(IDENTIFICATION_CONFIG, **(config or {}))
+        self.min_face_size = min_face_size
+        self.sharpness_threshold = sharpness_threshold
+        self.wait_for_face_limit = wait_for_face_limit
+        self.costs = dict(self.config["initial_costs_ms"])
+        self.frame = 0
+        self._start = time.perf_counter()
+        self.metrics = {
+            "gate_checks": 0,
+            "gate_cache_hits": 0,
+            "face_scheduled": 0,
+            "reid_scheduled": 0,
+            "deferred": 0,
+            "cooling_down": 0,
+            "failures": 0,
+            "frames_over_budget": 0,
+        }
+
+    # -------------------- BUDGET --------------------
+
+    def begin_frame(self, frame):
+        self.frame = frame
+        self._start = time.perf_counter()
+
+    def spent_ms(self):
+        return (time.perf_counter() - self._start) * 1000.0
+
+    def end_frame(self):
+        if self.spent_ms() > self.config["budget_ms"]:
+            self.metrics["frames_over_budget"] += 1
+
+    def observe(self, kind, seconds, count):
+        """Feeds a measured batch time into the per-item cost estimate."""
+        if count <= 0:
+            return
+        alpha = self.config["cost_alpha"]
+        self.costs[kind] = (1 - alpha) * self.costs[kind] + alpha * seconds * 1000.0 / count
+
+    def _affordable(self, kind, cap):
+        left = self.config["budget_ms"] - self.spent_ms()
+        n = int(left // self.costs[kind]) if left > 0 else 0
+        return min(cap, max(n, self.config["min_per_frame"]))
+
+    # -------------------- PER TRACK --------------------
+
+    def _cooling_down(self, state, kind):
+        return state.cooldown_until[kind] > self.frame
+
+    def fail(self, state, kind):
+        """Backs a track off `kind` ("face" or "reid") attempts after one that produced no identity."""
+        state.failures[kind] += 1
+        cooldown = self.config["cooldown_frames"] * 2 ** (state.failures[kind] - 1)
+        state.cooldown_until[kind] = self.frame + min(cooldown, self.config["max_cooldown_frames"])
+        self.metrics["failures"] += 1
+
+    def _quality(self, state, crop):
+        # A recent passing score is reused; a failing one is re-measured once the cooldown is over
+        if (state.quality_frame is not None and self.frame - state.quality_frame < self.config["quality_ttl_frames"]
+                and state.quality is not None and state.quality > self.sharpness_threshold):
+            self.metrics["gate_cache_hits"] += 1
+            return state.quality
+        start = time.perf_counter()
+        score = sharpness(crop, self.min_face_size)
+        self.observe("gate", time.perf_counter() - start, 1)
+        self.metrics["gate_checks"] += 1
+        state.prev_quality, state.quality = state.quality, score
+        state.quality_frame = self.frame
+        return score
+
+    def _priority(self, state, crop, frame_area):
+        w = self.config["weights"]
+        size = min(1.0, crop.shape[0] * crop.shape[1] / (frame_area * self.config["reference_crop_area"]))
+        if state.quality is None:
+            sharp = trend = 0.5 if state.quality_frame is None else 0.0   # unseen vs too small
+        else:
+            sharp = min(1.0, state.quality / (2.0 * self.sharpness_threshold))
+            trend = 0.5
+            if state.prev_quality is not None:
+                delta = (state.quality - state.prev_quality) / self.sharpness_threshold
+                trend = min(1.0, max(0.0, 0.5 + delta))
+        age = min(1.0, state.frame_count / self.wait_for_face_limit)
+        return w["size"] * size + w["sharpness"] * sharp + w["trend"] * trend + w["age"] * age
+
+    # -------------------- PLANNING --------------------
+
+    def plan_faces(self, candidates, frame_shape):
+        """
+        candidates: (tid, state, crop) of unidentified tracks. Returns the tids
+        whose crops passed the quality gate and fit in the budget, best first.
+        """
+        frame_area = float(frame_shape[0] * frame_shape[1])
+        ready = []
+        for tid, state, crop in candidates:
+            if self._cooling_down(state, "face"):
+                self.metrics["cooling_down"] += 1
+            elif crop.size:
+                ready.append((self._priority(state, crop, frame_area), tid, state, crop))
+        ready.sort(key=lambda item: item[0], reverse=True)
+
+        cap = self.config["max_face_per_frame"]
+        chosen = []
+        for i, (_, tid, state, crop) in enumerate(ready):
+            # Gate one more crop only if it and one more embedding still fit next to those picked
+            needed_ms = self.costs["gate"] + (len(chosen) + 1) * self.costs["face"]
+            if len(chosen) >= cap or (len(chosen) >= self.config["min_per_frame"]
+                                      and self.spent_ms() + needed_ms > self.config["budget_ms"]):
+                self.metrics["deferred"] += len(ready) - i
+                break
+            score = self._quality(state, crop)
+            if score is None or score <= self.sharpness_threshold:
+                self.fail(state, "face")
+                continue
+            chosen.append(tid)
+        self.metrics["face_scheduled"] += len(chosen)
+        return chosen
+
+    def plan_reid(self, candidates):
+        """candidates: (tid, state) of tracks past the face wait. Returns the tids to embed, oldest first."""
+        ready = []
+        for tid, state in candidates:
+            if self._cooling_down(state, "reid"):
+                self.metrics["cooling_down"] += 1
+            else:
+                ready.append((state.frame_count, tid))
+        ready.sort(reverse=True)
+        n = self._affordable("reid", self.config["max_reid_per_frame"])
+        self.metrics["deferred"] += max(0, len(ready) - n)
+        chosen = [tid for _, tid in ready[:n]]
+        self.metrics["reid_scheduled"] += len(chosen)
+        return chosen
+
+    def stats(self):
+        return dict(
+            self.metrics,
+            budget_ms=self.config["budget_ms"],
+            cost_ms={k: round(v, 3) for k, v in self.costs.items()},
+        )
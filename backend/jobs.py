@@ -0,0 +1,246 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2 as cv
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORTS_DIR = os.path.join(BASE_DIR, "storage", "reports")
+os.makedirs(REPORTS_DIR, exist_ok=True)
+
+JOB_CONFIG = {
+    "max_workers": 2,          # concurrent videos (one process each, models loaded per process)
+    "frame_stride": 1,         # analyse every Nth frame; 1 = every frame
+    "threads_per_worker": 2,   # torch intra-op threads per job process
+    "niceness": 10,            # run below the live streams' priority
+    "max_width": 1280,
+}
+
+
+class ReportSink:
+    """
+    Stands in for the write-behind queue inside a job process: violations and
+    registrations are collected for the report instead of written to the live
+    database, so offline audits never touch live state.
+    """
+
+    def __init__(self):
+        self.violations = []
+        self.workers = {}
+        self.frame_index = 0
+        self.video_ms = 0.0
+
+    def add_listener(self, callback):
+        pass
+
+    def remove_listener(self, callback):
+        pass
+
+    def register_worker(self, embedding, display_name):
+        worker_id = str(uuid.uuid4())
+        self.workers[worker_id] = {"snapshot": display_name, "first_seen_frame": self.frame_index}
+        return worker_id
+
+    def log_violation(self, worker_uuid, equipped, violated, evidence_path, stream=None):
+        self.violations.append({
+            "worker_id": worker_uuid,
+            "equipped_items": equipped,
+            "violated_items": violated,
+            "evidence_path": evidence_path,   # key, served at /jobs/{job_id}/evidence/{key}
+            "frame": self.frame_index,
+            "video_time_s": round(self.video_ms / 1000.0, 2),
+        })
+        return True
+
+
+# -------------------- WORKER PROCESS --------------------
+
+_worker_models = None
+
+
+def _init_worker(threads, niceness):
+    """Runs once per pool process: lower priority and load the models a single time."""
+    global _worker_models
+    try:
+        os.nice(niceness)
+    except (AttributeError, OSError):
+        pass
+    import torch
+    torch.set_num_threads(threads)
+    from backend.models import SharedModels
+    _worker_models = SharedModels()
+
+
+def evidence_root(job_id):
+    """Where a job's snapshots go: storage/reports/<job_id>/, next to its report."""
+    return os.path.join(REPORTS_DIR, job_id)
+
+
+def run_video_job(job_id, video_path, report_path, progress, frame_stride, max_width):
+    """Headless analysis of one video at full speed: no pacing, drawing or encoding."""
+    from backend.evidence import EvidenceStore
+    from backend.motion import MotionGate
+    from backend.pipeline_service import PPEPipeline
+
+    # Each job gets an empty gallery so identities never leak between videos
+    _worker_models.gallery.clear()
+    sink = ReportSink()
+    # Audits look at every frame, and their snapshots stay out of the live store's retention budget
+    evidence = EvidenceStore({"root": evidence_root(job_id)})
+    pipeline = PPEPipeline(models=_worker_models, name=f"job-{job_id}", db_writer=sink,
+                           evidence=evidence, motion=MotionGate({"enabled": False}))
+
+    cap = cv.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video: {video_path}")
+    total = int(cap.get(cv.CAP_PROP_FRAME_COUNT)) or None
+    fps = cap.get(cv.CAP_PROP_FPS) or 0.0
+    started = time.time()
+    index = 0
+    processed = 0
+
+    try:
+        while cap.grab():
+            index += 1
+            if index % frame_stride != 0:
+                continue  # skipped frames are never decoded
+            ok, frame = cap.retrieve()
+            if not ok:
+                continue
+            if frame.shape[1] > max_width:
+                scale = max_width / frame.shape[1]
+                frame = cv.resize(frame, (0, 0), fx=scale, fy=scale)
+            sink.frame_index = index
+            sink.video_ms = cap.get(cv.CAP_PROP_POS_MSEC)
+            pipeline._process_frame(frame, draw=False)
+            processed += 1
+            if processed % 25 == 0:
+                progress[job_id] = {"frames_read": index, "frames_total": total,
+                                    "elapsed_s": round(time.time() - started, 1)}
+    finally:
+        cap.release()
+        pipeline.close()
+        evidence.close()   # snapshots referenced by the report are on disk before it is
+
+    elapsed = time.time() - started
+    report = {
+        "job_id": job_id,
+        "video": os.path.basename(video_path),
+        "frames_read": index,
+        "frames_processed": processed,
+        "frame_stride": frame_stride,
+        "source_fps": fps,
+        "processing_s": round(elapsed, 2),
+        "processing_fps": round(processed / elapsed, 2) if elapsed > 0 else None,
+        "workers_seen": len(sink.workers),
+        "violation_count": len(sink.violations),
+        "violations": sink.violations,
+        "workers": sink.workers,
+    }
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    progress[job_id] = {"frames_read": index, "frames_total": total, "elapsed_s": round(elapsed, 1)}
+    return {"frames_processed": processed, "violation_count": len(sink.violations)}
+
+
+# -------------------- API SIDE --------------------
+
+class JobManager:
+    """
+    Offline video analysis jobs on a process pool, separate from the live streams.
+
+    submit() returns a job id immediately; get() reports status and progress;
+    finished jobs leave a JSON violation report in storage/reports.
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(JOB_CONFIG, **(config or {}))
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        self._manager = None
+        self._progress = None
+
+    def _ensure_pool(self):
+        # Started lazily so servers that never run jobs pay nothing
+        if self._pool is None:
+            ctx = multiprocessing.get_context("spawn")
+            self._manager = ctx.Manager()
+            self._progress = self._manager.dict()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.config["max_workers"],
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(self.config["threads_per_worker"], self.config["niceness"]),
+            )
+
+    def submit(self, video_path):
+        with self._lock:
+            self._ensure_pool()
+            job_id = uuid.uuid4().hex[:12]
+            report_path = os.path.join(REPORTS_DIR, f"{job_id}.json")
+            job = {
+                "id": job_id,
+                "video": os.path.basename(video_path),
+                "status": "queued",
+                "submitted_at": time.time(),
+                "finished_at": None,
+                "report_path": report_path,
+                "result": None,
+                "error": None,
+            }
+            self._jobs[job_id] = job
+            future = self._pool.submit(
+                run_video_job, job_id, video_path, report_path, self._progress,
+                self.config["frame_stride"], self.config["max_width"],
+            )
+        future.add_done_callback(lambda f, job=job: self._finish(job, f))
+        return job_id
+
+    def _finish(self, job, future):
+        job["finished_at"] = time.time()
+        try:
+            job["result"] = future.result()
+            job["status"] = "done"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            print(f"[ERROR] Job {job['id']} failed: {e}")
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        info = {k: v for k, v in job.items() if k != "report_path"}
+        progress = self._progress.get(job_id) if self._progress is not None else None
+        if progress:
+            info["progress"] = dict(progress)
+            if job["status"] == "queued":
+                info["status"] = "running"
+        return info
+
+    def list_jobs(self):
+        return [self.get(job_id) for job_id in list(self._jobs)]
+
+    def report_path(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] != "done":
+            return None
+        return job["report_path"]
+
+    def evidence_store(self, job_id):
+        """Read-only view of a job's snapshots, or None for an unknown job."""
+        if job_id not in self._jobs:
+            return None
+        from backend.evidence import EvidenceStore
+        return EvidenceStore({"root": evidence_root(job_id)})
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._pool = None
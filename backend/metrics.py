@@ -0,0 +1,313 @@
+import bisect
+import threading
+
+from backend.gallery import EMBEDDING_KINDS
+
+METRICS_CONFIG = {
+    # Seconds; covers sub-millisecond stages up to multi-second DB stalls
+    "latency_buckets": (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=None):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets or METRICS_CONFIG["latency_buckets"])
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket (non-cumulative) counts; made cumulative at render time
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            label_str = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{label_str} {repr(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus text-format registry.
+
+    Hot paths only touch counters and histograms (a dict lookup and a lock);
+    queue depths, gallery size, pool state and the like are read from the
+    components' existing stats at scrape time by collectors, so they cost
+    nothing between scrapes.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=None):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def register_collector(self, collect):
+        """collect() is called on every scrape and sets gauges from live state."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self):
+        for collect in list(self._collectors):
+            try:
+                collect()
+            except Exception as e:
+                print(f"[ERROR] Metrics collector failed: {e}")
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# -------------------- PIPELINE --------------------
+
+STAGE_SECONDS = registry.histogram(
+    "ppe_stage_duration_seconds", "Time spent in each frame pipeline stage", ("stream", "stage"))
+FRAME_SECONDS = registry.histogram(
+    "ppe_frame_duration_seconds", "End-to-end _process_frame time", ("stream",))
+FRAMES_PROCESSED = registry.counter(
+    "ppe_frames_processed_total", "Frames run through the pipeline", ("stream",))
+VIOLATIONS = registry.counter(
+    "ppe_violations_total", "Violations detected", ("stream",))
+WORKERS_REGISTERED = registry.counter(
+    "ppe_workers_registered_total", "New identities registered", ("stream", "kind"))
+INFERENCE_FPS = registry.gauge(
+    "ppe_inference_fps", "Frames processed per second over the recent window", ("stream",))
+TRACKED_IDENTITIES = registry.gauge(
+    "ppe_tracked_identities", "Track ids the stream holds identity state for", ("stream",))
+RESOLVED_IDENTITIES = registry.gauge(
+    "ppe_resolved_identities", "Tracked ids that have been matched to a worker", ("stream",))
+TRACK_EVENTS = registry.gauge(
+    "ppe_track_events", "Track store counters (created/evicted_idle/evicted_lru/handoffs/handoff_hits/...)",
+    ("stream", "event"))
+IDENTIFICATION_EVENTS = registry.gauge(
+    "ppe_identification_events", "Identification scheduler counters (face_scheduled/deferred/failures/...)",
+    ("stream", "event"))
+IDENTIFICATION_COST = registry.gauge(
+    "ppe_identification_cost_ms", "Learned per-item cost of quality gate / FaceNet / ReID", ("stream", "kind"))
+MOTION_FRAMES = registry.gauge(
+    "ppe_motion_frames", "Motion gate decisions (inferred/skipped/forced/motion)", ("stream", "state"))
+INFERRED_RATIO = registry.gauge(
+    "ppe_inferred_frame_ratio", "Fraction of processed frames that ran the detector", ("stream",))
+HANDOFF_CACHE = registry.gauge(
+    "ppe_track_handoff_cache", "Evicted identities waiting to be picked up by a revived track", ("stream",))
+CAPTURE_FRAMES = registry.gauge(
+    "ppe_capture_frames", "Capture thread frame counters (grabbed/decoded/skipped/dropped)", ("stream", "state"))
+CAPTURE_FPS = registry.gauge(
+    "ppe_capture_fps", "Frames decoded per second by the capture thread", ("stream",))
+BROADCAST_FRAMES = registry.gauge(
+    "ppe_broadcast_frames", "MJPEG broadcaster counters (processed/encoded/client_dropped)", ("stream", "state"))
+VIEWERS = registry.gauge(
+    "ppe_video_feed_viewers", "Connected /video_feed clients", ("stream",))
+QUEUE_DEPTH = registry.gauge(
+    "ppe_queue_depth", "Items waiting in internal queues", ("queue",))
+GALLERY_SIZE = registry.gauge(
+    "ppe_gallery_size", "Embeddings held in the shared identity gallery", ("kind",))
+EVIDENCE = registry.gauge(
+    "ppe_evidence", "Evidence store counters (saved/written/inline_writes/failed/pruned_files/bytes/...)", ("state",))
+UPLOADS = registry.gauge(
+    "ppe_uploads", "Video upload counters (created/completed/bytes_received/resumed/expired/active)", ("state",))
+
+# -------------------- WEBSOCKET --------------------
+
+WS_FRAMES = registry.counter(
+    "ppe_ws_frames_total", "Webcam socket frames by outcome", ("result",))
+WS_LATENCY = registry.histogram(
+    "ppe_ws_latency_seconds", "Webcam frame receive-to-send latency")
+WS_SESSIONS = registry.gauge(
+    "ppe_ws_sessions", "Open webcam sockets")
+
+# -------------------- DATABASE --------------------
+
+DB_CALL_SECONDS = registry.histogram(
+    "ppe_db_call_duration_seconds", "Latency of database.py calls", ("operation",))
+DB_ERRORS = registry.counter(
+    "ppe_db_errors_total", "Failed database.py calls", ("operation",))
+DB_CONNECTIONS = registry.gauge(
+    "ppe_db_connections", "Pooled database connections by state", ("state",))
+DB_WRITE_QUEUE = registry.gauge(
+    "ppe_db_write_queue", "Write-behind queue counters", ("state",))
+
+
+def stage_observer(stream):
+    """StageTimer callback feeding the stage histogram for one stream."""
+    def observe(stage, seconds):
+        STAGE_SECONDS.observe(seconds, stream=stream, stage=stage)
+    return observe
+
+
+def observe_db_call(operation, seconds, failed):
+    """database.DB_CALL_HOOKS callback."""
+    DB_CALL_SECONDS.observe(seconds, operation=operation)
+    if failed:
+        DB_ERRORS.inc(operation=operation)
+
+
+# -------------------- COLLECTORS --------------------
+
+def collect_streams(stream_manager):
+    # Start from empty so removed streams disappear from the scrape
+    for gauge in (INFERENCE_FPS, TRACKED_IDENTITIES, RESOLVED_IDENTITIES, TRACK_EVENTS, HANDOFF_CACHE,
+                  IDENTIFICATION_EVENTS, IDENTIFICATION_COST, MOTION_FRAMES, INFERRED_RATIO, CAPTURE_FRAMES, CAPTURE_FPS, BROADCAST_FRAMES, VIEWERS):
+        gauge.clear()
+    for stream_id, pipeline in stream_manager.pipelines():
+        INFERENCE_FPS.set(round(pipeline.inference_fps(), 2), stream=stream_id)
+        tracks = pipeline.identity_manager.stats()
+        TRACKED_IDENTITIES.set(tracks["tracks"], stream=stream_id)
+        RESOLVED_IDENTITIES.set(tracks["identified"], stream=stream_id)
+        HANDOFF_CACHE.set(tracks["handoff_cache"], stream=stream_id)
+        for event in ("created", "evicted_idle", "evicted_lru", "handoffs", "handoff_hits", "handoff_expired"):
+            TRACK_EVENTS.set(tracks[event], stream=stream_id, event=event)
+        scheduling = pipeline.id_scheduler.stats()
+        for kind, cost in scheduling.pop("cost_ms").items():
+            IDENTIFICATION_COST.set(cost, stream=stream_id, kind=kind)
+        scheduling.pop("budget_ms")
+        for event, value in scheduling.items():
+            IDENTIFICATION_EVENTS.set(value, stream=stream_id, event=event)
+        motion = pipeline.motion_gate.stats()
+        for state in ("inferred", "skipped", "forced", "motion"):
+            MOTION_FRAMES.set(motion[state], stream=stream_id, state=state)
+        INFERRED_RATIO.set(motion["inferred_ratio"], stream=stream_id)
+        capture = pipeline.get_capture_stats()
+        if capture:
+            CAPTURE_FPS.set(capture["capture_fps"], stream=stream_id)
+            for state in ("grabbed", "decoded", "skipped", "dropped"):
+                CAPTURE_FRAMES.set(capture[f"frames_{state}"], stream=stream_id, state=state)
+            QUEUE_DEPTH.set(capture["queue_depth"], queue=f"capture:{stream_id}")
+        broadcast = stream_manager.broadcast_stats(stream_id)
+        BROADCAST_FRAMES.set(broadcast["frames_processed"], stream=stream_id, state="processed")
+        BROADCAST_FRAMES.set(broadcast["frames_encoded"], stream=stream_id, state="encoded")
+        BROADCAST_FRAMES.set(broadcast["client_frames_dropped"], stream=stream_id, state="client_dropped")
+        VIEWERS.set(broadcast["subscribers"], stream=stream_id)
+    if not stream_manager.models_ready:
+        return
+    gallery = stream_manager.models.gallery
+    for kind in EMBEDDING_KINDS:
+        GALLERY_SIZE.set(gallery.size(kind), kind=kind)
+
+
+def collect_write_queue(write_queue):
+    stats = write_queue.stats()
+    QUEUE_DEPTH.set(stats["queue_depth"], queue="db_write")
+    for state, value in stats.items():
+        if state != "queue_depth":
+            DB_WRITE_QUEUE.set(value, state=state)
+
+
+def collect_evidence(store):
+    stats = store.stats()
+    QUEUE_DEPTH.set(stats.pop("pending"), queue="evidence")
+    for state, value in stats.items():
+        if value is not None:
+            EVIDENCE.set(value, state=state)
+
+
+def collect_uploads(manager):
+    for state, value in manager.stats().items():
+        UPLOADS.set(value, state=state)
+
+
+def collect_db_pool(pool_stats):
+    for state, value in pool_stats().items():
+        DB_CONNECTIONS.set(value, state=state)
+
+
+def collect_sessions(active_sessions):
+    WS_SESSIONS.set(len(active_sessions))
+
+
+def collect_event_bus(event_bus):
+    QUEUE_DEPTH.set(event_bus.subscriber_backlog(), queue="events")
@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from backend.association import PPEAssociator
+from backend.gallery import EmbeddingGallery
+
+# torch, Ultralytics, torchreid and DeepFace (TensorFlow) are imported inside
+# SharedModels, so importing this module - and the API - stays fast.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, "model", "best (1).pt")
+
+# "torch" runs the .pt YOLO and torchreid OSNet eagerly (default).
+# "onnx" runs the exports from `python -m backend.export_onnx` on ONNX Runtime (CPU).
+INFERENCE_CONFIG = {
+    "backend": "torch",
+    "onnx_quantize": None,      # None (fp32), "dynamic" or "static": which exported variant to load
+    "intra_op_threads": 0,      # ORT threads per op; 0 = all physical cores
+    "inter_op_threads": 1,      # >1 runs independent graph branches in parallel
+    # Detector confidence floor. model.track used 0.1, so BoT-SORT's low-score
+    # second association (track_low_thresh 0.1) still gets boxes under occlusion.
+    "detect_conf": 0.1,
+}
+
+MODEL_LOADER_CONFIG = {
+    "mode": "background",   # "background": load at startup on a thread; "lazy": on first use
+    "warmup": True,         # one inference per model before reporting ready
+}
+
+
+class SharedModels:
+    """
+    Everything that is expensive to load and can be shared between streams:
+    the YOLO detector, the OSNet ReID model, the FaceNet face stage and the
+    identity gallery. Per-stream state (tracker, identity_manager, stats)
+    lives on PPEPipeline.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, face_model_name="Facenet",
+                 reid_max_batch_size=16, face_max_batch_size=32, inference_config=None):
+        print("[INFO] Loading shared models...")
+        self.inference = dict(INFERENCE_CONFIG, **(inference_config or {}))
+        if self.inference["backend"] == "onnx":
+            self._load_onnx(reid_max_batch_size)
+        else:
+            self._load_torch(model_path, reid_max_batch_size)
+        self.class_names = self.yolo.names
+        self.detect_conf = self.inference["detect_conf"]
+        print(f"[INFO] Loaded YOLO classes: {self.class_names}")
+        self.associator = PPEAssociator(self.class_names)
+
+        from backend.face_stage import FaceStage
+
+        self.face_model_name = face_model_name
+        self.face_stage = FaceStage(face_model_name, max_batch_size=face_max_batch_size)
+
+        # One identity gallery for every camera, so a worker keeps the same id across streams
+        self.gallery = EmbeddingGallery()
+
+        # Streams run on their own threads; the models are not re-entrant
+        self.yolo_lock = threading.Lock()
+        self.reid_lock = threading.Lock()
+        self.face_lock = threading.Lock()
+
+    def _load_torch(self, model_path, reid_max_batch_size):
+        import torch
+        from ultralytics import YOLO
+        from reid_manger import embedding_model
+        from backend.reid_batch import BatchedReID
+
+        self.yolo = YOLO(model_path)
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.reid_model, self.transform = embedding_model()
+        self.reid_model.eval()
+        self.reid_model.to(self.device)
+        self.reid = BatchedReID(self.reid_model, self.device, max_batch_size=reid_max_batch_size)
+        print(f"[INFO] ReID Model Loaded on {self.device}")
+
+    def _load_onnx(self, reid_max_batch_size):
+        from backend.onnx_backend import OnnxYOLO, OnnxReID, onnx_model_path
+
+        quantize = self.inference["onnx_quantize"]
+        threads = (self.inference["intra_op_threads"], self.inference["inter_op_threads"])
+        self.device = 'cpu'
+        self.yolo = OnnxYOLO(onnx_model_path("yolo", quantize), *threads, conf=self.inference["detect_conf"])
+        self.reid_model, self.transform = None, None
+        self.reid = OnnxReID(onnx_model_path("osnet", quantize), reid_max_batch_size, *threads)
+        print(f"[INFO] ONNX Runtime models loaded ({quantize or 'fp32'}, intra_op_threads={threads[0]})")
+
+    def warm_up(self):
+        """
+        One inference through each model on dummy input, so lazy initialisation
+        (graph building, kernel selection, allocator growth) is paid here and
+        not by the first real frame. Returns the time per model in ms.
+        """
+        timings = {}
+        frame = np.zeros((640, 640, 3), dtype=np.uint8)
+        crop = np.zeros((256, 128, 3), dtype=np.uint8)
+        face = np.zeros((160, 160, 3), dtype=np.uint8)
+        for name, run in (
+            ("yolo", lambda: self.yolo.predict(frame, conf=self.detect_conf, verbose=False)),
+            ("reid", lambda: self.reid.embed({0: crop})),
+            ("face", lambda: self.face_stage.embed(face, {0: (0, 0, 160, 160)})),
+        ):
+            start = time.perf_counter()
+            run()
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        print(f"[INFO] Models warmed up: {timings}")
+        return timings
+
+
+class ModelsNotReady(RuntimeError):
+    pass
+
+
+class ModelLoader:
+    """
+    Builds SharedModels off the request path and reports readiness.
+
+    In "background" mode start() loads and warms the models on a thread while
+    the server is already answering; in "lazy" mode the first get() triggers
+    the load. on_ready callbacks run on the loader thread once the models are
+    warm (the API uses one to create its default streams), and only then does
+    the loader count as ready. A callback that raises does not fail the load:
+    the models stay usable, the error is logged and reported in
+    status()["callback_errors"], and the remaining callbacks still run.
+    """
+
+    def __init__(self, config=None, factory=SharedModels):
+        self.config = dict(MODEL_LOADER_CONFIG, **(config or {}))
+        self.factory = factory
+        self.models = None
+        self.state = "idle"   # idle -> loading -> ready | failed
+        self.error = None
+        self.callback_errors = []
+        self.timings = {}
+        self._on_ready = []
+        self._loaded = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def on_ready(self, callback):
+        self._on_ready.append(callback)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self.state = "loading"
+                self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+                self._thread.start()
+        return self
+
+    def get(self, timeout=None):
+        """Returns the loaded models, starting the load if needed; raises ModelsNotReady on timeout or failure."""
+        self.start()
+        if not self._loaded.wait(timeout):
+            raise ModelsNotReady("Models are still loading")
+        if self.models is None:
+            raise ModelsNotReady(f"Model loading failed: {self.error}")
+        return self.models
+
+    def status(self):
+        return {"state": self.state, "error": self.error, "callback_errors": list(self.callback_errors),
+                "timings_ms": dict(self.timings)}
+
+    def _load(self):
+        try:
+            start = time.perf_counter()
+            models = self.factory()
+            self.timings["load"] = round((time.perf_counter() - start) * 1000, 1)
+            if self.config["warmup"]:
+                self.timings["warmup"] = models.warm_up()
+            # Available to get() (and so to the callbacks) before counting as ready
+            self.models = models
+            self._loaded.set()
+            for callback in self._on_ready:
+                try:
+                    callback(models)
+                except Exception as e:
+                    name = getattr(callback, "__name__", repr(callback))
+                    self.callback_errors.append(f"{name}: {e}")
+                    print(f"[ERROR] Model on_ready callback {name} failed: {e}")
+            self.state = "ready"
+            print(f"[INFO] Models ready in {self.timings['load']} ms")
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+            print(f"[ERROR] Model loading failed: {e}")
+        finally:
+            self._loaded.set()
@@ -0,0 +1,157 @@
+import threading
+
+import cv2 as cv
+import numpy as np
+
+MOTION_CONFIG = {
+    "enabled": True,
+    "method": "diff",            # "diff": against the last inferred frame; "mog2": background subtraction
+    "width": 160,                # frames are compared at this width (grayscale, blurred)
+    "blur": 5,
+    "pixel_threshold": 25,       # per-pixel intensity change that counts as changed (diff method)
+    "min_changed_ratio": 0.003,  # fraction of watched pixels that must change to run the detector
+    "hold_frames": 5,            # keep inferring this many frames after motion, so tracks settle
+    "refresh_frames": 30,        # force a detector pass after this many skipped frames in a row
+    "ignore_regions": [],        # polygons of (x, y) in 0..1 frame coordinates that never count as motion
+    "watch_regions": [],         # if set, only these polygons count
+}
+
+
+class MotionGate:
+    """
+    Decides per frame whether the detector has to run.
+
+    Each frame is reduced to a small blurred grayscale image and compared
+    with the last frame the detector saw (or fed to a MOG2 background
+    model). When too few watched pixels changed, the frame is skipped and
+    the caller reuses its previous detections. Comparing against the last
+    *inferred* frame rather than the previous one means slow drift still
+    adds up to a refresh. A detector pass is forced every refresh_frames
+    skips so the tracker and the identity state never go stale.
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(MOTION_CONFIG, **(config or {}))
+        self._mask = None
+        self._mask_key = None
+        self._reference = None
+        self._subtractor = None
+        self._skipped_run = 0
+        self._hold = 0
+        self._pending = None   # settings from configure(), applied by the stream thread
+        self._pending_lock = threading.Lock()
+        self.last_change = 0.0
+        self.metrics = {"inferred": 0, "skipped": 0, "forced": 0, "motion": 0}
+
+    def configure(self, **settings):
+        """
+        Updates settings (sensitivity, regions, method) from any thread. They
+        take effect on the next frame, which then starts fresh.
+        """
+        settings = {k: v for k, v in settings.items() if v is not None}
+        with self._pending_lock:
+            self._pending = dict(self._pending or {}, **settings)
+
+    def _apply_pending(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self.config.update(pending)
+            self.reset()
+
+    def reset(self):
+        """Forgets the reference frame (new source, or settings changed): the next frame is inferred."""
+        self._reference = None
+        self._subtractor = None
+        self._mask_key = None
+        self._skipped_run = 0
+        self._hold = 0
+
+    # -------------------- MASK --------------------
+
+    def _small(self, frame):
+        h, w = frame.shape[:2]
+        width = min(self.config["width"], w)
+        small = cv.resize(frame, (width, max(1, round(h * width / w))), interpolation=cv.INTER_AREA)
+        if small.ndim == 3:
+            small = cv.cvtColor(small, cv.COLOR_BGR2GRAY)
+        k = self.config["blur"]
+        return cv.GaussianBlur(small, (k, k), 0) if k > 1 else small
+
+    def _region_mask(self, shape):
+        key = (shape, repr(self.config["watch_regions"]), repr(self.config["ignore_regions"]))
+        if key == self._mask_key:
+            return self._mask
+        h, w = shape
+        scale = np.array([w, h], dtype=np.float32)
+
+        def polygons(regions):
+            return [np.round(np.asarray(r, dtype=np.float32) * scale).astype(np.int32) for r in regions]
+
+        if self.config["watch_regions"]:
+            mask = np.zeros(shape, np.uint8)
+            cv.fillPoly(mask, polygons(self.config["watch_regions"]), 255)
+        else:
+            mask = np.full(shape, 255, np.uint8)
+        if self.config["ignore_regions"]:
+            cv.fillPoly(mask, polygons(self.config["ignore_regions"]), 0)
+        self._mask = mask if (self.config["watch_regions"] or self.config["ignore_regions"]) else None
+        self._mask_key = key
+        return self._mask
+
+    # -------------------- GATE --------------------
+
+    def _changed_ratio(self, small):
+        mask = self._region_mask(small.shape)
+        if self.config["method"] == "mog2":
+            if self._subtractor is None:
+                self._subtractor = cv.createBackgroundSubtractorMOG2(detectShadows=False)
+            changed = self._subtractor.apply(small)
+        else:
+            if self._reference is None or self._reference.shape != small.shape:
+                return 1.0
+            changed = cv.threshold(cv.absdiff(small, self._reference), self.config["pixel_threshold"],
+                                   255, cv.THRESH_BINARY)[1]
+        if mask is not None:
+            changed = cv.bitwise_and(changed, mask)
+            total = cv.countNonZero(mask)
+        else:
+            total = changed.size
+        return cv.countNonZero(changed) / total if total else 0.0
+
+    def should_infer(self, frame):
+        """True if the detector must run on this frame; False to reuse the previous result."""
+        self._apply_pending()
+        if not self.config["enabled"]:
+            self.metrics["inferred"] += 1
+            return True
+        small = self._small(frame)
+        self.last_change = self._changed_ratio(small)
+        moving = self.last_change >= self.config["min_changed_ratio"]
+        if moving:
+            self.metrics["motion"] += 1
+            self._hold = self.config["hold_frames"]
+        elif self._hold > 0:
+            self._hold -= 1
+            moving = True
+        forced = not moving and self._skipped_run >= self.config["refresh_frames"]
+        if moving or forced:
+            self.metrics["forced"] += forced
+            self.metrics["inferred"] += 1
+            self._skipped_run = 0
+            self._reference = small
+            return True
+        self.metrics["skipped"] += 1
+        self._skipped_run += 1
+        return False
+
+    def stats(self):
+        inferred, skipped = self.metrics["inferred"], self.metrics["skipped"]
+        return dict(
+            self.metrics,
+            enabled=self.config["enabled"],
+            method=self.config["method"],
+            inferred_ratio=round(inferred / (inferred + skipped), 4) if inferred + skipped else 1.0,
+            last_change=round(self.last_change, 5),
+        )
+
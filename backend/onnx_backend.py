@@ -0,0 +1,118 @@
+import ast
+import os
+
+import cv2 as cv
+import numpy as np
+import torch
+
+from backend.reid_batch import BatchedReID, REID_INPUT_SIZE
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ONNX_DIR = os.path.join(BASE_DIR, "model", "onnx")
+
+
+def onnx_model_path(name, quantize=None, onnx_dir=ONNX_DIR):
+    """model/onnx/<name>.onnx, or <name>.int8-<mode>.onnx for a quantized variant."""
+    suffix = f".int8-{quantize}" if quantize else ""
+    return os.path.join(onnx_dir, f"{name}{suffix}.onnx")
+
+
+def make_session(path, intra_op_threads=0, inter_op_threads=1):
+    """CPU ONNX Runtime session; 0 intra-op threads lets ORT use every physical core."""
+    import onnxruntime as ort
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"ONNX model not found: {path} (run python -m backend.export_onnx)")
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    opts.intra_op_num_threads = intra_op_threads
+    opts.inter_op_num_threads = inter_op_threads
+    opts.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if inter_op_threads > 1
+                           else ort.ExecutionMode.ORT_SEQUENTIAL)
+    return ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+
+
+def letterbox(frame, size):
+    """Resize keeping aspect ratio and pad to size x size (centred, grey), like Ultralytics' LetterBox."""
+    h, w = frame.shape[:2]
+    r = min(size / h, size / w)
+    nh, nw = int(round(h * r)), int(round(w * r))
+    if (nh, nw) != (h, w):
+        frame = cv.resize(frame, (nw, nh), interpolation=cv.INTER_LINEAR)
+    top = (size - nh) // 2
+    left = (size - nw) // 2
+    out = np.full((size, size, 3), 114, dtype=np.uint8)
+    out[top:top + nh, left:left + nw] = frame
+    return out
+
+
+def yolo_input(frames, size):
+    """BGR frames -> N x 3 x size x size float32 RGB in [0, 1]."""
+    batch = np.stack([letterbox(f, size) for f in frames])[..., ::-1]
+    return np.ascontiguousarray(batch.transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+
+
+def _nms():
+    try:
+        from ultralytics.utils.nms import non_max_suppression
+    except ImportError:  # older Ultralytics releases
+        from ultralytics.utils.ops import non_max_suppression
+    return non_max_suppression
+
+
+class OnnxYOLO:
+    """
+    The exported YOLO detector on ONNX Runtime, with the slice of the
+    Ultralytics API the pipeline uses: names and predict(frames) returning
+    Results objects, so StreamTracker and _process_frame are unchanged.
+    """
+
+    def __init__(self, path, intra_op_threads=0, inter_op_threads=1, conf=0.1, iou=0.7, max_det=300):
+        from ultralytics.engine.results import Results
+        from ultralytics.utils import ops
+
+        self.session = make_session(path, intra_op_threads, inter_op_threads)
+        self.input_name = self.session.get_inputs()[0].name
+        meta = self.session.get_modelmeta().custom_metadata_map
+        # Ultralytics stores the class names and image size in the ONNX metadata
+        self.names = ast.literal_eval(meta["names"]) if "names" in meta else {}
+        imgsz = ast.literal_eval(meta.get("imgsz", "[640, 640]"))
+        self.imgsz = int(imgsz[0] if isinstance(imgsz, (list, tuple)) else imgsz)
+        # A static-batch export only accepts its own batch size
+        batch_dim = self.session.get_inputs()[0].shape[0]
+        self.fixed_batch = batch_dim if isinstance(batch_dim, int) else None
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+        self._results = Results
+        self._ops = ops
+        self._non_max_suppression = _nms()
+
+    def _run(self, frames):
+        if self.fixed_batch and len(frames) != self.fixed_batch:
+            return np.concatenate([self._run(frames[i:i + 1]) for i in range(len(frames))])
+        return self.session.run(None, {self.input_name: yolo_input(frames, self.imgsz)})[0]
+
+    def predict(self, source, conf=None, verbose=False):
+        frames = source if isinstance(source, (list, tuple)) else [source]
+        preds = torch.from_numpy(self._run(frames))
+        conf = self.conf if conf is None else conf
+        dets = self._non_max_suppression(preds, conf, self.iou, max_det=self.max_det)
+        results = []
+        for frame, det in zip(frames, dets):
+            det[:, :4] = self._ops.scale_boxes((self.imgsz, self.imgsz), det[:, :4], frame.shape)
+            results.append(self._results(frame, path="", names=self.names, boxes=det))
+        return results
+
+
+class OnnxReID(BatchedReID):
+    """OSNet on ONNX Runtime; same preprocessing and normalization as BatchedReID."""
+
+    def __init__(self, path, max_batch_size=16, intra_op_threads=0, inter_op_threads=1,
+                 input_size=REID_INPUT_SIZE):
+        super().__init__(model=None, device="cpu", max_batch_size=max_batch_size, input_size=input_size)
+        self.session = make_session(path, intra_op_threads, inter_op_threads)
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _forward(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
@@ -1,54 +1,96 @@
 import cv2 as cv
-import numpy as np
-import torch
-import torchreid
-from torchvision import transforms
-from ultralytics import YOLO
-from deepface import DeepFace
-from collections import Counter
+from collections import Counter, deque
+import threading
 import time
-import os
-from database.database import log_violation, register_new_worker
-from reid_manger import embedding_model
+from database.write_behind import write_queue
+from backend.capture import FrameCapture
+from backend.broadcast import mjpeg_chunk, waiting_chunk
+from backend.events import event_bus
+from backend.profiling import StageTimer
+from backend.track_store import TrackStore
+from backend.identification import IdentificationScheduler
+from backend.motion import MotionGate
+from backend.evidence import evidence_store
+from backend.gallery_snapshot import gallery_snapshot
+from backend import metrics
 
-# Directories
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-FACES_DIR = os.path.join(BASE_DIR, "storage", "faces")
-ALERTS_DIR = os.path.join(BASE_DIR, "storage", "alerts")
-MODEL_PATH = os.path.join(BASE_DIR, "model", "best (1).pt") 
-
-os.makedirs(FACES_DIR, exist_ok=True)
-os.makedirs(ALERTS_DIR, exist_ok=True)
 
 class PPEPipeline:
-    def __init__(self):
-        print("[INFO] Initializing PPE Pipeline (ReID Enhanced)...")
-        self.model = YOLO(MODEL_PATH)
-        self.class_names = self.model.names
-        print(f"[INFO] Loaded YOLO classes: {self.class_names}")
-        
-        # Load ReID Model
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        self.reid_model, self.transform = embedding_model()
-        self.reid_model.eval()
-        self.reid_model.to(self.device)
-        print(f"[INFO] ReID Model Loaded on {self.device}")
+    def __init__(self, models=None, detector=None, name="default", db_writer=None, tracker=None, evidence=None,
+                 motion=None):
+        """
+        models: a SharedModels bundle shared with other streams; loaded here if None.
+        detector: optional DetectionBatcher that micro-batches YOLO calls across streams.
+        db_writer: where violations/registrations go (defaults to the write-behind queue).
+        tracker: per-stream tracker with update(result, frame); a BoT-SORT StreamTracker if None.
+        evidence: EvidenceStore for snapshots (defaults to the shared store under storage/).
+        motion: MotionGate that skips the detector on unchanged frames (MOTION_CONFIG defaults if None).
+        """
+        print(f"[INFO] Initializing PPE Pipeline '{name}' (ReID Enhanced)...")
+        if models is None:
+            from backend.models import SharedModels
+            models = SharedModels()
+            self._owns_models = True
+        else:
+            self._owns_models = False
+        self.name = name
+        self.models = models
+        self.detector = detector
+        self.model = models.yolo
+        self.class_names = models.class_names
+        self.associator = models.associator
+        self.device = models.device
+        self.reid = models.reid
+        self.face_stage = models.face_stage
 
         # Configuration
         self.min_face_size = 40
         self.sharpness_threshold = 80
         self.wait_for_face_limit = 25
-        self.model_name = "Facenet"
+        self.model_name = models.face_model_name
         self.person_conf_thresh = 0.5
         self.ppe_conf_thresh = 0.5
         
         # State
-        self.cap = None
-        self.identity_manager = {}
-        self.global_manager = {} # uuid -> {"face": emb, "appearance": emb}
+        self.capture = None  # FrameCapture: decode thread + bounded frame ring
+        # Held while a frame is processed, so a source swap never resets state mid-frame
+        self._frame_lock = threading.Lock()
+        if tracker is None:
+            from backend.tracking import StreamTracker
+            tracker = StreamTracker()
+        self.tracker = tracker
+        self.identity_manager = TrackStore()  # track id -> TrackState, idle tracks evicted
+        # Caps face / ReID work per frame and decides which unidentified tracks get it
+        self.id_scheduler = IdentificationScheduler(
+            min_face_size=self.min_face_size,
+            sharpness_threshold=self.sharpness_threshold,
+            wait_for_face_limit=self.wait_for_face_limit,
+        )
+        # Unchanged frames skip detection and reuse the last overlay
+        self.motion_gate = motion or MotionGate()
+        self._last_drawn = []
+        self.global_manager = models.gallery # uuid -> normalized face / appearance embeddings (shared)
+        if self._owns_models:
+            gallery_snapshot.warm_start(self.global_manager)
         self.frames_count = 0
         self.source_path = None
         self.session_start_time = time.time()
+
+        # DB writes go through the write-behind queue; provisional worker ids
+        # are swapped for real row ids as registrations land.
+        self.db_writer = db_writer or write_queue
+        self._id_updates = deque()
+        self.db_writer.add_listener(self._on_worker_registered)
+        # Snapshots are encoded and written off the frame loop
+        self.evidence = evidence or evidence_store
+
+        # Stats deltas are pushed to /events subscribers (violations by the DB writer, once committed)
+        self.events = event_bus
+        self._published_stats = {}
+
+        # Per-stage wall-clock timings (see backend.profiling), also exported on /metrics
+        self.timer = StageTimer(observer=metrics.stage_observer(name))
+        self._frame_ends = deque(maxlen=30)
         
         # Statistics
         self.current_stats = {
@@ -59,22 +101,33 @@ class PPEPipeline:
             "violations_today": 0 
         }
 
-    def set_source(self, video_path):
-        """Sets the video source and resets session state."""
-        self.source_path = video_path
-        if self.cap:
-            self.cap.release()
-        self.cap = cv.VideoCapture(video_path)
-        
-        self.reset_session()
-        print(f"[INFO] Video source set to: {video_path}")
+    def set_source(self, video_path, growing=None):
+        """Sets the video source and resets session state. `growing`: upload still writing the file."""
+        # Camera indices arrive as strings from the API
+        source = int(video_path) if isinstance(video_path, str) and video_path.isdigit() else video_path
+        # Open the new source first; only the swap and reset wait for the frame in flight
+        capture = FrameCapture(source, growing=growing).start()
+        with self._frame_lock:
+            old, self.capture = self.capture, capture
+            self.source_path = video_path
+            self.tracker.reset()
+            self.reset_session()
+        if old:
+            old.release()
+        print(f"[INFO] Video source set to: {source}")
 
     def reset_session(self):
         """Resets the pipeline state for a new session."""
-        self.identity_manager = {} 
-        self.global_manager = {}
+        self.identity_manager.clear()
+        self.motion_gate.reset()
+        self._last_drawn = []
+        # The gallery is shared across streams; only a standalone pipeline may
+        # reset it, back to the workers already in the DB
+        if self._owns_models:
+            gallery_snapshot.warm_start(self.global_manager)
         self.frames_count = 0
         self.session_start_time = time.time()
+        self._published_stats = {}
         self.current_stats = {
             "total_workers": 0,
             "helmet_count": 0,
@@ -86,106 +139,166 @@ class PPEPipeline:
     def get_stats(self):
         return self.current_stats
 
-    # -------------------- HELPERS --------------------
+    def get_capture_stats(self):
+        return self.capture.stats() if self.capture else None
+
+    def inference_fps(self):
+        """Processed frames per second over the last few frames (0 when idle)."""
+        ends = list(self._frame_ends)
+        if len(ends) < 2 or time.perf_counter() - ends[-1] > 2.0:
+            return 0.0
+        return (len(ends) - 1) / (ends[-1] - ends[0]) if ends[-1] > ends[0] else 0.0
 
-    def _cosine_sim(self, a, b):
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    def close(self):
+        """Releases the source and detaches from shared services."""
+        if self.capture:
+            self.capture.release()
+            self.capture = None
+        self.db_writer.remove_listener(self._on_worker_registered)
 
-    def _is_clear_face(self, face_img):
-        if face_img is None or face_img.size == 0: return False
-        if face_img.shape[0] < self.min_face_size or face_img.shape[1] < self.min_face_size: return False
-        gray = cv.cvtColor(face_img, cv.COLOR_BGR2GRAY)
-        score = cv.Laplacian(gray, cv.CV_64F).var()
-        return score > self.sharpness_threshold
+    # -------------------- HELPERS --------------------
 
-    def _extract_face_embedding(self, img):
+    def _extract_face_embeddings(self, frame, person_boxes):
         try:
-            objs = DeepFace.represent(img_path=img, model_name=self.model_name, enforce_detection=True, detector_backend='opencv')
-            if objs: return np.array(objs[0]["embedding"])
-        except:
-            pass
-        return None
+            with self.models.face_lock:
+                return self.face_stage.process(frame, person_boxes)
+        except Exception as e:
+            print(f"[ERROR] Face embedding failed: {e}")
+            return {}
 
-    def _extract_appearance_embedding(self, person_img):
+    def _extract_appearance_embeddings(self, crops_by_tid):
         try:
-            if person_img is None or person_img.size == 0: return None
-            # Transform for ReID model
-            img = self.transform(person_img).unsqueeze(0).to(self.device)
-            with torch.no_grad():
-                emb = self.reid_model(img)
-            emb = emb.cpu().numpy().flatten()
-            # L2 Normalize
-            emb = emb / np.linalg.norm(emb)
-            return emb
+            with self.models.reid_lock:
+                return self.reid.embed(crops_by_tid)
         except Exception as e:
             print(f"[ERROR] Appearance embedding failed: {e}")
-            return None
+            return {}
 
     def _find_global_match(self, embedding, emb_type="face", threshold=0.6):
-        for uuid, data in self.global_manager.items():
-            if data.get(emb_type) is not None:
-                sim = self._cosine_sim(embedding, data[emb_type])
-                if sim > threshold:
-                    return uuid
-        return None
-
-    def _compute_iou(self, boxA, boxB):
-        # box: [x1, y1, x2, y2]
-        xA = max(boxA[0], boxB[0])
-        yA = max(boxA[1], boxB[1])
-        xB = min(boxA[2], boxB[2])
-        yB = min(boxA[3], boxB[3])
-
-        interW = max(0, xB - xA)
-        interH = max(0, yB - yA)
-        interArea = interW * interH
-
-        boxAArea = (boxA[2] - boxA[0]) * (boxA[3] - boxA[1])
-        boxBArea = (boxB[2] - boxB[0]) * (boxB[3] - boxB[1])
-
-        unionArea = boxAArea + boxBArea - interArea
-        if unionArea == 0: return 0
-        return interArea / unionArea
-
-    def _get_iou_threshold(self, ppe_name):
-        if ppe_name == "vest": return 0.4
-        elif ppe_name == "helmet": return 0.01
-        elif ppe_name == "boots": return 0.02
-        elif ppe_name == "gloves": return 0.01
-        return 0.01
+        # Best (not first) cosine match above threshold
+        match, _ = self.global_manager.best_match(embedding, emb_type, threshold)
+        return match
+
+    def _on_worker_registered(self, provisional_id, real_id):
+        # Called from the DB writer thread; applied at the start of the next frame
+        self._id_updates.append((provisional_id, real_id))
+
+    def _publish_stats(self):
+        delta = {k: v for k, v in self.current_stats.items() if self._published_stats.get(k) != v}
+        if delta:
+            self._published_stats.update(delta)
+            self.events.publish("stats", dict(delta, stream=self.name))
+
+    def _apply_id_updates(self):
+        while self._id_updates:
+            old_id, new_id = self._id_updates.popleft()
+            if new_id is None:
+                # Registration was given up: forget the id so its tracks get identified again
+                self.global_manager.remove(old_id)
+            else:
+                self.global_manager.rename(old_id, new_id)
+            self.identity_manager.rename_identity(old_id, new_id)
+
+    def _assign_identity(self, mgr, tid, embedding, emb_type, threshold, person_crop):
+        """Matches the embedding against the gallery, registering a new worker if nothing matches."""
+        with self.timer.stage("gallery_search"):
+            match = self._find_global_match(embedding, emb_type, threshold)
+        if match:
+            mgr.final_uuid = match
+            return
+        with self.timer.stage("evidence_write"):
+            snap_key = self.evidence.save("faces", person_crop, f"{emb_type}_{tid}")
+        with self.timer.stage("db_write"):
+            new_id = self.db_writer.register_worker(embedding, snap_key)
+        metrics.WORKERS_REGISTERED.inc(stream=self.name, kind=emb_type)
+        self.global_manager.add(new_id, **{emb_type: embedding})
+        mgr.final_uuid = new_id
 
     # -------------------- PIPELINE --------------------
 
-    def generate_frames(self):
-        if not self.cap or not self.cap.isOpened():
-             blank = np.zeros((360, 640, 3), dtype=np.uint8)
-             cv.putText(blank, "Waiting for video...", (50, 180), cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-             ret, buffer = cv.imencode('.jpg', blank)
-             yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-             return
+    def iter_processed_frames(self):
+        """Yields annotated frames until the source ends or is replaced."""
+        if not self.capture or not self.capture.is_opened():
+            return
 
+        # Frame skipping and resizing happen on the capture thread
+        capture = self.capture
         while True:
-            success, frame = self.cap.read()
+            success, frame = capture.read(timeout=1.0)
             if not success:
-                self.cap.set(cv.CAP_PROP_POS_FRAMES, 0)
+                if capture.finished or capture is not self.capture:
+                    return
                 continue
+            if capture is not self.capture:
+                return  # a frame from the replaced source; the new one starts fresh
             
             self.frames_count += 1
-            if self.frames_count % 3 != 0: 
-                continue # Skip frames
-                
-            # Resize
-            if frame.shape[1] > 1280:
-                scale = 1280 / frame.shape[1]
-                frame = cv.resize(frame, (0, 0), fx=scale, fy=scale)
+            yield self._process_frame(frame)
 
-            processed_frame = self._process_frame(frame)
-            
-            ret, buffer = cv.imencode('.jpg', processed_frame, [int(cv.IMWRITE_JPEG_QUALITY), 70])
-            yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+    def generate_frames(self):
+        """
+        Standalone MJPEG generator. The API serves viewers through
+        backend.broadcast.FrameBroadcaster instead, which processes and
+        encodes each frame once for all of them.
+        """
+        if not self.capture or not self.capture.is_opened():
+             yield waiting_chunk()
+             return
+
+        for processed_frame in self.iter_processed_frames():
+            with self.timer.stage("encode"):
+                ret, buffer = cv.imencode('.jpg', processed_frame, [int(cv.IMWRITE_JPEG_QUALITY), 70])
+            yield mjpeg_chunk(buffer.tobytes())
 
-    def _process_frame(self, frame):
-        results = self.model.track(frame, persist=True, tracker="botsort.yaml", verbose=False)
+    def _detect(self, frame):
+        """YOLO detection (shared, possibly batched with other streams) + this stream's tracker."""
+        with self.timer.stage("detect"):
+            if self.detector is not None:
+                result = self.detector.detect(frame)
+            else:
+                with self.models.yolo_lock:
+                    result = self.model.predict(frame, conf=self.models.detect_conf, verbose=False)[0]
+        with self.timer.stage("track"):
+            return [self.tracker.update(result, frame)]
+
+    def _draw(self, frame, drawn):
+        with self.timer.stage("draw"):
+            for (px1, py1, px2, py2), final_uuid, n_missing in drawn:
+                if n_missing == 4: color = (0, 0, 255)
+                elif n_missing > 0: color = (0, 255, 255)
+                else: color = (0, 255, 0)
+
+                cv.rectangle(frame, (px1, py1), (px2, py2), color, 2)
+                label = f"ID: {final_uuid or 'Scanning'}"
+                cv.putText(frame, label, (px1, py1 - 10), 0, 0.6, color, 2)
+
+    def _end_frame(self, frame_start):
+        frame_end = time.perf_counter()
+        self._frame_ends.append(frame_end)
+        metrics.FRAME_SECONDS.observe(frame_end - frame_start, stream=self.name)
+        metrics.FRAMES_PROCESSED.inc(stream=self.name)
+
+    def _process_frame(self, frame, draw=True):
+        with self._frame_lock:
+            return self._process_frame_locked(frame, draw)
+
+    def _process_frame_locked(self, frame, draw):
+        frame_start = time.perf_counter()
+        self._apply_id_updates()
+
+        # Nothing moved since the last detector pass: the previous boxes, counts
+        # and identities still hold, so skip detection, tracking and identity work
+        with self.timer.stage("motion_gate"):
+            infer = self.motion_gate.should_infer(frame)
+        if not infer:
+            if draw:
+                self._draw(frame, self._last_drawn)
+            # Keep the track store's clock running so idle / TTL eviction still happens
+            self.identity_manager.end_frame()
+            self._end_frame(frame_start)
+            return frame
+
+        results = self._detect(frame)
         
         persons = []
         equipment = []
@@ -194,6 +307,7 @@ class PPEPipeline:
         vest_c = 0
         mask_c = 0
 
+        decode_start = time.perf_counter()
         if results[0].boxes is not None:
             for box in results[0].boxes:
                 cls_id = int(box.cls[0])
@@ -218,67 +332,74 @@ class PPEPipeline:
                     if 'helmet' in name or 'hardhat' in name: helmet_c += 1
                     if 'vest' in name: vest_c += 1
                     if 'mask' in name: mask_c += 1
+        self.timer.record("decode", time.perf_counter() - decode_start)
+
+        # Person x PPE association for the whole frame in one vectorized pass
+        with self.timer.stage("associate"):
+            equipped_per_person = self.associator.associate(
+                [p["box"] for p in persons],
+                [e["box"] for e in equipment],
+                [e["cls"] for e in equipment],
+            )
 
-        for p in persons:
+        tracks = []
+        for p, equipped_list in zip(persons, equipped_per_person):
             px1, py1, px2, py2 = p["box"]
             tid = p["tid"]
-            
-            if tid not in self.identity_manager:
-                self.identity_manager[tid] = {
-                    "final_uuid": None,
-                    "frame_count": 0,
-                    "has_logged_violation": False
-                }
-            
-            mgr = self.identity_manager[tid]
-            mgr["frame_count"] += 1
+            mgr = self.identity_manager.touch(tid)
             
             person_crop = frame[max(0, py1):min(frame.shape[0], py2), max(0, px1):min(frame.shape[1], px2)]
-            
-            # --- 1. IDENTITY (Face -> Appearance) ---
-            if mgr["final_uuid"] is None:
-                # A. Face
-                if self._is_clear_face(person_crop):
-                    face_emb = self._extract_face_embedding(person_crop)
-                    if face_emb is not None:
-                        match = self._find_global_match(face_emb, "face", 0.7)
-                        if match:
-                            mgr["final_uuid"] = match
-                        else:
-                            face_fn = f"face_{tid}_{int(time.time())}.jpg"
-                            face_path = os.path.join(FACES_DIR, face_fn)
-                            cv.imwrite(face_path, person_crop)
-                            new_id = register_new_worker(face_emb, face_fn)
-                            self.global_manager[new_id] = {"face": face_emb, "appearance": None}
-                            mgr["final_uuid"] = new_id
-                
-                # B. Appearance Fallback
-                if mgr["final_uuid"] is None and mgr["frame_count"] > self.wait_for_face_limit:
-                    app_emb = self._extract_appearance_embedding(person_crop)
-                    if app_emb is not None:
-                        match = self._find_global_match(app_emb, "appearance", 0.65)
-                        if match:
-                            mgr["final_uuid"] = match
-                        else:
-                            snap_fn = f"appearance_{tid}_{int(time.time())}.jpg"
-                            snap_path = os.path.join(FACES_DIR, snap_fn)
-                            cv.imwrite(snap_path, person_crop)
-                            new_id = register_new_worker(app_emb, snap_fn) # Reusing register function, maybe need specific one or adapt
-                            self.global_manager[new_id] = {"face": None, "appearance": app_emb}
-                            mgr["final_uuid"] = new_id
-
-            # --- 2. PPE ASSOCIATION (IoU) ---
-            equipped_list = []
-            for e in equipment:
-                ppe_name = self.class_names[e["cls"]].lower()
-                ppe_box = e["box"]
-                person_box = [px1, py1, px2, py2]
-                
-                iou = self._compute_iou(person_box, ppe_box)
-                thresh = self._get_iou_threshold(ppe_name)
-                
-                if iou > thresh:
-                    equipped_list.append(ppe_name)
+            tracks.append((p, mgr, person_crop, equipped_list))
+
+        # --- 1. IDENTITY (Face -> Appearance) ---
+        # The scheduler bounds this section per frame: only the best-ranked
+        # unidentified tracks are gated and embedded, failures back off.
+        scheduler = self.id_scheduler
+        scheduler.begin_frame(self.identity_manager.frame)
+        unidentified = {p["tid"]: (p, mgr, crop) for p, mgr, crop, _ in tracks if mgr.final_uuid is None}
+
+        # A. Face: quality gate, then one detector pass and batched FaceNet calls for the chosen tracks
+        with self.timer.stage("face_gate"):
+            face_tids = scheduler.plan_faces(
+                [(tid, mgr, crop) for tid, (_, mgr, crop) in unidentified.items()], frame.shape
+            )
+        face_embs = {}
+        if face_tids:
+            with self.timer.stage("face_embed"):
+                face_start = time.perf_counter()
+                face_embs = self._extract_face_embeddings(frame, {tid: unidentified[tid][0]["box"] for tid in face_tids})
+                scheduler.observe("face", time.perf_counter() - face_start, len(face_tids))
+        for tid in face_tids:
+            p, mgr, person_crop = unidentified[tid]
+            face_emb = face_embs.get(tid)
+            if face_emb is None:
+                scheduler.fail(mgr, "face")  # no face found in the crop
+            elif mgr.final_uuid is None:
+                self._assign_identity(mgr, tid, face_emb, "face", 0.7, person_crop)
+
+        # B. Appearance Fallback, one batched ReID forward for the tracks that timed out
+        reid_tids = scheduler.plan_reid([
+            (tid, mgr) for tid, (_, mgr, _) in unidentified.items()
+            if mgr.final_uuid is None and mgr.frame_count > self.wait_for_face_limit
+        ])
+        app_embs = {}
+        if reid_tids:
+            with self.timer.stage("reid"):
+                reid_start = time.perf_counter()
+                app_embs = self._extract_appearance_embeddings({tid: unidentified[tid][2] for tid in reid_tids})
+                scheduler.observe("reid", time.perf_counter() - reid_start, len(reid_tids))
+        for tid in reid_tids:
+            p, mgr, person_crop = unidentified[tid]
+            app_emb = app_embs.get(tid)
+            if app_emb is None:
+                scheduler.fail(mgr, "reid")
+            elif mgr.final_uuid is None:
+                self._assign_identity(mgr, tid, app_emb, "appearance", 0.65, person_crop)
+        scheduler.end_frame()
+
+        drawn = []
+        for p, mgr, person_crop, equipped_list in tracks:
+            tid = p["tid"]
 
             # --- 3. VIOLATION CHECK ---
             missing_ppe = []
@@ -307,34 +428,38 @@ class PPEPipeline:
                  if not found:
                      missing_ppe.append(req)
 
-            if missing_ppe and mgr["final_uuid"] is not None:
-                if not mgr["has_logged_violation"]:
-                    alert_fn = f"violation_{tid}_{int(time.time())}.jpg"
-                    alert_path = os.path.join(ALERTS_DIR, alert_fn)
-                    cv.imwrite(alert_path, person_crop)
+            if missing_ppe and mgr.final_uuid is not None:
+                if not mgr.has_logged_violation:
+                    with self.timer.stage("evidence_write"):
+                        alert_key = self.evidence.save("alerts", person_crop, f"violation_{tid}")
                     
-                    log_violation(
-                        worker_uuid=str(mgr["final_uuid"]), 
-                        equipped=", ".join(equipped_list), 
-                        violated=", ".join(missing_ppe), 
-                        evidence_path=alert_path
-                    )
-                    mgr["has_logged_violation"] = True
+                    with self.timer.stage("db_write"):
+                        # Published as a 'violation' event once the row is committed
+                        self.db_writer.log_violation(
+                            worker_uuid=str(mgr.final_uuid), 
+                            equipped=", ".join(equipped_list), 
+                            violated=", ".join(missing_ppe), 
+                            evidence_path=alert_key,
+                            stream=self.name
+                        )
+                    mgr.has_logged_violation = True
                     self.current_stats["violations_today"] += 1
+                    metrics.VIOLATIONS.inc(stream=self.name)
 
-            # --- 4. VISUALIZATION ---
-            if len(missing_ppe) == 4: color = (0, 0, 255)
-            elif len(missing_ppe) > 0: color = (0, 255, 255)
-            else: color = (0, 255, 0)
-            
-            cv.rectangle(frame, (px1, py1), (px2, py2), color, 2)
-            label = f"ID: {mgr['final_uuid'] or 'Scanning'}"
-            cv.putText(frame, label, (px1, py1 - 10), 0, 0.6, color, 2)
+            drawn.append((p["box"], mgr.final_uuid, len(missing_ppe)))
+
+        # --- 4. VISUALIZATION ---
+        self._last_drawn = drawn
+        if draw:
+            self._draw(frame, drawn)
 
         # Update Stats
         self.current_stats["helmet_count"] = helmet_c
         self.current_stats["vest_count"] = vest_c
         self.current_stats["mask_count"] = mask_c
         self.current_stats["total_workers"] = len(persons)
+        self._publish_stats()
+        self.identity_manager.end_frame()
+        self._end_frame(frame_start)
         
         return frame
@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+PROFILING_CONFIG = {
+    "window": 1024,   # recent samples kept per stage for percentiles
+}
+
+
+class StageTimer:
+    """
+    Wall-clock timings for the named stages of the frame pipeline.
+
+    Each stage keeps a running count and total plus a window of recent
+    samples, so percentiles reflect current behaviour while totals cover the
+    whole run. Cheap enough (two perf_counter calls) to stay on in production.
+    observer(stage, seconds), if given, also receives every sample
+    (the /metrics histograms hook in here).
+    """
+
+    def __init__(self, window=None, observer=None):
+        self.window = window or PROFILING_CONFIG["window"]
+        self.observer = observer
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            entry = self._stages.get(name)
+            if entry is None:
+                entry = {"count": 0, "total": 0.0, "samples": deque(maxlen=self.window)}
+                self._stages[name] = entry
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["samples"].append(seconds)
+        if self.observer is not None:
+            self.observer(name, seconds)
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+
+    def snapshot(self):
+        """{stage: {count, total_ms, mean_ms, p50_ms, p95_ms, max_ms}}"""
+        with self._lock:
+            stages = {name: (e["count"], e["total"], list(e["samples"])) for name, e in self._stages.items()}
+        out = {}
+        for name, (count, total, samples) in stages.items():
+            arr = np.asarray(samples) * 1000.0
+            out[name] = {
+                "count": count,
+                "total_ms": round(total * 1000.0, 3),
+                "mean_ms": round(total * 1000.0 / count, 4),
+                "p50_ms": round(float(np.percentile(arr, 50)), 4),
+                "p95_ms": round(float(np.percentile(arr, 95)), 4),
+                "max_ms": round(float(arr.max()), 4),
+            }
+        return out
@@ -0,0 +1,56 @@
+import cv2 as cv
+import numpy as np
+import torch
+
+# ImageNet statistics used by the OSNet transform in reid_manger.embedding_model
+REID_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+REID_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+REID_INPUT_SIZE = (256, 128)  # (height, width)
+
+
+class BatchedReID:
+    """
+    Runs the OSNet ReID model over every person crop of a frame at once.
+
+    Crops are resized with OpenCV straight into one preallocated batch,
+    normalized with NumPy in a single pass (no PIL images, no per-crop
+    tensors) and pushed through the model in chunks of at most
+    max_batch_size.
+    """
+
+    def __init__(self, model, device="cpu", max_batch_size=16, input_size=REID_INPUT_SIZE):
+        self.model = model
+        self.device = device
+        self.max_batch_size = max_batch_size
+        self.input_size = input_size
+        self._scale = (1.0 / (255.0 * REID_STD)).astype(np.float32)
+        self._offset = (REID_MEAN / REID_STD).astype(np.float32)
+
+    def preprocess(self, crops):
+        """Returns an N x 3 x H x W float32 array ready for the model."""
+        h, w = self.input_size
+        batch = np.empty((len(crops), h, w, 3), dtype=np.uint8)
+        for i, crop in enumerate(crops):
+            # Channels stay in the frame's order, as the old ToPILImage transform left them
+            cv.resize(crop, (w, h), dst=batch[i], interpolation=cv.INTER_LINEAR)
+        batch = batch.astype(np.float32) * self._scale - self._offset
+        return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+    def _forward(self, batch):
+        """N x 3 x H x W float32 array -> N x D raw embeddings (NumPy)."""
+        inputs = torch.from_numpy(batch).to(self.device)
+        with torch.no_grad():
+            out = self.model(inputs)
+        return out.cpu().numpy()
+
+    def embed(self, crops_by_tid):
+        """Returns {track_id: L2-normalized embedding} for every non-empty crop."""
+        items = [(tid, crop) for tid, crop in crops_by_tid.items() if crop is not None and crop.size > 0]
+        embeddings = {}
+        for start in range(0, len(items), self.max_batch_size):
+            chunk = items[start:start + self.max_batch_size]
+            out = self._forward(self.preprocess([crop for _, crop in chunk])).reshape(len(chunk), -1)
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+            for (tid, _), emb in zip(chunk, out):
+                embeddings[tid] = emb
+        return embeddings
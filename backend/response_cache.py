@@ -0,0 +1,81 @@
+import base64
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+RESPONSE_CACHE_CONFIG = {
+    "ttl_s": 2.0,
+    "max_entries": 512,
+}
+
+
+def encode_cursor(timestamp, row_id):
+    """Opaque keyset cursor for the (timestamp, id) of the last row on a page."""
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Returns (datetime, id) or raises ValueError for a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(ts), row_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class ResponseCache:
+    """
+    Short-TTL cache for list endpoints, with ETags built from database state.
+
+    The caller reads a cheap `state` of the tables behind a scope (their max
+    ids, see database.get_table_state) before serving a page. ETags hash
+    the scope, that state and the query, so any insert - from this process,
+    another worker, main.py or a job - changes them, and a client holding
+    the current ETag gets a 304 without the page query running. Cached
+    bodies are only reused while the state is unchanged and the TTL has not
+    expired.
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(RESPONSE_CACHE_CONFIG, **(config or {}))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def etag(self, scope, query, state):
+        digest = hashlib.sha1(repr((state, query)).encode()).hexdigest()[:16]
+        return f'W/"{scope}-{digest}"'
+
+    def not_modified(self, etag, if_none_match):
+        if not if_none_match:
+            return False
+        match = any(tag.strip() in (etag, "*") for tag in if_none_match.split(","))
+        if match:
+            self.metrics["not_modified"] += 1
+        return match
+
+    def get(self, scope, query, state):
+        key = (scope, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time() or entry[1] != state:
+                self.metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.metrics["hits"] += 1
+            return entry[2]
+
+    def put(self, scope, query, state, value):
+        """Stores value; `state` must be the one read before the page query, so a racing write is not masked."""
+        with self._lock:
+            self._entries[(scope, query)] = (time.time() + self.config["ttl_s"], state, value)
+            self._entries.move_to_end((scope, query))
+            while len(self._entries) > self.config["max_entries"]:
+                self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache()
@@ -32,3 +32,37 @@ class StatsResponse(BaseModel):
     vest_count: int
     mask_count: int
     violations_today: int
+
+
+class StreamCreate(BaseModel):
+    source: str  # file path, stream URL or camera index
+
+class UploadCreate(BaseModel):
+    filename: str
+    size: int                        # total bytes the client will send
+    stream_id: Optional[str] = None  # start this stream on the video as soon as it decodes
+
+class UploadStatus(BaseModel):
+    upload_id: str
+    filename: str
+    offset: int
+    size: int
+    complete: bool
+    stream_id: Optional[str] = None
+    streaming: bool
+
+class MotionSettings(BaseModel):
+    # Unset fields keep their current value; regions are polygons of [x, y] in 0..1
+    enabled: Optional[bool] = None
+    method: Optional[str] = None
+    pixel_threshold: Optional[int] = None
+    min_changed_ratio: Optional[float] = None
+    hold_frames: Optional[int] = None
+    refresh_frames: Optional[int] = None
+    ignore_regions: Optional[List[List[List[float]]]] = None
+    watch_regions: Optional[List[List[List[float]]]] = None
+
+class StreamInfo(BaseModel):
+    id: str
+    source: Optional[str] = None
+    stats: StatsResponse
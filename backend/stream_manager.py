@@ -0,0 +1,204 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from backend.models import ModelLoader
+from backend.pipeline_service import PPEPipeline
+from backend.broadcast import FrameBroadcaster
+
+STREAM_MANAGER_CONFIG = {
+    "max_detect_batch": 8,     # frames per YOLO call across streams
+    "max_detect_wait_ms": 5,   # how long to wait for other streams to fill a batch
+    "detect_timeout_s": 10.0,  # a stream thread gives up on a detection after this long
+}
+
+
+class DetectionBatcher:
+    """
+    Micro-batches detector calls from several streams into one YOLO predict.
+
+    Each stream thread calls detect(frame) and blocks; a single worker thread
+    gathers whatever frames arrive within max_wait_ms (up to max_batch) and
+    runs them through the shared model together. detect() raises instead of
+    blocking forever if the batcher is closed or stalls.
+    """
+
+    def __init__(self, models, max_batch=8, max_wait_ms=5, timeout_s=10.0):
+        self.models = models
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout_s
+        self._requests = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="detect-batcher", daemon=True)
+        self._thread.start()
+
+    def detect(self, frame):
+        if self._stop.is_set():
+            raise RuntimeError("Detection batcher is closed")
+        future = Future()
+        self._requests.put((frame, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()   # the worker skips it if it has not started yet
+            raise
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+        # Fail whatever is still queued so no stream thread waits on it
+        while True:
+            try:
+                _, future = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("Detection batcher closed"))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                batch = [self._requests.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            deadline = time.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Requests whose caller already timed out are skipped
+            batch = [(frame, future) for frame, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            frames = [frame for frame, _ in batch]
+            try:
+                with self.models.yolo_lock:
+                    results = self.models.yolo.predict(frames, conf=self.models.detect_conf, verbose=False)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class StreamManager:
+    """
+    Holds N named camera/video streams that share one set of models.
+
+    Every stream is a PPEPipeline with its own source, tracker, identity
+    manager and stats; detector calls are micro-batched across streams and
+    all streams resolve identities against the same gallery.
+
+    Models come from `models` if given, otherwise from `loader` (a
+    ModelLoader); they are only waited for when the first stream is created.
+    """
+
+    def __init__(self, models=None, config=None, loader=None):
+        self.config = dict(STREAM_MANAGER_CONFIG, **(config or {}))
+        self.loader = loader
+        self._models = models
+        self._detector = None
+        self._streams = {}
+        self._broadcasters = {}
+        self._lock = threading.Lock()
+
+    @property
+    def models_ready(self):
+        return self._models is not None or (self.loader is not None and self.loader.ready)
+
+    @property
+    def models(self):
+        if self._models is None:
+            if self.loader is None:
+                self.loader = ModelLoader()
+            self._models = self.loader.get()
+        return self._models
+
+    @property
+    def detector(self):
+        if self._detector is None:
+            models = self.models
+            with self._lock:
+                if self._detector is None:
+                    self._detector = DetectionBatcher(
+                        models, self.config["max_detect_batch"], self.config["max_detect_wait_ms"],
+                        self.config["detect_timeout_s"],
+                    )
+        return self._detector
+
+    def __contains__(self, stream_id):
+        return stream_id in self._streams
+
+    def get(self, stream_id):
+        return self._streams.get(stream_id)
+
+    def create(self, stream_id, source=None, growing=None):
+        """Creates (or re-points) a stream. Returns its pipeline."""
+        models, detector = self.models, self.detector
+        with self._lock:
+            pipeline = self._streams.get(stream_id)
+            if pipeline is None:
+                pipeline = PPEPipeline(models=models, detector=detector, name=stream_id)
+                self._streams[stream_id] = pipeline
+                self._broadcasters[stream_id] = FrameBroadcaster(pipeline)
+                print(f"[INFO] Stream '{stream_id}' created")
+        if source is not None:
+            pipeline.set_source(source, growing=growing)
+            # Process (and log violations) whether or not anyone is watching
+            self._broadcasters[stream_id].start()
+        return pipeline
+
+    def subscribe(self, stream_id):
+        """MJPEG generator for one viewer of the stream (shared producer)."""
+        return self._broadcasters[stream_id].subscribe()
+
+    def broadcast_stats(self, stream_id):
+        return self._broadcasters[stream_id].stats()
+
+    def get_or_create(self, stream_id):
+        return self.get(stream_id) or self.create(stream_id)
+
+    def remove(self, stream_id):
+        with self._lock:
+            pipeline = self._streams.pop(stream_id, None)
+            broadcaster = self._broadcasters.pop(stream_id, None)
+        if pipeline is None:
+            return False
+        pipeline.close()
+        if broadcaster is not None:
+            broadcaster.stop()
+        print(f"[INFO] Stream '{stream_id}' removed")
+        return True
+
+    def pipelines(self):
+        """Snapshot of (stream_id, pipeline) pairs, safe to iterate while streams come and go."""
+        return list(self._streams.items())
+
+    def list_streams(self):
+        return [{
+            "id": stream_id,
+            "source": str(pipeline.source_path) if pipeline.source_path is not None else None,
+            "stats": pipeline.get_stats(),
+        } for stream_id, pipeline in self.pipelines()]
+
+    def aggregate_stats(self):
+        """Per-frame counts and today's violations summed over every stream."""
+        totals = {}
+        for _, pipeline in self.pipelines():
+            for key, value in pipeline.get_stats().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def close(self):
+        for stream_id in list(self._streams):
+            self.remove(stream_id)
+        if self._detector is not None:
+            self._detector.close()
@@ -0,0 +1,159 @@
+import time
+from collections import OrderedDict
+
+TRACK_STORE_CONFIG = {
+    "max_idle_frames": 150,   # evict a track unseen for this many processed frames...
+    "max_idle_s": 30.0,       # ...or for this many seconds, whichever comes first
+    "max_tracks": 1000,       # hard cap; least recently seen tracks go first
+    "sweep_every": 15,        # frames between idle sweeps
+    "handoff_ttl_s": 120.0,   # how long an evicted track's identity can be picked up again
+    "handoff_size": 1000,
+}
+
+
+class TrackState:
+    """Identity state for one tracker id."""
+
+    __slots__ = ("tid", "final_uuid", "frame_count", "has_logged_violation", "last_frame", "last_seen",
+                 "quality", "prev_quality", "quality_frame", "cooldown_until", "failures")
+
+    def __init__(self, tid, frame, now):
+        self.tid = tid
+        self.final_uuid = None
+        self.frame_count = 0
+        self.has_logged_violation = False
+        self.last_frame = frame
+        self.last_seen = now
+        # Identification scheduling (backend.identification)
+        self.quality = None          # latest sharpness score of the crop
+        self.prev_quality = None
+        self.quality_frame = None    # store frame the score was taken on
+        # Per kind ("face", "reid"): no attempt of that kind before this frame,
+        # and consecutive failed attempts of that kind
+        self.cooldown_until = {"face": 0, "reid": 0}
+        self.failures = {"face": 0, "reid": 0}
+
+
+class TrackStore:
+    """
+    Per-stream track id -> TrackState, bounded in size.
+
+    Tracks live in an OrderedDict kept in last-seen order, so idle tracks sit
+    at the front and a sweep only looks at the tracks it evicts. Evicted
+    tracks that had been identified leave (worker id, violation flag) in a
+    short-lived handoff cache; if the tracker revives the same id, touch()
+    restores them instead of starting identification (and the violation
+    log) over.
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(TRACK_STORE_CONFIG, **(config or {}))
+        self._tracks = OrderedDict()
+        self._handoff = OrderedDict()   # tid -> (final_uuid, has_logged_violation, expires_at)
+        self.frame = 0
+        self.metrics = {
+            "created": 0,
+            "evicted_idle": 0,
+            "evicted_lru": 0,
+            "handoffs": 0,
+            "handoff_hits": 0,
+            "handoff_expired": 0,
+        }
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def __contains__(self, tid):
+        return tid in self._tracks
+
+    def get(self, tid):
+        return self._tracks.get(tid)
+
+    def values(self):
+        return self._tracks.values()
+
+    def touch(self, tid, now=None):
+        """Returns the state for tid, creating (or restoring from the handoff cache) if needed."""
+        now = time.monotonic() if now is None else now
+        state = self._tracks.get(tid)
+        if state is None:
+            state = TrackState(tid, self.frame, now)
+            handed_off = self._handoff.pop(tid, None)
+            if handed_off is not None and handed_off[2] >= now:
+                state.final_uuid, state.has_logged_violation = handed_off[0], handed_off[1]
+                self.metrics["handoff_hits"] += 1
+            self._tracks[tid] = state
+            self.metrics["created"] += 1
+        else:
+            self._tracks.move_to_end(tid)
+        state.frame_count += 1
+        state.last_frame = self.frame
+        state.last_seen = now
+        return state
+
+    def end_frame(self, now=None):
+        """Advances the frame counter and evicts idle / excess tracks."""
+        self.frame += 1
+        if len(self._tracks) > self.config["max_tracks"]:
+            while len(self._tracks) > self.config["max_tracks"]:
+                self._evict(next(iter(self._tracks)), "evicted_lru", now)
+        if self.frame % self.config["sweep_every"]:
+            return
+        now = time.monotonic() if now is None else now
+        min_frame = self.frame - self.config["max_idle_frames"]
+        min_seen = now - self.config["max_idle_s"]
+        while self._tracks:
+            oldest = next(iter(self._tracks.values()))
+            if oldest.last_frame >= min_frame and oldest.last_seen >= min_seen:
+                break
+            self._evict(oldest.tid, "evicted_idle", now)
+        self._expire_handoffs(now)
+
+    def _evict(self, tid, reason, now=None):
+        state = self._tracks.pop(tid)
+        self.metrics[reason] += 1
+        if state.final_uuid is not None:
+            now = time.monotonic() if now is None else now
+            self._handoff[tid] = (state.final_uuid, state.has_logged_violation, now + self.config["handoff_ttl_s"])
+            self._handoff.move_to_end(tid)
+            self.metrics["handoffs"] += 1
+            while len(self._handoff) > self.config["handoff_size"]:
+                self._handoff.popitem(last=False)
+
+    def _expire_handoffs(self, now):
+        # Entries are appended in eviction order with the same TTL, so expired ones are at the front
+        while self._handoff:
+            tid, (_, _, expires_at) = next(iter(self._handoff.items()))
+            if expires_at >= now:
+                break
+            del self._handoff[tid]
+            self.metrics["handoff_expired"] += 1
+
+    def rename_identity(self, old_id, new_id):
+        """
+        Swaps a provisional worker id for the real one in live and handed-off
+        tracks; new_id=None forgets it (the registration was dropped).
+        """
+        for state in self._tracks.values():
+            if state.final_uuid == old_id:
+                state.final_uuid = new_id
+        for tid, (uuid, logged, expires_at) in list(self._handoff.items()):
+            if uuid == old_id:
+                if new_id is None:
+                    del self._handoff[tid]
+                else:
+                    self._handoff[tid] = (new_id, logged, expires_at)
+
+    def clear(self):
+        self._tracks.clear()
+        self._handoff.clear()
+
+    def stats(self):
+        states = list(self._tracks.values())  # may be read from another thread
+        return dict(
+            self.metrics,
+            tracks=len(states),
+            identified=sum(1 for s in states if s.final_uuid is not None),
+            handoff_cache=len(self._handoff),
+            frame=self.frame,
+        )
@@ -0,0 +1,37 @@
+import torch
+from ultralytics.trackers.bot_sort import BOTSORT
+from ultralytics.utils import IterableSimpleNamespace, yaml_load
+from ultralytics.utils.checks import check_yaml
+
+
+class StreamTracker:
+    """
+    A BoT-SORT tracker owned by a single stream.
+
+    model.track(persist=True) keeps its tracker on the YOLO predictor, so one
+    YOLO instance can only track one video. Running detection with
+    model.predict and tracking here lets several streams share the detector
+    while keeping their track ids apart. update() mirrors what Ultralytics
+    does in its on_predict_postprocess_end callback.
+    """
+
+    def __init__(self, tracker_cfg="botsort.yaml", frame_rate=30):
+        self.cfg = IterableSimpleNamespace(**yaml_load(check_yaml(tracker_cfg)))
+        self.frame_rate = frame_rate
+        self.tracker = BOTSORT(args=self.cfg, frame_rate=frame_rate)
+
+    def reset(self):
+        self.tracker = BOTSORT(args=self.cfg, frame_rate=self.frame_rate)
+
+    def update(self, result, frame):
+        """Assigns track ids to a predict() Result in place and returns it."""
+        det = result.boxes.cpu().numpy()
+        if len(det) == 0:
+            return result
+        tracks = self.tracker.update(det, frame)
+        if len(tracks) == 0:
+            return result
+        idx = tracks[:, -1].astype(int)
+        result = result[idx]
+        result.update(boxes=torch.as_tensor(tracks[:, :-1]))
+        return result
@@ -0,0 +1,283 @@
+"""
+Streaming, resumable video uploads.
+
+    POST   /uploads               {"filename", "size", "stream_id"?} -> upload id
+    PATCH  /uploads/{id}          raw bytes, Upload-Offset header = bytes already sent
+    HEAD   /uploads/{id}          Upload-Offset / Upload-Length, to resume after a failure
+    DELETE /uploads/{id}          abort
+
+Bytes go straight to videos/uploads/<id><ext> (no temp file, no rename), so
+the offset is simply the file size and an interrupted upload resumes from
+whatever reached the disk, even across restarts. Request bodies are read
+as they arrive and written in buffered blocks on executor threads, never on
+the event loop. When a stream_id is given, the stream starts on the
+received prefix as soon as it decodes (streamable containers: fragmented
+or faststart MP4, MKV, WebM, TS) and FrameCapture follows the growing file.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+
+import cv2 as cv
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+UPLOAD_CONFIG = {
+    "dir": os.path.join(BASE_DIR, "videos", "uploads"),
+    "max_bytes": 8 * 1024 ** 3,
+    "write_block": 1024 ** 2,            # request chunks are coalesced into writes of this size
+    "chunk_hint": 8 * 1024 ** 2,         # PATCH size suggested to clients
+    "progressive_min_bytes": 2 * 1024 ** 2,
+    "probe_every_bytes": 4 * 1024 ** 2,  # re-try opening a prefix that did not decode yet
+    "session_ttl_s": 24 * 3600,          # incomplete uploads untouched for this long are deleted
+    "extensions": (".mp4", ".m4v", ".mov", ".avi", ".mkv", ".webm", ".ts", ".mpg", ".mpeg"),
+}
+
+
+class UploadError(Exception):
+    """Rejected upload request; status is the HTTP code to answer with."""
+
+    def __init__(self, status, message, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def probe_video(path):
+    """True if OpenCV can open the file (or the prefix received so far) and decode a frame."""
+    cap = cv.VideoCapture(path)
+    try:
+        return cap.isOpened() and cap.read()[0]
+    finally:
+        cap.release()
+
+
+class UploadSession:
+    """One upload. `complete` is read by FrameCapture to tell a growing file from a finished one."""
+
+    def __init__(self, upload_id, filename, path, size, stream_id=None, created=None):
+        self.id = upload_id
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.stream_id = stream_id
+        self.created = created or time.time()
+        self.complete = False
+        self.streaming = False   # a stream is already decoding this file
+        self.last_probe = 0
+        self.lock = asyncio.Lock()
+
+    @property
+    def offset(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def meta(self):
+        return {
+            "id": self.id, "filename": self.filename, "path": self.path, "size": self.size,
+            "stream_id": self.stream_id, "created": self.created, "complete": self.complete,
+        }
+
+    def status(self):
+        return {
+            "upload_id": self.id,
+            "filename": self.filename,
+            "offset": self.offset,
+            "size": self.size,
+            "complete": self.complete,
+            "stream_id": self.stream_id,
+            "streaming": self.streaming,
+        }
+
+
+class UploadManager:
+    """Creates, resumes and completes uploads; session metadata lives next to the file as <id>.upload.json."""
+
+    def __init__(self, config=None):
+        self.config = dict(UPLOAD_CONFIG, **(config or {}))
+        self.dir = self.config["dir"]
+        os.makedirs(self.dir, exist_ok=True)
+        self._sessions = {}
+        self.metrics = {"created": 0, "completed": 0, "bytes_received": 0, "resumed": 0, "expired": 0}
+
+    # -------------------- SESSIONS --------------------
+
+    def _meta_path(self, upload_id):
+        return os.path.join(self.dir, f"{upload_id}.upload.json")
+
+    def _save_meta(self, session):
+        tmp = self._meta_path(session.id) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(session.meta(), f)
+        os.replace(tmp, self._meta_path(session.id))
+
+    def unique_path(self, filename):
+        """videos/uploads/<uuid><ext>, validating the extension. Returns (id, path)."""
+        ext = os.path.splitext(os.path.basename(filename or ""))[1].lower()
+        if ext not in self.config["extensions"]:
+            raise UploadError(415, f"Unsupported video type '{ext or filename}'")
+        upload_id = uuid.uuid4().hex
+        return upload_id, os.path.join(self.dir, upload_id + ext)
+
+    def create(self, filename, size, stream_id=None):
+        if size <= 0:
+            raise UploadError(400, "Upload size must be positive")
+        if size > self.config["max_bytes"]:
+            raise UploadError(413, f"Upload of {size} bytes exceeds the {self.config['max_bytes']} byte limit")
+        self.cleanup_stale()
+        upload_id, path = self.unique_path(filename)
+        session = UploadSession(upload_id, os.path.basename(filename), path, size, stream_id)
+        open(path, "wb").close()
+        self._save_meta(session)
+        self._sessions[upload_id] = session
+        self.metrics["created"] += 1
+        return session
+
+    def _load(self, upload_id):
+        """Session from its metadata file, without caching it; None if unknown."""
+        if not upload_id.isalnum():
+            return None
+        try:
+            with open(self._meta_path(upload_id)) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        session = UploadSession(meta["id"], meta["filename"], meta["path"], meta["size"],
+                                meta["stream_id"], meta["created"])
+        session.complete = meta["complete"]
+        return session
+
+    def get(self, upload_id):
+        """
+        The session; incomplete ones are reloaded from disk after a restart and
+        kept in memory while they receive data. Raises UploadError(404) if unknown.
+        """
+        session = self._sessions.get(upload_id)
+        if session is not None:
+            return session
+        session = self._load(upload_id)
+        if session is None:
+            raise UploadError(404, "Unknown upload")
+        if not session.complete:
+            self._sessions[upload_id] = session
+            self.metrics["resumed"] += 1
+        return session
+
+    def delete(self, upload_id):
+        session = self.get(upload_id)
+        self._sessions.pop(upload_id, None)
+        for path in (session.path, self._meta_path(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def cleanup_stale(self, now=None):
+        """Deletes incomplete uploads that have not received data for session_ttl_s."""
+        now = time.time() if now is None else now
+        for name in os.listdir(self.dir):
+            if not name.endswith(".upload.json"):
+                continue
+            upload_id = name[:-len(".upload.json")]
+            session = self._sessions.get(upload_id) or self._load(upload_id)
+            if session is None or session.complete:
+                continue
+            touched = os.path.getmtime(session.path) if os.path.exists(session.path) else session.created
+            if now - touched > self.config["session_ttl_s"]:
+                self.delete(upload_id)
+                self.metrics["expired"] += 1
+
+    # -------------------- DATA --------------------
+
+    async def append(self, upload_id, offset, chunks):
+        """
+        Writes an async iterator of byte chunks at `offset`, which must equal
+        the bytes already received. Returns the session.
+        """
+        session = self.get(upload_id)
+        if session.lock.locked():
+            raise UploadError(409, "Another request is writing to this upload", session.offset)
+        async with session.lock:
+            if session.complete:
+                raise UploadError(409, "Upload already complete", session.offset)
+            if offset != session.offset:
+                raise UploadError(409, f"Offset mismatch: server has {session.offset} bytes", session.offset)
+
+            loop = asyncio.get_running_loop()
+            f = await loop.run_in_executor(None, open, session.path, "ab")
+            block, buffered, written = [], 0, offset
+            try:
+                async for chunk in chunks:
+                    if written + buffered + len(chunk) > session.size:
+                        raise UploadError(413, "More data than the declared upload size", written + buffered)
+                    block.append(chunk)
+                    buffered += len(chunk)
+                    if buffered >= self.config["write_block"]:
+                        await loop.run_in_executor(None, self._write, f, block)
+                        written += buffered
+                        block, buffered = [], 0
+            finally:
+                # Whatever arrived is kept, so the client can resume right after it
+                if block:
+                    await loop.run_in_executor(None, self._write, f, block)
+                    written += buffered
+                await loop.run_in_executor(None, f.close)
+                self.metrics["bytes_received"] += written - offset
+
+            if written == session.size:
+                session.complete = True
+                await loop.run_in_executor(None, self._save_meta, session)
+                self._sessions.pop(session.id, None)   # status is served from disk from now on
+                self.metrics["completed"] += 1
+        return session
+
+    @staticmethod
+    def _write(f, block):
+        f.write(b"".join(block))
+        f.flush()
+
+    async def should_start_stream(self, session):
+        """True once the session's stream can start: on completion, or on a prefix that already decodes."""
+        if not session.stream_id or session.streaming:
+            return False
+        if session.complete:
+            return True
+        offset = session.offset
+        if offset < self.config["progressive_min_bytes"] or offset - session.last_probe < self.config["probe_every_bytes"]:
+            return False
+        session.last_probe = offset
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, probe_video, session.path)
+
+    async def save_file(self, upload):
+        """Streams a multipart UploadFile to a unique path under the size limit. Returns the path."""
+        _, path = self.unique_path(upload.filename)
+        loop = asyncio.get_running_loop()
+        f = await loop.run_in_executor(None, open, path, "wb")
+        total = 0
+        try:
+            while True:
+                data = await upload.read(self.config["write_block"])
+                if not data:
+                    break
+                total += len(data)
+                if total > self.config["max_bytes"]:
+                    raise UploadError(413, f"Upload exceeds the {self.config['max_bytes']} byte limit")
+                await loop.run_in_executor(None, f.write, data)
+        except BaseException:
+            await loop.run_in_executor(None, f.close)
+            os.remove(path)
+            raise
+        await loop.run_in_executor(None, f.close)
+        self.metrics["bytes_received"] += total
+        return path
+
+    def stats(self):
+        return dict(self.metrics, active=sum(1 for s in self._sessions.values() if not s.complete))
+
+
+upload_manager = UploadManager()
@@ -0,0 +1,111 @@
+import asyncio
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2 as cv
+import numpy as np
+
+from backend import metrics
+
+# Webcam inference runs here, never on the event loop. One worker keeps
+# _process_frame calls on the shared webcam pipeline strictly sequential.
+INFERENCE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ws-inference")
+
+# Open sessions by id, for the stats endpoint
+active_sessions = {}
+_session_ids = itertools.count(1)
+
+
+class WebcamSession:
+    """
+    One /ws_stream connection with latest-frame semantics.
+
+    A receive task keeps overwriting a single slot with the newest frame the
+    browser sent, while the process loop hands that frame to the inference
+    executor. Frames that arrive while inference is busy replace each other,
+    so stale frames are dropped instead of queueing up latency.
+    """
+
+    def __init__(self, websocket, pipeline, executor=INFERENCE_EXECUTOR):
+        self.id = next(_session_ids)
+        self.websocket = websocket
+        self.pipeline = pipeline
+        self.executor = executor
+        self._latest = None
+        self._has_frame = asyncio.Event()
+        self.connected_at = time.time()
+        self.stats = {
+            "frames_received": 0,
+            "frames_processed": 0,
+            "frames_dropped": 0,
+            "frames_invalid": 0,
+            "last_latency_ms": 0.0,
+            "avg_latency_ms": 0.0,
+            "last_inference_ms": 0.0,
+        }
+
+    def snapshot(self):
+        return dict(self.stats, id=self.id, stream=self.pipeline.name,
+                    connected_for_s=round(time.time() - self.connected_at, 1))
+
+    async def run(self):
+        active_sessions[self.id] = self
+        receiver = asyncio.create_task(self._receive_loop())
+        try:
+            await self._process_loop(receiver)
+        finally:
+            receiver.cancel()
+            active_sessions.pop(self.id, None)
+
+    async def _receive_loop(self):
+        while True:
+            data = await self.websocket.receive_bytes()
+            self.stats["frames_received"] += 1
+            metrics.WS_FRAMES.inc(result="received")
+            if self._latest is not None:
+                self.stats["frames_dropped"] += 1  # superseded before inference picked it up
+                metrics.WS_FRAMES.inc(result="dropped")
+            self._latest = (data, time.time())
+            self._has_frame.set()
+
+    async def _process_loop(self, receiver):
+        loop = asyncio.get_running_loop()
+        while True:
+            waiter = asyncio.create_task(self._has_frame.wait())
+            done, _ = await asyncio.wait({waiter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                waiter.cancel()
+                receiver.result()  # re-raises the disconnect / receive error
+                return
+
+            self._has_frame.clear()
+            data, received_at = self._latest
+            self._latest = None
+
+            started = time.time()
+            encoded = await loop.run_in_executor(self.executor, self._infer, data)
+            if encoded is None:
+                self.stats["frames_invalid"] += 1
+                metrics.WS_FRAMES.inc(result="invalid")
+                print("[WARN] Received empty/invalid frame")
+                continue
+            await self.websocket.send_bytes(encoded)
+
+            latency = (time.time() - received_at) * 1000
+            metrics.WS_FRAMES.inc(result="processed")
+            metrics.WS_LATENCY.observe(latency / 1000)
+            n = self.stats["frames_processed"] = self.stats["frames_processed"] + 1
+            self.stats["last_inference_ms"] = round((time.time() - started) * 1000, 2)
+            self.stats["last_latency_ms"] = round(latency, 2)
+            self.stats["avg_latency_ms"] = round(self.stats["avg_latency_ms"] + (latency - self.stats["avg_latency_ms"]) / n, 2)
+
+    def _infer(self, data):
+        """Decode -> process -> encode, on the inference executor."""
+        frame = cv.imdecode(np.frombuffer(data, np.uint8), cv.IMREAD_COLOR)
+        if frame is None:
+            return None
+        processed_frame = self.pipeline._process_frame(frame)
+        with self.pipeline.timer.stage("encode"):
+            _, buffer = cv.imencode('.jpg', processed_frame)
+        return buffer.tobytes()
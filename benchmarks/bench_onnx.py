@@ -0,0 +1,179 @@
+"""
+Accuracy parity and CPU throughput: eager PyTorch models vs their ONNX Runtime
+exports (fp32 and any INT8 variants found in model/onnx).
+
+    python -m benchmarks.bench_onnx --source videos/uploads/site.mp4 --out onnx.json
+
+Detection parity matches every ONNX box to an eager box of the same class at
+IoU >= 0.5 and reports recall/precision against the eager model; ReID parity
+compares embeddings of the same person crops (cosine) and whether each
+crop's nearest neighbour stays the same. Throughput is single-frame detector
+latency and batched ReID crops per second.
+"""
+import argparse
+import json
+import os
+import platform
+import time
+
+import numpy as np
+
+from backend.association import iou_matrix
+from backend.export_onnx import load_images
+from backend.models import INFERENCE_CONFIG, MODEL_PATH
+from backend.onnx_backend import OnnxYOLO, OnnxReID, onnx_model_path
+
+BENCH_ONNX_CONFIG = {
+    "frames": 100,
+    "match_iou": 0.5,
+    "reid_batch": 16,
+    "max_crops": 256,
+    # ReID crops are the boxes PPEPipeline would embed: class 6, conf >= 0.5
+    "person_class": 6,
+    "person_conf": 0.5,
+}
+
+
+def _boxes(result):
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4)), np.zeros(0, dtype=int), np.zeros(0)
+    return boxes.xyxy.cpu().numpy(), boxes.cls.cpu().numpy().astype(int), boxes.conf.cpu().numpy()
+
+
+def detection_parity(reference, candidate, match_iou):
+    """Greedy same-class matching of candidate boxes to reference boxes, per frame."""
+    matched = ref_total = cand_total = 0
+    ious, conf_diffs = [], []
+    for ref, cand in zip(reference, candidate):
+        rb, rc, rconf = _boxes(ref)
+        cb, cc, cconf = _boxes(cand)
+        ref_total += len(rb)
+        cand_total += len(cb)
+        iou = iou_matrix(rb, cb)
+        iou[rc[:, None] != cc[None, :]] = 0
+        while iou.size and iou.max() >= match_iou:
+            i, j = np.unravel_index(iou.argmax(), iou.shape)
+            matched += 1
+            ious.append(float(iou[i, j]))
+            conf_diffs.append(abs(float(rconf[i] - cconf[j])))
+            iou[i, :] = 0
+            iou[:, j] = 0
+    return {
+        "reference_boxes": ref_total,
+        "candidate_boxes": cand_total,
+        "recall": round(matched / ref_total, 4) if ref_total else None,
+        "precision": round(matched / cand_total, 4) if cand_total else None,
+        "mean_iou": round(float(np.mean(ious)), 4) if ious else None,
+        "mean_conf_diff": round(float(np.mean(conf_diffs)), 4) if conf_diffs else None,
+    }
+
+
+def reid_parity(reference, candidate):
+    """Cosine between paired embeddings plus nearest-neighbour agreement within the crop set."""
+    cos = np.sum(reference * candidate, axis=1)
+    out = {"crops": len(cos), "mean_cosine": round(float(cos.mean()), 5), "min_cosine": round(float(cos.min()), 5)}
+    if len(cos) > 1:
+        def nearest(e):
+            sim = e @ e.T
+            np.fill_diagonal(sim, -np.inf)
+            return sim.argmax(axis=1)
+        out["nn_agreement"] = round(float(np.mean(nearest(reference) == nearest(candidate))), 4)
+    return out
+
+
+def time_detector(model, frames, conf=INFERENCE_CONFIG["detect_conf"]):
+    model.predict(frames[0], conf=conf, verbose=False)  # warm-up
+    start = time.perf_counter()
+    results = [model.predict(f, conf=conf, verbose=False)[0] for f in frames]
+    elapsed = time.perf_counter() - start
+    return results, {"ms_per_frame": round(1000 * elapsed / len(frames), 3), "fps": round(len(frames) / elapsed, 2)}
+
+
+def time_reid(reid, crops):
+    by_id = dict(enumerate(crops))
+    reid.embed(dict(list(by_id.items())[:reid.max_batch_size]))  # warm-up
+    start = time.perf_counter()
+    embs = reid.embed(by_id)
+    elapsed = time.perf_counter() - start
+    return np.stack([embs[i] for i in range(len(crops))]), {
+        "crops_per_s": round(len(crops) / elapsed, 2), "ms_per_crop": round(1000 * elapsed / len(crops), 3),
+    }
+
+
+def person_crops(frames, results, limit):
+    crops = []
+    for frame, result in zip(frames, results):
+        boxes, classes, confs = _boxes(result)
+        for (x1, y1, x2, y2), cls_id, conf in zip(boxes.astype(int), classes, confs):
+            if cls_id == BENCH_ONNX_CONFIG["person_class"] and conf >= BENCH_ONNX_CONFIG["person_conf"]:
+                crop = frame[max(0, y1):y2, max(0, x1):x2]
+                if crop.size:
+                    crops.append(crop)
+    return crops[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX Runtime vs eager PyTorch parity and throughput")
+    parser.add_argument("--source", required=True, help="video or image folder")
+    parser.add_argument("--frames", type=int, default=BENCH_ONNX_CONFIG["frames"])
+    parser.add_argument("--intra-op-threads", type=int, default=0)
+    parser.add_argument("--inter-op-threads", type=int, default=1)
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args()
+
+    import torch
+    from ultralytics import YOLO
+    from reid_manger import embedding_model
+    from backend.reid_batch import BatchedReID
+
+    frames = load_images(args.source, args.frames)
+    if not frames:
+        raise SystemExit(f"[ERROR] No frames read from {args.source}")
+    threads = (args.intra_op_threads, args.inter_op_threads)
+
+    eager_yolo = YOLO(MODEL_PATH)
+    eager_results, eager_det = time_detector(eager_yolo, frames)
+    crops = person_crops(frames, eager_results, BENCH_ONNX_CONFIG["max_crops"])
+    reid_model, _ = embedding_model()
+    eager_reid = BatchedReID(reid_model.cpu().eval(), "cpu", BENCH_ONNX_CONFIG["reid_batch"])
+    eager_embs, eager_reid_speed = time_reid(eager_reid, crops) if crops else (None, None)
+
+    report = {
+        "meta": {
+            "source": os.path.basename(args.source),
+            "frames": len(frames),
+            "crops": len(crops),
+            "torch_threads": torch.get_num_threads(),
+            "ort_threads": {"intra_op": threads[0], "inter_op": threads[1]},
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "torch": {"detector": eager_det, "reid": eager_reid_speed},
+    }
+
+    for variant in (None, "dynamic", "static"):
+        label = f"onnx-{variant or 'fp32'}"
+        yolo_path, reid_path = onnx_model_path("yolo", variant), onnx_model_path("osnet", variant)
+        entry = {}
+        if os.path.exists(yolo_path):
+            onnx_results, speed = time_detector(OnnxYOLO(yolo_path, *threads), frames)
+            entry["detector"] = dict(speed, speedup=round(eager_det["ms_per_frame"] / speed["ms_per_frame"], 2),
+                                     parity=detection_parity(eager_results, onnx_results, BENCH_ONNX_CONFIG["match_iou"]))
+        if crops and os.path.exists(reid_path):
+            onnx_embs, speed = time_reid(OnnxReID(reid_path, BENCH_ONNX_CONFIG["reid_batch"], *threads), crops)
+            entry["reid"] = dict(speed, speedup=round(speed["crops_per_s"] / eager_reid_speed["crops_per_s"], 2),
+                                 parity=reid_parity(eager_embs, onnx_embs))
+        if entry:
+            report[label] = entry
+            print(f"[INFO] {label}: {json.dumps(entry)}")
+
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Per-stage micro-benchmark for PPEPipeline._process_frame.
+
+Drives the real pipeline code (parsing, association, face gate, gallery
+search, violation logic, drawing, JPEG encode) with synthetic frames and stub
+models, so it runs on a CPU-only box with no Postgres and no model weights.
+Model stages (detect, face_embed, reid) measure the stubs plus the pipeline's
+own glue around them, not real inference.
+
+    python -m benchmarks.bench_pipeline --out bench.json
+    python -m benchmarks.bench_pipeline --out new.json --compare bench.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+import cv2 as cv
+import numpy as np
+
+from backend.association import PPEAssociator
+from backend.evidence import EvidenceStore
+from backend.gallery import EmbeddingGallery
+from backend.motion import MotionGate
+from backend.pipeline_service import PPEPipeline
+
+BENCH_CONFIG = {
+    "crowds": [1, 5, 20, 50],
+    "galleries": [0, 1000, 10000],
+    "ppe_per_person": 3,
+    "frames": 200,
+    "warmup": 30,
+    "churn": 0.02,            # fraction of tracks replaced by a new person each frame
+    "face_hit_rate": 0.5,     # fraction of people whose face the stub detector finds
+    "frame_size": (720, 1280),
+    "face_dim": 128,
+    "appearance_dim": 512,
+    "seed": 0,
+    "motion_gate": False,     # measure every frame through the detector path
+}
+
+# Same layout the pipeline expects: person is class 6
+CLASS_NAMES = {0: "boots", 1: "gloves", 2: "helmet", 3: "mask", 4: "vest", 5: "goggles", 6: "person"}
+PERSON_CLASS = 6
+# (class id, box relative to the person box as fractions x1, y1, x2, y2)
+PPE_LAYOUT = [
+    (2, (0.25, 0.0, 0.75, 0.15)),   # helmet
+    (4, (0.1, 0.25, 0.9, 0.6)),     # vest
+    (1, (0.0, 0.5, 0.25, 0.65)),    # gloves
+    (0, (0.15, 0.88, 0.85, 1.0)),   # boots
+    (3, (0.35, 0.1, 0.65, 0.2)),    # mask
+]
+
+
+# -------------------- STUBS --------------------
+
+class _Tensor:
+    """Just enough of a torch tensor for the pipeline's box parsing."""
+
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+
+class _Box:
+    def __init__(self, cls_id, tid, coords, conf):
+        self.cls = [cls_id]
+        self.id = None if tid is None else [tid]
+        self.xyxy = [_Tensor(np.asarray(coords, dtype=np.float32))]
+        self.conf = [conf]
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+def _unit(rng, dim):
+    v = rng.standard_normal(dim).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+class Scene:
+    """Synthetic crowd: N people walking on a grid, each wearing some PPE."""
+
+    def __init__(self, crowd, ppe_per_person, churn, frame_size, seed):
+        self.rng = np.random.default_rng(seed)
+        self.h, self.w = frame_size
+        self.ppe_per_person = ppe_per_person
+        self.churn = churn
+        # Noise background so the face sharpness gate sees real texture
+        self.background = self.rng.integers(0, 255, (self.h, self.w, 3), dtype=np.uint8)
+        self.next_tid = 1
+        self.people = []
+        cols = max(1, int(np.ceil(np.sqrt(crowd * self.w / self.h))))
+        for i in range(crowd):
+            row, col = divmod(i, cols)
+            self.people.append({
+                "tid": self._new_tid(),
+                "x": (col + 0.5) * self.w / cols,
+                "y": (row + 0.5) * self.h / max(1, int(np.ceil(crowd / cols))),
+                "missing": i % 3 == 0,  # every third person is missing their vest
+            })
+        bw = self.w / cols
+        self.box_w = int(min(120, bw * 0.8))
+        self.box_h = int(self.box_w * 2.4)
+
+    def _new_tid(self):
+        tid = self.next_tid
+        self.next_tid += 1
+        return tid
+
+    def step(self):
+        """Advances one frame; returns (frame, detections)."""
+        for person in self.people:
+            if self.rng.random() < self.churn:
+                person["tid"] = self._new_tid()
+            person["x"] = float(np.clip(person["x"] + self.rng.normal(0, 2), 0, self.w))
+            person["y"] = float(np.clip(person["y"] + self.rng.normal(0, 1), 0, self.h))
+
+        boxes = []
+        for person in self.people:
+            x1 = int(person["x"] - self.box_w / 2)
+            y1 = int(person["y"] - self.box_h / 2)
+            x2, y2 = x1 + self.box_w, y1 + self.box_h
+            boxes.append(_Box(PERSON_CLASS, person["tid"], (x1, y1, x2, y2), 0.9))
+            for cls_id, (fx1, fy1, fx2, fy2) in PPE_LAYOUT[:self.ppe_per_person]:
+                if person["missing"] and CLASS_NAMES[cls_id] == "vest":
+                    continue
+                boxes.append(_Box(cls_id, None, (
+                    x1 + int(fx1 * self.box_w), y1 + int(fy1 * self.box_h),
+                    x1 + int(fx2 * self.box_w), y1 + int(fy2 * self.box_h),
+                ), 0.8))
+        return self.background.copy(), _Result(boxes)
+
+
+class StubDetector:
+    """Stands in for YOLO.predict; returns whatever the scene produced this frame."""
+
+    def __init__(self):
+        self.pending = None
+
+    def predict(self, frame, conf=None, verbose=False):
+        return [self.pending]
+
+
+class PassthroughTracker:
+    """Scene detections already carry stable track ids."""
+
+    def update(self, result, frame):
+        return result
+
+    def reset(self):
+        pass
+
+
+class StubFaceStage:
+    """Finds a face for a fixed fraction of track ids and returns a random embedding per track."""
+
+    def __init__(self, dim, hit_rate):
+        self.dim = dim
+        self.hit_rate = hit_rate
+
+    def process(self, frame, person_boxes):
+        out = {}
+        for tid, (x1, y1, x2, y2) in person_boxes.items():
+            if (tid * 0.6180339887) % 1.0 >= self.hit_rate:
+                continue
+            face = frame[max(0, y1):y1 + (y2 - y1) // 4, max(0, x1):x2]
+            if face.size:
+                cv.resize(face, (160, 160))  # the real stage's preprocessing cost
+            out[tid] = _unit(np.random.default_rng(tid), self.dim)
+        return out
+
+
+class StubReID:
+    """Resizes crops like BatchedReID and returns a random normalized embedding per track."""
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    def embed(self, crops_by_tid):
+        out = {}
+        for tid, crop in crops_by_tid.items():
+            if crop is None or crop.size == 0:
+                continue
+            cv.resize(crop, (128, 256))
+            out[tid] = _unit(np.random.default_rng(10_000_000 + tid), self.dim)
+        return out
+
+
+class StubModels:
+    """Same attributes PPEPipeline reads from backend.models.SharedModels."""
+
+    def __init__(self, config):
+        self.yolo = StubDetector()
+        self.class_names = CLASS_NAMES
+        self.detect_conf = 0.1
+        self.associator = PPEAssociator(CLASS_NAMES)
+        self.device = "cpu"
+        self.reid = StubReID(config["appearance_dim"])
+        self.face_model_name = "Facenet"
+        self.face_stage = StubFaceStage(config["face_dim"], config["face_hit_rate"])
+        self.gallery = EmbeddingGallery()
+        self.yolo_lock = threading.Lock()
+        self.reid_lock = threading.Lock()
+        self.face_lock = threading.Lock()
+
+
+class InMemoryWriter:
+    """In-memory stand-in for the write-behind queue (no Postgres)."""
+
+    def __init__(self):
+        self.workers = {}
+        self.violations = []
+
+    def add_listener(self, callback):
+        pass
+
+    def remove_listener(self, callback):
+        pass
+
+    def register_worker(self, embedding, display_name):
+        worker_id = str(uuid.uuid4())
+        self.workers[worker_id] = display_name
+        return worker_id
+
+    def log_violation(self, worker_uuid, equipped, violated, evidence_path, stream=None):
+        self.violations.append((worker_uuid, equipped, violated, evidence_path))
+        return True
+
+
+# -------------------- RUNNER --------------------
+
+def fill_gallery(gallery, size, config, rng):
+    for _ in range(size):
+        gallery.add(str(uuid.uuid4()),
+                    face=_unit(rng, config["face_dim"]),
+                    appearance=_unit(rng, config["appearance_dim"]))
+
+
+def run_case(crowd, gallery_size, config, evidence):
+    rng = np.random.default_rng(config["seed"])
+    models = StubModels(config)
+    fill_gallery(models.gallery, gallery_size, config, rng)
+    writer = InMemoryWriter()
+    pipeline = PPEPipeline(models=models, name=f"bench-{crowd}-{gallery_size}",
+                           db_writer=writer, tracker=PassthroughTracker(), evidence=evidence,
+                           motion=MotionGate({"enabled": config["motion_gate"]}))
+    scene = Scene(crowd, config["ppe_per_person"], config["churn"], config["frame_size"], config["seed"])
+
+    frame_times = []
+    for i in range(config["warmup"] + config["frames"]):
+        if i == config["warmup"]:
+            pipeline.timer.reset()
+        frame, result = scene.step()
+        models.yolo.pending = result
+        start = time.perf_counter()
+        processed = pipeline._process_frame(frame)
+        with pipeline.timer.stage("encode"):
+            cv.imencode('.jpg', processed, [int(cv.IMWRITE_JPEG_QUALITY), 70])
+        if i >= config["warmup"]:
+            frame_times.append(time.perf_counter() - start)
+    pipeline.close()
+
+    frames = config["frames"]
+    frame_ms = np.asarray(frame_times) * 1000.0
+    stages = {}
+    for name, s in sorted(pipeline.timer.snapshot().items()):
+        stages[name] = {
+            "per_frame_ms": round(s["total_ms"] / frames, 4),
+            "calls_per_frame": round(s["count"] / frames, 3),
+            "mean_ms": s["mean_ms"],
+            "p95_ms": s["p95_ms"],
+        }
+    return {
+        "crowd": crowd,
+        "gallery": gallery_size,
+        "ppe_per_person": config["ppe_per_person"],
+        "frames": frames,
+        "frame_ms": {
+            "mean": round(float(frame_ms.mean()), 4),
+            "p50": round(float(np.percentile(frame_ms, 50)), 4),
+            "p95": round(float(np.percentile(frame_ms, 95)), 4),
+        },
+        "fps": round(1000.0 / float(frame_ms.mean()), 2),
+        "registered": len(writer.workers),
+        "violations": len(writer.violations),
+        "stages": stages,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def print_table(report):
+    stage_names = sorted({name for run in report["runs"] for name in run["stages"]})
+    header = f"{'crowd':>5} {'gallery':>7} {'frame_ms':>9} {'fps':>7}  " + " ".join(f"{n[:10]:>10}" for n in stage_names)
+    print(header)
+    for run in report["runs"]:
+        cells = " ".join(
+            f"{run['stages'][n]['per_frame_ms']:>10.3f}" if n in run["stages"] else f"{'-':>10}"
+            for n in stage_names
+        )
+        print(f"{run['crowd']:>5} {run['gallery']:>7} {run['frame_ms']['mean']:>9.3f} {run['fps']:>7.1f}  {cells}")
+
+
+def compare(report, baseline):
+    """Prints per-stage per-frame time changes against a previous report."""
+    old_runs = {(r["crowd"], r["gallery"]): r for r in baseline["runs"]}
+    print(f"\nCompared with {baseline['meta'].get('git_revision')} (per-frame ms, new vs old):")
+    for run in report["runs"]:
+        old = old_runs.get((run["crowd"], run["gallery"]))
+        if old is None:
+            continue
+        rows = [("frame", run["frame_ms"]["mean"], old["frame_ms"]["mean"])]
+        rows += [(name, s["per_frame_ms"], old["stages"].get(name, {}).get("per_frame_ms"))
+                 for name, s in run["stages"].items()]
+        print(f"  crowd={run['crowd']} gallery={run['gallery']}")
+        for name, new_ms, old_ms in rows:
+            if old_ms:
+                print(f"    {name:<15} {new_ms:>9.3f} {old_ms:>9.3f} {100.0 * (new_ms - old_ms) / old_ms:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage benchmark of the PPE frame pipeline")
+    parser.add_argument("--crowds", type=int, nargs="+", default=BENCH_CONFIG["crowds"])
+    parser.add_argument("--galleries", type=int, nargs="+", default=BENCH_CONFIG["galleries"])
+    parser.add_argument("--frames", type=int, default=BENCH_CONFIG["frames"])
+    parser.add_argument("--warmup", type=int, default=BENCH_CONFIG["warmup"])
+    parser.add_argument("--ppe-per-person", type=int, default=BENCH_CONFIG["ppe_per_person"])
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="previous JSON report to diff against")
+    args = parser.parse_args()
+
+    config = dict(BENCH_CONFIG, frames=args.frames, warmup=args.warmup, ppe_per_person=args.ppe_per_person)
+
+    # Keep evidence snapshots out of storage/
+    evidence = EvidenceStore({"root": tempfile.mkdtemp(prefix="ppe-bench-")})
+
+    runs = []
+    for crowd in args.crowds:
+        for gallery_size in args.galleries:
+            runs.append(run_case(crowd, gallery_size, config, evidence))
+            print(f"[INFO] crowd={crowd} gallery={gallery_size}: {runs[-1]['frame_ms']['mean']:.3f} ms/frame")
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv.__version__,
+            "machine": platform.machine(),
+            "config": {k: v for k, v in config.items() if k not in ("crowds", "galleries")},
+        },
+        "runs": runs,
+    }
+    print()
+    print_table(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[INFO] Report written to {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
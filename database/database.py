@@ -1,6 +1,13 @@
 import psycopg2
-from datetime import datetime
-import numpy as np
+from psycopg2 import pool
+from psycopg2.extras import execute_values
+from contextlib import contextmanager
+import functools
+import threading
+import time
+from database.embeddings import (
+    EMBEDDING_MODELS, encode_embedding, decode_embedding, decode_embeddings, copy_buffer,
+)
 # Replace with your actual pgAdmin credentials
 DB_CONFIG = {
     "dbname": "construction_ppe_violation",
@@ -10,14 +17,206 @@ DB_CONFIG = {
     "port": "5432"
 }
 
+# Connection pool shared by the pipeline and the API endpoints
+DB_POOL_CONFIG = {
+    "minconn": 1,
+    "maxconn": 10,
+    "acquire_timeout": 10,         # seconds to wait for a free connection
+    "health_check_interval": 30,   # ping connections idle for longer than this
+}
+
+# Called as hook(worker_id, embedding) after a worker row is committed (embedding: float32 array)
+WORKER_REGISTERED_HOOKS = []
+# Called as hook(count) after violation rows are committed
+VIOLATIONS_LOGGED_HOOKS = []
+# Called as hook(operation, seconds, failed) after every public DB call
+DB_CALL_HOOKS = []
+
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+_last_used = {}
+# Guarded by _pool_lock; in_use/idle are kept here rather than read off the pool
+_pool_counters = {"acquire_timeouts": 0, "discarded": 0, "in_use": 0, "idle": 0}
+_call_state = threading.local()
+
 def get_connection():
+    """Opens a dedicated (unpooled) connection. Callers must close it."""
     return psycopg2.connect(**DB_CONFIG)
 
+def get_pool():
+    global _pool, _pool_slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pool.ThreadedConnectionPool(
+                    DB_POOL_CONFIG["minconn"], DB_POOL_CONFIG["maxconn"], **DB_CONFIG
+                )
+                _pool_slots = threading.BoundedSemaphore(DB_POOL_CONFIG["maxconn"])
+                # The pool opens minconn connections up front
+                _pool_counters.update(in_use=0, idle=DB_POOL_CONFIG["minconn"])
+                print(f"[DB] Connection pool ready (max {DB_POOL_CONFIG['maxconn']})")
+    return _pool
+
+def close_pool():
+    """Closes every pooled connection. Safe to call more than once."""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _pool_slots = None
+            _last_used.clear()
+            _pool_counters.update(in_use=0, idle=0)
+
+def _count(db_pool=None, **deltas):
+    with _pool_lock:
+        if db_pool is not None and db_pool is not _pool:
+            return  # returned to a pool that close_pool() already reset
+        for key, delta in deltas.items():
+            _pool_counters[key] += delta
+
+def _getconn(db_pool):
+    conn = db_pool.getconn()
+    # getconn hands out an idle connection if there is one, else opens a new one
+    with _pool_lock:
+        _pool_counters["in_use"] += 1
+        if _pool_counters["idle"] > 0:
+            _pool_counters["idle"] -= 1
+    return conn
+
+def _putconn(db_pool, conn, close=False):
+    try:
+        db_pool.putconn(conn, close=close)
+    finally:
+        # putconn closes what it does not keep (anything beyond minconn idle)
+        _count(db_pool, in_use=-1, idle=0 if conn.closed else 1)
+
+def _is_healthy(conn):
+    if conn.closed:
+        return False
+    if time.time() - _last_used.get(id(conn), 0) < DB_POOL_CONFIG["health_check_interval"]:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrows a connection from the shared pool.
+
+    Connections that have been idle for a while are pinged first and replaced
+    if the server dropped them (after a DB restart every idle connection may
+    be stale, so up to maxconn + 1 are tried); a connection that fails mid-use
+    is discarded instead of being returned to the pool, so the next caller
+    reconnects.
+    """
+    db_pool = get_pool()
+    slots = _pool_slots
+    if not slots.acquire(timeout=DB_POOL_CONFIG["acquire_timeout"]):
+        _count(acquire_timeouts=1)
+        raise pool.PoolError("Timed out waiting for a database connection")
+
+    conn = None
+    broken = False
+    try:
+        for _ in range(DB_POOL_CONFIG["maxconn"] + 1):
+            conn = _getconn(db_pool)
+            if _is_healthy(conn):
+                break
+            _putconn(db_pool, conn, close=True)
+            _last_used.pop(id(conn), None)
+            _count(discarded=1)
+            conn = None
+        else:
+            raise psycopg2.OperationalError("No healthy database connection available")
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        if conn is not None:
+            broken = broken or conn.closed != 0
+            if not broken:
+                try:
+                    conn.rollback()  # leave no open transaction behind
+                except psycopg2.Error:
+                    broken = True
+            if broken:
+                _last_used.pop(id(conn), None)
+                _count(discarded=1)
+            else:
+                _last_used[id(conn)] = time.time()
+            _putconn(db_pool, conn, close=broken)
+        slots.release()
+
+def pool_stats():
+    """Connection counts for /metrics: open, in use, idle, limits and failures."""
+    with _pool_lock:
+        stats = dict(_pool_counters, max=DB_POOL_CONFIG["maxconn"])
+    return dict(stats, open=stats["in_use"] + stats["idle"])
+
+def _mark_failed():
+    """Flags the current call as failed when the function handles the error itself."""
+    _call_state.failed = True
+
+def _instrumented(fn):
+    """Times the call and reports it (and whether it failed) to DB_CALL_HOOKS."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        outer = getattr(_call_state, "failed", None)
+        _call_state.failed = False
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = _call_state.failed
+            return result
+        finally:
+            _call_state.failed = outer
+            elapsed = time.perf_counter() - start
+            for hook in list(DB_CALL_HOOKS):
+                try:
+                    hook(fn.__name__, elapsed, failed)
+                except Exception as e:
+                    print(f"[DB ERROR] Call hook failed: {e}")
+    return wrapper
+
+@_instrumented
+def health_check():
+    """Round-trips a trivial query through the pool. Returns True if the DB is reachable."""
+    try:
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                return cur.fetchone()[0] == 1
+    except Exception as e:
+        print(f"[DB ERROR] Health check failed: {e}")
+        _mark_failed()
+        return False
+
+def _notify_worker_registered(worker_id, embedding):
+    for hook in list(WORKER_REGISTERED_HOOKS):
+        try:
+            hook(worker_id, embedding)
+        except Exception as e:
+            print(f"[DB ERROR] Worker registration hook failed: {e}")
+
+def _notify_violations_logged(count):
+    for hook in list(VIOLATIONS_LOGGED_HOOKS):
+        try:
+            hook(count)
+        except Exception as e:
+            print(f"[DB ERROR] Violation hook failed: {e}")
+
+@_instrumented
 def log_violation(worker_uuid, equipped, violated, evidence_path):
     """Inserts a new violation record into the PostgreSQL table."""
-    conn = get_connection()
-    cur = conn.cursor()
-    
     query = """
     INSERT INTO violations (worker_id, equipped_items, violated_items, evidence_path)
     VALUES (%s, %s, %s, %s)
@@ -25,136 +224,293 @@ def log_violation(worker_uuid, equipped, violated, evidence_path):
     
     alert = f"Alert: Missing {violated}"
     
-    try:
-        cur.execute(query, (worker_uuid, equipped, violated, evidence_path))
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(query, (worker_uuid, equipped, violated, evidence_path))
+            conn.commit()
+            print(f"Successfully logged violation for {worker_uuid}")
+            _notify_violations_logged(1)
+        except Exception as e:
+            print(f"Database Error: {e}")
+            _mark_failed()
+            conn.rollback()
+        finally:
+            cur.close()
+
+@_instrumented
+def register_new_worker(embedding, display_name, model=None):
+    """Inserts a worker; the embedding is stored as tagged float32 bytea (model inferred from its size)."""
+    blob, model, dim = encode_embedding(embedding, model)
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO workers (embedding, embedding_model, embedding_dim, display_name)
+                VALUES (%s, %s, %s, %s) RETURNING id
+                """,
+                (psycopg2.Binary(blob), model, dim, display_name)
+            )
+            new_id = cur.fetchone()[0]
         conn.commit()
-        print(f"Successfully logged violation for {worker_uuid}")
-    except Exception as e:
-        print(f"Database Error: {e}")
-        conn.rollback()
-    finally:
-        cur.close()
-        conn.close()
-
-def register_new_worker(embedding, display_name):
-    conn = get_connection()
-    cur = conn.cursor()
-    # Convert numpy array to list if needed
-    if isinstance(embedding, list):
-        emb_list = embedding
-    else:
-        emb_list = embedding.tolist() 
-    
-    cur.execute(
-        "INSERT INTO workers (face_embedding, display_name) VALUES (%s, %s) RETURNING id",
-        (emb_list, display_name)
-    )
-    new_id = cur.fetchone()[0]
-    conn.commit()
-    cur.close()
-    conn.close()
+    _notify_worker_registered(str(new_id), decode_embedding(blob))
     return str(new_id)
 
+@_instrumented
+def log_violations_bulk(rows):
+    """
+    Inserts many violations in one multi-row INSERT.
+    rows: iterable of (worker_uuid, equipped, violated, evidence_path).
+    Returns (id, timestamp) of the new rows, in input order. Raises on failure.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            # A single-page VALUES insert returns its rows in VALUES order
+            written = execute_values(
+                cur,
+                "INSERT INTO violations (worker_id, equipped_items, violated_items, evidence_path) VALUES %s "
+                "RETURNING id, timestamp",
+                rows,
+                page_size=len(rows),
+                fetch=True
+            )
+        conn.commit()
+    _notify_violations_logged(len(rows))
+    return written
+
+@_instrumented
+def register_new_workers_bulk(workers):
+    """
+    Registers many workers: COPY into a staging table, then one INSERT ... SELECT.
+    workers: iterable of (embedding, display_name). Returns the new ids in input order.
+    """
+    rows = [encode_embedding(emb) + (name,) for emb, name in workers]
+    if not rows:
+        return []
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS worker_stage (
+                    ord INT, embedding BYTEA, embedding_model TEXT, embedding_dim SMALLINT, display_name TEXT
+                ) ON COMMIT DELETE ROWS
+            """)
+            cur.copy_expert(
+                "COPY worker_stage (ord, embedding, embedding_model, embedding_dim, display_name) FROM STDIN",
+                copy_buffer((i,) + row for i, row in enumerate(rows))
+            )
+            # ORDER BY ord keeps RETURNING aligned with the input
+            cur.execute("""
+                INSERT INTO workers (embedding, embedding_model, embedding_dim, display_name)
+                SELECT embedding, embedding_model, embedding_dim, display_name FROM worker_stage
+                ORDER BY ord
+                RETURNING id
+            """)
+            result = cur.fetchall()
+        conn.commit()
+    new_ids = [str(r[0]) for r in result]
+    for new_id, (blob, _, _, _) in zip(new_ids, rows):
+        _notify_worker_registered(new_id, decode_embedding(blob))
+    return new_ids
+
+@_instrumented
 def update_worker_id_in_violations(old_id, new_id):
     """Updates the worker_id in violations table from a temporary/unknown ID to a real UUID."""
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            "UPDATE violations SET worker_id = %s WHERE worker_id = %s",
-            (new_id, old_id)
-        )
-        conn.commit()
-        if cur.rowcount > 0:
-            print(f"[DB] Updated {cur.rowcount} violation records from {old_id} to {new_id}")
-    except Exception as e:
-        print(f"[DB ERROR] Failed to update violation IDs: {e}")
-        conn.rollback()
-    finally:
-        cur.close()
-        conn.close()
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "UPDATE violations SET worker_id = %s WHERE worker_id = %s",
+                (new_id, old_id)
+            )
+            conn.commit()
+            if cur.rowcount > 0:
+                print(f"[DB] Updated {cur.rowcount} violation records from {old_id} to {new_id}")
+        except Exception as e:
+            print(f"[DB ERROR] Failed to update violation IDs: {e}")
+            _mark_failed()
+            conn.rollback()
+        finally:
+            cur.close()
 
-# In your database.py script
+@_instrumented
 def find_matching_worker(new_embedding, threshold=0.4):
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    # 1. Fetch all known embeddings
-    cur.execute("SELECT id, face_embedding FROM workers")
-    rows = cur.fetchall()
-    
-    best_match = None
-    min_dist = threshold  # Any distance higher than 0.4 is considered a different person
-
-    for worker_id, db_embedding in rows:
-        # Convert DB list back to numpy array for math
-        db_emb = np.array(db_embedding)
-        
-        # 2. Calculate Distance (Euclidean)
-        dist = np.linalg.norm(new_embedding - db_emb)
-        
-        if dist < min_dist:
-            min_dist = dist
-            best_match = worker_id
-            
-    cur.close()
-    conn.close()
-    return best_match
+    """
+    Returns the id of the closest registered worker within `threshold`
+    (Euclidean distance), or None. Served by the worker index
+    (database/worker_index.py) instead of scanning the table.
+    """
+    from database.worker_index import get_worker_index
+
+    hits = get_worker_index().nearest(new_embedding, k=1)
+    if hits and hits[0][1] < threshold:
+        return hits[0][0]
+    return None
+
+@_instrumented
+def get_worker_embeddings_since(since=None):
+    """
+    Embeddings of workers created at or after `since` (all workers if None),
+    oldest first, as {model: (ids, N x dim float32 matrix, created_ats)}.
+    Used to sync in-memory galleries and indexes.
+    """
+    out = {}
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            for model, spec in EMBEDDING_MODELS.items():
+                query = """
+                    SELECT id, embedding, created_at FROM workers
+                    WHERE embedding_model = %s AND embedding IS NOT NULL
+                """
+                params = [model]
+                if since is not None:
+                    query += " AND created_at >= %s"
+                    params.append(since)
+                cur.execute(query + " ORDER BY created_at, id", params)
+                rows = cur.fetchall()
+                if rows:
+                    ids, blobs, created = zip(*rows)
+                    out[model] = ([str(i) for i in ids], decode_embeddings(blobs, spec["dim"]), list(created))
+    return out
 
+@_instrumented
+def get_violations_page(limit=50, cursor=None, worker_id=None, violated_item=None, since=None, until=None):
+    """
+    Keyset-paginated violations joined with worker details, newest first.
+
+    cursor: (timestamp, id) of the last row of the previous page.
+    since / until: epoch seconds bounding the violation timestamp.
+    violated_item: substring matched against violated_items (e.g. "helmet").
+    Pages are stable under concurrent inserts and cost the same at any depth
+    (served by an index on (timestamp DESC, id DESC)).
+    """
+    clauses, params = [], []
+    if since is not None:
+        clauses.append("v.timestamp >= to_timestamp(%s)")
+        params.append(since)
+    if until is not None:
+        clauses.append("v.timestamp < to_timestamp(%s)")
+        params.append(until)
+    if worker_id is not None:
+        clauses.append("v.worker_id = %s")
+        params.append(worker_id)
+    if violated_item:
+        clauses.append("v.violated_items ILIKE %s")
+        params.append(f"%{violated_item}%")
+    if cursor is not None:
+        clauses.append("(v.timestamp, v.id) < (%s, %s)")
+        params.extend(cursor)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT v.id, v.worker_id, v.equipped_items, v.violated_items, v.evidence_path, v.timestamp, w.display_name
+                FROM violations v
+                LEFT JOIN workers w ON v.worker_id = w.id
+                {where}
+                ORDER BY v.timestamp DESC, v.id DESC
+                LIMIT %s
+            """, (*params, limit))
+            rows = cur.fetchall()
+
+    return [{
+        "id": r[0],
+        "worker_id": r[1],
+        "equipped_items": r[2],
+        "violated_items": r[3],
+        "evidence_path": r[4],
+        "timestamp": r[5],
+        "worker_name": r[6]
+    } for r in rows]
+
+@_instrumented
+def get_table_state():
+    """
+    (max violation id, max worker id). Changes with every insert from any
+    process; two primary-key lookups, used to validate ETags and cached pages.
+    """
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT (SELECT max(id) FROM violations), (SELECT max(id) FROM workers)")
+            return cur.fetchone()
+
+@_instrumented
+def get_workers_page(limit=100, cursor=None):
+    """Keyset-paginated workers, newest first. cursor: (created_at, id) of the last row seen."""
+    clause, params = "", []
+    if cursor is not None:
+        clause = "WHERE (created_at, id) < (%s, %s)"
+        params.extend(cursor)
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT id, display_name, created_at FROM workers
+                {clause}
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s
+            """, (*params, limit))
+            rows = cur.fetchall()
+    return [{"id": str(r[0]), "display_name": r[1], "created_at": r[2]} for r in rows]
+
+@_instrumented
 def get_recent_violations(limit=50, from_timestamp=0):
     """Fetches the most recent violations joined with worker details."""
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        # PostgreSQL to_timestamp takes seconds
-        cur.execute("""
-            SELECT v.id, v.worker_id, v.equipped_items, v.violated_items, v.evidence_path, v.timestamp, w.display_name 
-            FROM violations v
-            LEFT JOIN workers w ON v.worker_id = w.id
-            WHERE v.timestamp >= to_timestamp(%s)
-            ORDER BY v.timestamp DESC
-            LIMIT %s
-        """, (from_timestamp, limit))
-        rows = cur.fetchall()
-        
-        violations = []
-        for r in rows:
-            violations.append({
-                "id": r[0],
-                "worker_id": r[1],
-                "equipped_items": r[2],
-                "violated_items": r[3],
-                "evidence_path": r[4],
-                "timestamp": r[5],
-                "worker_name": r[6]
-            })
-        return violations
-    except Exception as e:
-        print(f"[DB ERROR] get_recent_violations: {e}")
-        return []
-    finally:
-        cur.close()
-        conn.close()
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            # PostgreSQL to_timestamp takes seconds
+            cur.execute("""
+                SELECT v.id, v.worker_id, v.equipped_items, v.violated_items, v.evidence_path, v.timestamp, w.display_name 
+                FROM violations v
+                LEFT JOIN workers w ON v.worker_id = w.id
+                WHERE v.timestamp >= to_timestamp(%s)
+                ORDER BY v.timestamp DESC
+                LIMIT %s
+            """, (from_timestamp, limit))
+            rows = cur.fetchall()
+            
+            violations = []
+            for r in rows:
+                violations.append({
+                    "id": r[0],
+                    "worker_id": r[1],
+                    "equipped_items": r[2],
+                    "violated_items": r[3],
+                    "evidence_path": r[4],
+                    "timestamp": r[5],
+                    "worker_name": r[6]
+                })
+            return violations
+        except Exception as e:
+            print(f"[DB ERROR] get_recent_violations: {e}")
+            _mark_failed()
+            return []
+        finally:
+            cur.close()
 
+@_instrumented
 def get_all_workers():
     """Fetches all registered workers."""
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute("SELECT id, display_name, created_at FROM workers ORDER BY created_at DESC")
-        rows = cur.fetchall()
-        
-        workers = []
-        for r in rows:
-            workers.append({
-                "id": str(r[0]),
-                "display_name": r[1],
-                "created_at": r[2]
-            })
-        return workers
-    except Exception as e:
-        print(f"[DB ERROR] get_all_workers: {e}")
-        return []
-    finally:
-        cur.close()
-        conn.close()
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT id, display_name, created_at FROM workers ORDER BY created_at DESC")
+            rows = cur.fetchall()
+            
+            workers = []
+            for r in rows:
+                workers.append({
+                    "id": str(r[0]),
+                    "display_name": r[1],
+                    "created_at": r[2]
+                })
+            return workers
+        except Exception as e:
+            print(f"[DB ERROR] get_all_workers: {e}")
+            _mark_failed()
+            return []
+        finally:
+            cur.close()
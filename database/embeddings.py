@@ -0,0 +1,58 @@
+import io
+
+import numpy as np
+
+# Every stored vector is tagged with the model that produced it; the tag
+# decides which gallery it belongs to, so 128-d face and 512-d appearance
+# vectors are never compared with each other.
+EMBEDDING_MODELS = {
+    "facenet": {"dim": 128, "kind": "face"},
+    "osnet_x1_0": {"dim": 512, "kind": "appearance"},
+}
+MODEL_BY_DIM = {spec["dim"]: name for name, spec in EMBEDDING_MODELS.items()}
+
+# Little-endian float32, whatever the host byte order
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+
+def embedding_model(dim, model=None):
+    """Validates or infers the model tag for a vector of `dim` dimensions."""
+    if model is None:
+        model = MODEL_BY_DIM.get(dim)
+        if model is None:
+            raise ValueError(f"No embedding model registered for {dim}-d vectors")
+    elif EMBEDDING_MODELS[model]["dim"] != dim:
+        raise ValueError(f"{model} embeddings are {EMBEDDING_MODELS[model]['dim']}-d, got {dim}")
+    return model
+
+
+def encode_embedding(embedding, model=None):
+    """Returns (bytes, model, dim) for one vector."""
+    vector = np.asarray(embedding, dtype=EMBEDDING_DTYPE).reshape(-1)
+    return vector.tobytes(), embedding_model(vector.shape[0], model), vector.shape[0]
+
+
+def decode_embedding(blob):
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+
+def decode_embeddings(blobs, dim):
+    """N bytea values of the same model -> N x dim float32 matrix, one copy."""
+    if not blobs:
+        return np.empty((0, dim), dtype=np.float32)
+    return np.frombuffer(b"".join(blobs), dtype=EMBEDDING_DTYPE).reshape(-1, dim).astype(np.float32, copy=False)
+
+
+def _copy_text(value):
+    """One field in COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\\\x" + bytes(value).hex()
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def copy_buffer(rows):
+    """Rows of Python values as a file object for cursor.copy_expert(... FROM STDIN)."""
+    return io.StringIO("".join("\t".join(_copy_text(v) for v in row) + "\n" for row in rows))
@@ -0,0 +1,126 @@
+"""
+One-shot migration of workers.face_embedding (FLOAT8[]) to tagged float32 bytea.
+
+    python -m database.migrate_embeddings                # add the columns and backfill them
+    python -m database.migrate_embeddings --drop-legacy  # ...then drop face_embedding
+
+Adds embedding (little-endian float32 bytea), embedding_model and
+embedding_dim, converts every row that has a legacy array and no bytea yet,
+and writes the converted rows back through COPY and a single joined UPDATE.
+Everything runs in one transaction, and running it again only converts rows
+that are still missing. Arrays whose size matches no known model are left
+as they are and reported.
+"""
+import argparse
+
+from database.database import get_connection
+from database.embeddings import EMBEDDING_MODELS, encode_embedding, copy_buffer
+
+MIGRATION_CONFIG = {
+    "batch_size": 5000,   # rows per fetch / COPY round trip
+}
+
+
+def ensure_columns(cur):
+    cur.execute("""
+        ALTER TABLE workers
+            ADD COLUMN IF NOT EXISTS embedding BYTEA,
+            ADD COLUMN IF NOT EXISTS embedding_model TEXT,
+            ADD COLUMN IF NOT EXISTS embedding_dim SMALLINT
+    """)
+    cur.execute("SELECT 1 FROM pg_constraint WHERE conname = 'workers_embedding_size'")
+    if cur.fetchone() is None:
+        cur.execute("""
+            ALTER TABLE workers ADD CONSTRAINT workers_embedding_size
+            CHECK (embedding IS NULL OR octet_length(embedding) = 4 * embedding_dim)
+        """)
+    cur.execute("CREATE INDEX IF NOT EXISTS workers_model_created_idx ON workers (embedding_model, created_at, id)")
+
+
+def _has_legacy_column(cur):
+    cur.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'workers' AND column_name = 'face_embedding'
+    """)
+    return cur.fetchone() is not None
+
+
+def backfill(conn, batch_size):
+    """Converts legacy arrays to bytea. Returns (converted, skipped)."""
+    converted = skipped = 0
+    with conn.cursor(name="legacy_embeddings") as source, conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE embedding_stage (
+                id INT, embedding BYTEA, embedding_model TEXT, embedding_dim SMALLINT
+            ) ON COMMIT DROP
+        """)
+        source.itersize = batch_size
+        source.execute("""
+            SELECT id, face_embedding FROM workers
+            WHERE embedding IS NULL AND face_embedding IS NOT NULL
+        """)
+        while True:
+            rows = source.fetchmany(batch_size)
+            if not rows:
+                break
+            staged = []
+            for worker_id, legacy in rows:
+                try:
+                    staged.append((worker_id,) + encode_embedding(legacy))
+                except ValueError:
+                    skipped += 1
+                    print(f"[WARN] Worker {worker_id}: no embedding model is {len(legacy)}-d, left unconverted")
+            cur.copy_expert(
+                "COPY embedding_stage (id, embedding, embedding_model, embedding_dim) FROM STDIN",
+                copy_buffer(staged)
+            )
+            converted += len(staged)
+            print(f"[INFO] Staged {converted} embeddings")
+        cur.execute("""
+            UPDATE workers AS w
+            SET embedding = s.embedding, embedding_model = s.embedding_model, embedding_dim = s.embedding_dim
+            FROM embedding_stage AS s WHERE w.id = s.id
+        """)
+    return converted, skipped
+
+
+def migrate(drop_legacy=False, batch_size=None):
+    batch_size = batch_size or MIGRATION_CONFIG["batch_size"]
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            ensure_columns(cur)
+            legacy = _has_legacy_column(cur)
+        converted = skipped = 0
+        if legacy:
+            converted, skipped = backfill(conn, batch_size)
+            if drop_legacy:
+                if skipped:
+                    raise RuntimeError(f"{skipped} legacy embeddings could not be converted; not dropping face_embedding")
+                with conn.cursor() as cur:
+                    # A column-specific trigger from older pgvector setups depends on the column
+                    cur.execute("DROP TRIGGER IF EXISTS workers_embedding_vec_sync ON workers")
+                    cur.execute("ALTER TABLE workers DROP COLUMN face_embedding")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    print(f"[INFO] Embedding migration done: {converted} converted, {skipped} skipped"
+          + (", face_embedding dropped" if legacy and drop_legacy else ""))
+    return converted, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move worker embeddings to tagged float32 bytea")
+    parser.add_argument("--drop-legacy", action="store_true", help="drop workers.face_embedding afterwards")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_CONFIG["batch_size"])
+    args = parser.parse_args()
+    models = ", ".join(f"{name} ({spec['dim']}-d)" for name, spec in EMBEDDING_MODELS.items())
+    print(f"[INFO] Embedding models: {models}")
+    migrate(args.drop_legacy, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import threading
+import numpy as np
+from psycopg2.extras import execute_values
+
+from database.database import pooled_connection, get_worker_embeddings_since, WORKER_REGISTERED_HOOKS
+from database.embeddings import EMBEDDING_MODELS, decode_embedding
+
+# "auto" uses pgvector when the extension is installed, NumPy otherwise
+WORKER_INDEX_CONFIG = {
+    "backend": "auto",        # "auto" | "pgvector" | "numpy"
+    "hnsw_m": 16,
+    "hnsw_ef_construction": 64,
+    "dims": tuple(spec["dim"] for spec in EMBEDDING_MODELS.values()),   # FaceNet and OSNet sizes
+    "backfill_batch": 1000,
+}
+
+
+class NumpyWorkerIndex:
+    """
+    In-process nearest-neighbour index over worker embeddings.
+
+    Embeddings are grouped by dimension (one per embedding model; face and
+    appearance vectors share the workers table) into contiguous float32
+    matrices with cached squared norms, so a Euclidean top-k query is one
+    matrix-vector product. The table is read once, then kept in sync
+    incrementally by created_at and by the registration hook.
+    """
+
+    name = "numpy"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups = {}     # dim -> {"ids": [], "data": ndarray, "sq": ndarray}
+        self._known = set()
+        self._watermark = None
+
+    def __len__(self):
+        return len(self._known)
+
+    def _append(self, dim, ids, vectors):
+        group = self._groups.get(dim)
+        if group is None:
+            group = self._groups[dim] = {
+                "ids": [],
+                "data": np.empty((0, dim), dtype=np.float32),
+                "sq": np.empty(0, dtype=np.float32),
+            }
+        n = len(group["ids"])
+        if n + len(ids) > group["data"].shape[0]:
+            capacity = max(2 * group["data"].shape[0], n + len(ids), 256)
+            data = np.empty((capacity, dim), dtype=np.float32)
+            sq = np.empty(capacity, dtype=np.float32)
+            data[:n] = group["data"][:n]
+            sq[:n] = group["sq"][:n]
+            group["data"], group["sq"] = data, sq
+        group["data"][n:n + len(ids)] = vectors
+        group["sq"][n:n + len(ids)] = np.einsum("ij,ij->i", vectors, vectors)
+        group["ids"].extend(ids)
+
+    def add(self, worker_id, embedding):
+        worker_id = str(worker_id)
+        vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        with self._lock:
+            if worker_id in self._known:
+                return
+            self._known.add(worker_id)
+            self._append(vector.shape[1], [worker_id], vector)
+
+    def sync(self):
+        """Pulls workers created since the last sync. Returns the number added."""
+        by_model = get_worker_embeddings_since(self._watermark)
+        added = 0
+        with self._lock:
+            for ids, vectors, created in by_model.values():
+                stamps = [c for c in created if c is not None]
+                if stamps and (self._watermark is None or max(stamps) > self._watermark):
+                    self._watermark = max(stamps)
+                new = [i for i, worker_id in enumerate(ids) if worker_id not in self._known]
+                if not new:
+                    continue
+                self._known.update(ids[i] for i in new)
+                self._append(vectors.shape[1], [ids[i] for i in new], vectors[new])
+                added += len(new)
+        return added
+
+    def nearest(self, embedding, k=1):
+        """Returns up to k (worker_id, euclidean_distance) pairs, closest first."""
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        with self._lock:
+            group = self._groups.get(query.shape[0])
+            if group is None or not group["ids"]:
+                return []
+            n = len(group["ids"])
+            d2 = group["sq"][:n] - 2.0 * (group["data"][:n] @ query) + query @ query
+            k = min(k, n)
+            top = np.argpartition(d2, k - 1)[:k] if k < n else np.arange(n)
+            top = top[np.argsort(d2[top])]
+            return [(group["ids"][i], float(np.sqrt(max(d2[i], 0.0)))) for i in top]
+
+
+class PgVectorWorkerIndex:
+    """
+    Nearest-neighbour lookup served by Postgres through pgvector.
+
+    A vector column mirrors the float32 workers.embedding (backfilled on
+    sync, then kept current by the registration hook) and one partial HNSW
+    index per embedding dimension answers top-k queries without moving the
+    table.
+    """
+
+    name = "pgvector"
+
+    def __init__(self):
+        self._ready = False
+
+    def __len__(self):
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT count(*) FROM workers WHERE face_embedding_vec IS NOT NULL")
+                return cur.fetchone()[0]
+
+    @staticmethod
+    def available():
+        try:
+            with pooled_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'vector'")
+                    return cur.fetchone() is not None
+        except Exception as e:
+            print(f"[DB WARN] Could not check for pgvector: {e}")
+            return False
+
+    def ensure_schema(self):
+        cfg = WORKER_INDEX_CONFIG
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("ALTER TABLE workers ADD COLUMN IF NOT EXISTS face_embedding_vec vector")
+                # Older releases synced from the FLOAT8[] column with a trigger
+                cur.execute("DROP TRIGGER IF EXISTS workers_embedding_vec_sync ON workers")
+                cur.execute("DROP FUNCTION IF EXISTS workers_sync_embedding_vec()")
+                for dim in cfg["dims"]:
+                    cur.execute(f"""
+                        CREATE INDEX IF NOT EXISTS workers_face_vec_{dim}_hnsw ON workers
+                        USING hnsw ((face_embedding_vec::vector({dim})) vector_l2_ops)
+                        WITH (m = {int(cfg['hnsw_m'])}, ef_construction = {int(cfg['hnsw_ef_construction'])})
+                        WHERE vector_dims(face_embedding_vec) = {dim}
+                    """)
+            conn.commit()
+        self._ready = True
+
+    @staticmethod
+    def _literal(embedding):
+        return "[" + ",".join(repr(float(x)) for x in np.asarray(embedding).reshape(-1)) + "]"
+
+    def add(self, worker_id, embedding):
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("UPDATE workers SET face_embedding_vec = %s::vector WHERE id = %s",
+                            (self._literal(embedding), worker_id))
+            conn.commit()
+
+    def sync(self):
+        """Fills the vector column for rows that do not have it yet. Returns the number filled."""
+        if not self._ready:
+            self.ensure_schema()
+        filled = 0
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                while True:
+                    cur.execute("""
+                        SELECT id, embedding FROM workers
+                        WHERE face_embedding_vec IS NULL AND embedding IS NOT NULL
+                        LIMIT %s
+                    """, (WORKER_INDEX_CONFIG["backfill_batch"],))
+                    rows = cur.fetchall()
+                    if not rows:
+                        break
+                    execute_values(
+                        cur,
+                        """
+                        UPDATE workers AS w SET face_embedding_vec = v.vec::vector
+                        FROM (VALUES %s) AS v(id, vec) WHERE w.id = v.id::int
+                        """,
+                        [(worker_id, self._literal(decode_embedding(blob))) for worker_id, blob in rows],
+                        page_size=len(rows)
+                    )
+                    conn.commit()
+                    filled += len(rows)
+        return filled
+
+    def nearest(self, embedding, k=1):
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        dim = int(query.shape[0])
+        literal = self._literal(query)
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                # Expression and predicate match the partial index so the planner uses it
+                cur.execute(f"""
+                    SELECT id, face_embedding_vec::vector({dim}) <-> %s::vector({dim}) AS dist
+                    FROM workers
+                    WHERE vector_dims(face_embedding_vec) = {dim}
+                    ORDER BY face_embedding_vec::vector({dim}) <-> %s::vector({dim})
+                    LIMIT %s
+                """, (literal, literal, k))
+                return [(str(worker_id), float(dist)) for worker_id, dist in cur.fetchall()]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _on_worker_registered(worker_id, embedding):
+    if _index is not None:
+        _index.add(worker_id, embedding)
+
+
+def get_worker_index():
+    """Returns the process-wide worker index, building and syncing it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                backend = WORKER_INDEX_CONFIG["backend"]
+                if backend == "pgvector" or (backend == "auto" and PgVectorWorkerIndex.available()):
+                    index = PgVectorWorkerIndex()
+                else:
+                    index = NumpyWorkerIndex()
+                index.sync()
+                print(f"[DB] Worker index ready ({index.name})")
+                _index = index
+                WORKER_REGISTERED_HOOKS.append(_on_worker_registered)
+    return _index
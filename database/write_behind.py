@@ -0,0 +1,293 @@
+import atexit
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from database.database import (
+    log_violations_bulk,
+    register_new_worker,
+    register_new_workers_bulk,
+)
+
+WRITE_BEHIND_CONFIG = {
+    "max_queue": 10000,          # bounded in-process queue
+    "batch_size": 200,           # flush when this many items are waiting
+    "flush_interval": 1.0,       # ...or when the oldest waiting item is this old (seconds)
+    "violation_put_timeout": 0.05,
+    "worker_put_timeout": 2.0,
+    "max_retries": 3,
+    "resolved_keep": 1000,       # resolved provisional ids remembered after their queued violations flushed
+}
+
+
+class WriteBehindQueue:
+    """
+    Moves violation and worker inserts off the video thread.
+
+    Producers enqueue and return immediately; a background thread drains the
+    queue in batches and writes them with multi-row INSERTs. Worker
+    registrations get a provisional UUID straight away, which is swapped for
+    the real row id once the insert lands (listeners are notified so the
+    pipeline can update its in-memory state). A provisional id never reaches
+    the DB: violations for it wait until it resolves, and are dropped if the
+    registration is given up (listeners then get real_id=None). A
+    provisional -> real mapping is kept while queued violations still carry
+    the provisional id, plus the resolved_keep most recent ones for
+    producers that have not applied the real id yet. Violation listeners
+    are told about rows once they are committed, with their DB ids.
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(WRITE_BEHIND_CONFIG, **(config or {}))
+        self._queue = queue.Queue(maxsize=self.config["max_queue"])
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._resolved = OrderedDict() # provisional id -> real id, oldest first
+        self._refs = {}                # provisional id -> queued violations carrying it
+        self._pending_workers = set()  # provisional ids not yet written
+        self._listeners = []
+        self._violation_listeners = []
+        self._carry = []               # items to retry on the next flush
+        self.metrics = {
+            "enqueued_violations": 0,
+            "enqueued_workers": 0,
+            "written_violations": 0,
+            "written_workers": 0,
+            "dropped_violations": 0,
+            "orphaned_violations": 0,    # their worker's registration was given up
+            "dropped_workers": 0,
+            "sync_worker_fallbacks": 0,
+            "flushes": 0,
+            "errors": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    # -------------------- LIFECYCLE --------------------
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+                self._thread.start()
+
+    def close(self, timeout=10.0):
+        """Stops the writer after flushing everything still queued."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def add_listener(self, callback):
+        """
+        callback(provisional_id, real_id) is called from the writer thread;
+        real_id is None if the registration was given up.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def add_violation_listener(self, callback):
+        """
+        callback(violations) is called from the writer thread after each
+        committed batch, with one dict per row: id, worker_id (the real one),
+        equipped_items, violated_items, evidence_path, timestamp and stream.
+        """
+        self._violation_listeners.append(callback)
+
+    # -------------------- PRODUCERS --------------------
+
+    def log_violation(self, worker_uuid, equipped, violated, evidence_path, stream=None):
+        """
+        Queues a violation; `stream` is only passed on to violation listeners.
+        Returns False if the queue was full and it was dropped.
+        """
+        self.start()
+        worker_id = str(worker_uuid)
+        with self._lock:
+            if worker_id in self._pending_workers or worker_id in self._resolved:
+                self._refs[worker_id] = self._refs.get(worker_id, 0) + 1
+        item = ("violation", (worker_id, equipped, violated, evidence_path, stream), 0)
+        try:
+            self._queue.put(item, timeout=self.config["violation_put_timeout"])
+        except queue.Full:
+            self._release(worker_id)
+            self.metrics["dropped_violations"] += 1
+            print(f"[DB WARN] Write queue full, dropped violation for {worker_uuid}")
+            return False
+        self.metrics["enqueued_violations"] += 1
+        return True
+
+    def register_worker(self, embedding, display_name):
+        """Queues a worker registration and returns a provisional id for it."""
+        self.start()
+        provisional = str(uuid.uuid4())
+        with self._lock:
+            self._pending_workers.add(provisional)
+        try:
+            self._queue.put(("worker", (provisional, embedding, display_name), 0),
+                            timeout=self.config["worker_put_timeout"])
+        except queue.Full:
+            # Registrations are never dropped: fall back to a direct insert
+            with self._lock:
+                self._pending_workers.discard(provisional)
+            self.metrics["sync_worker_fallbacks"] += 1
+            return register_new_worker(embedding, display_name)
+        self.metrics["enqueued_workers"] += 1
+        return provisional
+
+    def resolve(self, worker_id):
+        """Maps a provisional id to its real row id (or returns the id unchanged)."""
+        return self._resolved.get(worker_id, worker_id)
+
+    def stats(self):
+        stats = dict(self.metrics)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["pending_workers"] = len(self._pending_workers)
+        stats["resolved_ids"] = len(self._resolved)
+        return stats
+
+    # -------------------- WRITER --------------------
+
+    def _run(self):
+        while True:
+            batch = self._carry
+            self._carry = []
+            deadline = time.time() + self.config["flush_interval"]
+            while len(batch) < self.config["batch_size"]:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+                except queue.Empty:
+                    if self._stop.is_set():
+                        break
+            if batch:
+                self._flush(batch)
+            # On shutdown keep going until the queue is drained and retries are spent
+            if self._stop.is_set() and self._queue.empty() and not self._carry:
+                return
+
+    def _flush(self, batch):
+        start = time.time()
+        workers = [item for item in batch if item[0] == "worker"]
+        violations = [item for item in batch if item[0] == "violation"]
+
+        if workers:
+            try:
+                real_ids = register_new_workers_bulk([(emb, name) for _, emb, name in (w[1] for w in workers)])
+            except Exception as e:
+                self.metrics["errors"] += 1
+                print(f"[DB ERROR] Bulk worker insert failed: {e}")
+                self._retry(workers)
+            else:
+                for (provisional, _, _), real_id in zip((w[1] for w in workers), real_ids):
+                    self._reconcile(provisional, real_id)
+                self.metrics["written_workers"] += len(real_ids)
+
+        ready, waiting = [], []
+        for kind, (queued_id, equipped, violated, evidence, stream), attempts in violations:
+            worker_id = str(self.resolve(queued_id))
+            with self._lock:
+                pending = worker_id in self._pending_workers
+            if pending:
+                # Registration has not landed yet (it is retried a bounded number of
+                # times); write the violation once it has its real id
+                waiting.append((kind, (worker_id, equipped, violated, evidence, stream), attempts))
+                continue
+            # From here on the item carries its real id (or is dropped)
+            self._release(queued_id)
+            if not worker_id.isdigit():
+                # Provisional id whose registration was given up: workers.id is an INT
+                self.metrics["orphaned_violations"] += 1
+            else:
+                ready.append((kind, (worker_id, equipped, violated, evidence, stream), attempts))
+        self._carry.extend(waiting)
+
+        if ready:
+            try:
+                written = log_violations_bulk([item[1][:4] for item in ready])
+            except Exception as e:
+                self.metrics["errors"] += 1
+                print(f"[DB ERROR] Bulk violation insert failed: {e}")
+                self._retry(ready)
+            else:
+                self.metrics["written_violations"] += len(written)
+                self._notify_violations(ready, written)
+
+        self.metrics["flushes"] += 1
+        self.metrics["last_flush_ms"] = (time.time() - start) * 1000
+
+    def _retry(self, items):
+        for kind, payload, attempts in items:
+            if attempts + 1 < self.config["max_retries"]:
+                self._carry.append((kind, payload, attempts + 1))
+            elif kind == "violation":
+                self.metrics["dropped_violations"] += 1
+            else:
+                print(f"[DB ERROR] Giving up on worker registration {payload[0]}")
+                self.metrics["dropped_workers"] += 1
+                with self._lock:
+                    self._pending_workers.discard(payload[0])
+                self._notify(payload[0], None)
+        if self._carry:
+            time.sleep(min(1.0, self.config["flush_interval"]))
+
+    def _reconcile(self, provisional, real_id):
+        with self._lock:
+            self._resolved[provisional] = real_id
+            self._pending_workers.discard(provisional)
+            self._prune_resolved()
+        self._notify(provisional, real_id)
+
+    def _release(self, worker_id):
+        """One queued violation no longer needs worker_id resolved."""
+        with self._lock:
+            refs = self._refs.get(worker_id)
+            if refs is None:
+                return
+            if refs > 1:
+                self._refs[worker_id] = refs - 1
+            else:
+                del self._refs[worker_id]
+                self._prune_resolved()
+
+    def _prune_resolved(self):
+        # Caller holds _lock. Oldest unreferenced mappings go first.
+        excess = len(self._resolved) - self.config["resolved_keep"]
+        if excess <= 0:
+            return
+        for provisional in [p for p in self._resolved if p not in self._refs][:excess]:
+            del self._resolved[provisional]
+
+    def _notify_violations(self, items, written):
+        if not self._violation_listeners:
+            return
+        rows = [
+            {"id": row_id, "worker_id": worker_id, "equipped_items": equipped, "violated_items": violated,
+             "evidence_path": evidence, "timestamp": timestamp, "stream": stream}
+            for (_, (worker_id, equipped, violated, evidence, stream), _), (row_id, timestamp) in zip(items, written)
+        ]
+        for callback in list(self._violation_listeners):
+            try:
+                callback(rows)
+            except Exception as e:
+                print(f"[ERROR] Violation listener failed: {e}")
+
+    def _notify(self, provisional, real_id):
+        for callback in list(self._listeners):
+            try:
+                callback(provisional, real_id)
+            except Exception as e:
+                print(f"[ERROR] Worker id listener failed: {e}")
+
+
+write_queue = WriteBehindQueue()
+atexit.register(write_queue.close)
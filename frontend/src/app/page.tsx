@@ -7,7 +7,9 @@ import {
 } from 'lucide-react';
 import Link from 'next/link';
 import LiveStream from '@/components/video/LiveStream';
-import { fetchStats, fetchViolations, Stats, Violation } from '@/lib/api';
+import { evidenceUrl, fetchStats, fetchViolations, subscribeEvents, Stats, Violation } from '@/lib/api';
+
+const STREAM_ID = 'default';
 
 export default function TechDashboard() {
   const [stats, setStats] = useState<Stats | null>(null);
@@ -15,7 +17,7 @@ export default function TechDashboard() {
   const [loading, setLoading] = useState(true);
   const [selectedImage, setSelectedImage] = useState<string | null>(null);
 
-  // Data Polling
+  // Initial load, then live updates pushed by the server
   useEffect(() => {
     const loadData = async () => {
       try {
@@ -31,8 +33,19 @@ export default function TechDashboard() {
     };
 
     loadData();
-    const interval = setInterval(loadData, 1000); // 1 second poll
-    return () => clearInterval(interval);
+    return subscribeEvents({
+      onSnapshot: (streams) => {
+        if (streams[STREAM_ID]) setStats(streams[STREAM_ID]);
+      },
+      onStats: ({ stream, ...changes }) => {
+        if (stream === STREAM_ID) setStats(prev => (prev ? { ...prev, ...changes } : prev));
+      },
+      onViolation: (v) => {
+        if (v.stream !== STREAM_ID) return;
+        // The initial fetch may already hold a violation committed just before we subscribed
+        setViolations(prev => (prev.some(p => p.id === v.id) ? prev : [v, ...prev].slice(0, 50)));
+      },
+    });
   }, []);
 
   return (
@@ -169,10 +182,10 @@ export default function TechDashboard() {
                     equipped={v.equipped_items}
                     missing={v.violated_items}
                     time={new Date(v.timestamp).toLocaleTimeString()}
-                    img={v.evidence_path ? `http://localhost:8000/storage/alerts/${v.evidence_path}` : undefined}
+                    img={v.evidence_path ? evidenceUrl(v.evidence_path, true) : undefined}
                     // For the modal, pass full details object so we can render them big
                     onClick={() => setSelectedImage(JSON.stringify({
-                      img: v.evidence_path ? `http://localhost:8000/storage/alerts/${v.evidence_path}` : null,
+                      img: v.evidence_path ? evidenceUrl(v.evidence_path) : null,
                       id: v.worker_id,
                       missing: v.violated_items,
                       equipped: v.equipped_items,
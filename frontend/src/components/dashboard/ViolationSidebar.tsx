@@ -2,7 +2,7 @@
 import { useEffect, useState } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { AlertCircle, Clock } from 'lucide-react';
-import { fetchViolations, Violation } from '@/lib/api';
+import { evidenceUrl, fetchViolations, Violation } from '@/lib/api';
 
 export default function ViolationSidebar() {
   const [violations, setViolations] = useState<Violation[]>([]);
@@ -49,11 +49,8 @@ export default function ViolationSidebar() {
               <p className="text-xs text-slate-300 mt-1">ID: {v.worker_name || v.worker_id}</p>
               {v.evidence_path && (
                 <div className="mt-2 rounded overflow-hidden h-16 w-full relative">
-                  {/* Note: Evidence path usually is local file path, we need to serve it or it won't show in browser unless we have an endpoint for static files.
-                          For now, we just skip showing image or need a static mount in FastAPI.
-                          Let's assume FastAPI serves 'storage' at /storage if configured.
-                          I haven't configured StaticFiles in FastAPI yet.
-                       */}
+                  <img src={evidenceUrl(v.evidence_path, true)} alt="Violation evidence" loading="lazy"
+                       className="h-full w-full object-cover" />
                 </div>
               )}
             </motion.div>
@@ -1,6 +1,7 @@
 "use client";
 import React, { useRef, useState } from 'react';
 import { Upload, Play, AlertCircle } from 'lucide-react';
+import { uploadVideo } from '@/lib/api';
 
 export default function LiveStream() {
   const [isStreaming, setIsStreaming] = useState(false);
@@ -10,17 +11,12 @@ export default function LiveStream() {
     const file = e.target.files?.[0];
     if (!file) return;
 
-    const formData = new FormData();
-    formData.append('file', file);
-
     try {
-      const res = await fetch('http://localhost:8000/upload_video', {
-        method: 'POST',
-        body: formData,
+      // The feed starts as soon as the received part of the video decodes
+      const status = await uploadVideo(file, 'default', (s) => {
+        if (s.streaming) setIsStreaming(true);
       });
-      if (res.ok) {
-        setIsStreaming(true);
-      }
+      if (status.complete) setIsStreaming(true);
     } catch (err) {
       console.error("Upload failed", err);
     }
@@ -10,6 +10,11 @@ export interface Violation {
     timestamp: string;
 }
 
+/** URL of a violation snapshot (or its small thumbnail) served by /evidence. */
+export function evidenceUrl(key: string, thumb = false): string {
+    return `${API_URL}/evidence/${key}${thumb ? '?thumb=true' : ''}`;
+}
+
 export interface Worker {
     id: string;
     display_name: string;
@@ -24,27 +29,101 @@ export interface Stats {
     violations_today: number;
 }
 
-export async function fetchViolations(): Promise<Violation[]> {
-    const res = await fetch(`${API_URL}/violations`);
+export async function fetchViolations(streamId?: string): Promise<Violation[]> {
+    const query = streamId ? `?stream_id=${encodeURIComponent(streamId)}` : '';
+    const res = await fetch(`${API_URL}/violations${query}`);
     if (!res.ok) throw new Error('Failed to fetch violations');
     return res.json();
 }
 
-export async function fetchStats(): Promise<Stats> {
-    const res = await fetch(`${API_URL}/stats`);
+export async function fetchStats(streamId?: string): Promise<Stats> {
+    const url = streamId ? `${API_URL}/streams/${encodeURIComponent(streamId)}/stats` : `${API_URL}/stats`;
+    const res = await fetch(url);
     if (!res.ok) throw new Error('Failed to fetch stats');
     return res.json();
 }
 
-export async function uploadVideo(file: File): Promise<{ filename: string }> {
-    const formData = new FormData();
-    formData.append('file', file);
+export type StatsDelta = Partial<Stats> & { stream: string };
+export type ViolationEvent = Violation & { stream: string };
+
+export interface EventHandlers {
+    onSnapshot?: (streams: Record<string, Stats>) => void;
+    onStats?: (delta: StatsDelta) => void;
+    onViolation?: (violation: ViolationEvent) => void;
+}
 
-    const res = await fetch(`${API_URL}/upload`, {
+// Server-sent events replace polling. EventSource reconnects on its own and
+// sends Last-Event-ID, so the server replays only what was missed.
+export function subscribeEvents(handlers: EventHandlers): () => void {
+    const source = new EventSource(`${API_URL}/events`);
+    source.addEventListener('snapshot', (e) => {
+        handlers.onSnapshot?.(JSON.parse((e as MessageEvent).data).streams);
+    });
+    source.addEventListener('stats', (e) => {
+        handlers.onStats?.(JSON.parse((e as MessageEvent).data));
+    });
+    // Sent once the row is committed: id is the violation's DB id and worker_id the real worker id
+    source.addEventListener('violation', (e) => {
+        handlers.onViolation?.(JSON.parse((e as MessageEvent).data));
+    });
+    return () => source.close();
+}
+
+export interface UploadStatus {
+    upload_id: string;
+    filename: string;
+    offset: number;
+    size: number;
+    complete: boolean;
+    stream_id?: string;
+    streaming: boolean;
+}
+
+const UPLOAD_CHUNK = 8 * 1024 * 1024;
+const UPLOAD_RETRIES = 5;
+
+// Resumable upload: the file is sent in chunks with PATCH /uploads/{id}. After a
+// failed chunk the client asks the server how much arrived (HEAD) and resumes
+// from there. With a streamId the stream starts while the rest is uploading;
+// onProgress reports status.streaming once it has.
+export async function uploadVideo(
+    file: File,
+    streamId = 'default',
+    onProgress?: (status: UploadStatus) => void,
+): Promise<UploadStatus> {
+    const created = await fetch(`${API_URL}/uploads`, {
         method: 'POST',
-        body: formData,
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size, stream_id: streamId }),
     });
+    if (!created.ok) throw new Error('Upload failed');
+    let status: UploadStatus = await created.json();
+    const url = `${API_URL}/uploads/${status.upload_id}`;
 
-    if (!res.ok) throw new Error('Upload failed');
-    return res.json();
+    let failures = 0;
+    while (!status.complete) {
+        const offset = status.offset;
+        try {
+            const res = await fetch(url, {
+                method: 'PATCH',
+                headers: { 'Upload-Offset': String(offset), 'Content-Type': 'application/offset+octet-stream' },
+                body: file.slice(offset, offset + UPLOAD_CHUNK),
+            });
+            if (!res.ok && res.status !== 409) throw new Error(`Upload chunk failed (${res.status})`);
+            if (res.ok) {
+                status = await res.json();
+                failures = 0;
+                onProgress?.(status);
+                continue;
+            }
+        } catch (err) {
+            if (++failures > UPLOAD_RETRIES) throw err;
+            await new Promise((resolve) => setTimeout(resolve, 1000 * failures));
+        }
+        // Resume from whatever the server actually has
+        const head = await fetch(url, { method: 'HEAD' });
+        if (!head.ok) throw new Error('Upload failed');
+        status = { ...status, offset: Number(head.headers.get('Upload-Offset')) };
+    }
+    return status;
 }
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from backend.association import PPEAssociator, iou_matrix
+
+CLASS_NAMES = {0: "Helmet", 1: "Vest", 2: "Boots", 3: "Gloves", 4: "Mask", 5: "Goggles", 6: "Person"}
+
+
+# -------------------- SCALAR REFERENCE --------------------
+# The per-pair path PPEPipeline used before association was vectorized,
+# kept verbatim as the reference the vectorized engine must match.
+
+def compute_iou(boxA, boxB):
+    # box: [x1, y1, x2, y2]
+    xA = max(boxA[0], boxB[0])
+    yA = max(boxA[1], boxB[1])
+    xB = min(boxA[2], boxB[2])
+    yB = min(boxA[3], boxB[3])
+
+    interW = max(0, xB - xA)
+    interH = max(0, yB - yA)
+    interArea = interW * interH
+
+    boxAArea = (boxA[2] - boxA[0]) * (boxA[3] - boxA[1])
+    boxBArea = (boxB[2] - boxB[0]) * (boxB[3] - boxB[1])
+
+    unionArea = boxAArea + boxBArea - interArea
+    if unionArea == 0: return 0
+    return interArea / unionArea
+
+
+def get_iou_threshold(ppe_name):
+    if ppe_name == "vest": return 0.4
+    elif ppe_name == "helmet": return 0.01
+    elif ppe_name == "boots": return 0.02
+    elif ppe_name == "gloves": return 0.01
+    return 0.01
+
+
+def associate_scalar(person_boxes, ppe_boxes, ppe_classes):
+    equipped = []
+    for person_box in person_boxes:
+        equipped_list = []
+        for ppe_box, cls_id in zip(ppe_boxes, ppe_classes):
+            ppe_name = CLASS_NAMES[cls_id].lower()
+            if compute_iou(person_box, ppe_box) > get_iou_threshold(ppe_name):
+                equipped_list.append(ppe_name)
+        equipped.append(equipped_list)
+    return equipped
+
+
+def random_boxes(rng, n, size=640):
+    xy = rng.integers(0, size, (n, 2))
+    wh = rng.integers(1, 200, (n, 2))
+    return np.concatenate([xy, xy + wh], axis=1).astype(int)
+
+
+# -------------------- TESTS --------------------
+
+@pytest.mark.parametrize("seed", range(5))
+def test_iou_matrix_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    a, b = random_boxes(rng, 30), random_boxes(rng, 80)
+    expected = np.array([[compute_iou(x, y) for y in b] for x in a])
+    np.testing.assert_allclose(iou_matrix(a, b), expected, rtol=1e-6, atol=1e-7)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_associate_matches_scalar(seed):
+    rng = np.random.default_rng(seed)
+    persons = random_boxes(rng, 40)
+    ppe = random_boxes(rng, 120)
+    classes = rng.integers(0, 6, len(ppe)).tolist()
+    assert PPEAssociator(CLASS_NAMES).associate(persons, ppe, classes) == associate_scalar(persons, ppe, classes)
+
+
+def test_per_class_thresholds():
+    person = [0, 0, 100, 100]
+    # IoU 0.25: above every threshold but the vest's 0.4
+    box = [0, 0, 50, 50]
+    assert compute_iou(person, box) == 0.25
+    assoc = PPEAssociator(CLASS_NAMES)
+    assert assoc.associate([person], [box] * 4, [0, 1, 2, 3]) == [["helmet", "boots", "gloves"]]
+    # IoU 0.015: above helmet / gloves (0.01), below boots (0.02)
+    small = [0, 0, 15, 10]
+    assert compute_iou(person, small) == 0.015
+    assert assoc.associate([person], [small] * 3, [0, 2, 3]) == [["helmet", "gloves"]]
+
+
+def test_iou_equal_to_threshold_does_not_match():
+    person = [0, 0, 10, 10]
+    vest = [0, 0, 10, 4]   # IoU exactly 0.4, the vest threshold
+    assert compute_iou(person, vest) == 0.4
+    assert associate_scalar([person], [vest], [1]) == [[]]
+    assert PPEAssociator(CLASS_NAMES).associate([person], [vest], [1]) == [[]]
+
+
+def test_duplicates_and_detection_order_are_kept():
+    person = [0, 0, 100, 100]
+    ppe = [[0, 0, 100, 60], [10, 0, 40, 20], [0, 0, 100, 70]]
+    classes = [1, 0, 1]
+    expected = [["vest", "helmet", "vest"]]
+    assert associate_scalar([person], ppe, classes) == expected
+    assert PPEAssociator(CLASS_NAMES).associate([person], ppe, classes) == expected
+
+
+def test_degenerate_boxes_have_zero_iou():
+    assert iou_matrix([[5, 5, 5, 5]], [[5, 5, 5, 5]]).tolist() == [[0.0]]
+    assert PPEAssociator(CLASS_NAMES).associate([[5, 5, 5, 5]], [[5, 5, 5, 5]], [0]) == [[]]
+
+
+@pytest.mark.parametrize("persons, ppe, classes, expected", [
+    ([], [], [], []),
+    ([], [[0, 0, 10, 10]], [0], []),
+    ([[0, 0, 10, 10], [20, 20, 30, 30]], [], [], [[], []]),
+])
+def test_empty_inputs(persons, ppe, classes, expected):
+    assert PPEAssociator(CLASS_NAMES).associate(persons, ppe, classes) == expected
+    assert associate_scalar(persons, ppe, classes) == expected
+    assert iou_matrix(persons, ppe).shape == (len(persons), len(ppe))
@@ -0,0 +1,86 @@
+from contextlib import nullcontext
+from unittest import mock
+
+import pytest
+
+from database import database
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = 0
+
+    def cursor(self):
+        return nullcontext(mock.Mock())
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class FakePool:
+    """psycopg2's pool semantics: minconn opened up front, at most minconn kept idle."""
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.minconn = minconn
+        self.idle = [FakeConn() for _ in range(minconn)]
+
+    def getconn(self):
+        return self.idle.pop() if self.idle else FakeConn()
+
+    def putconn(self, conn, close=False):
+        if len(self.idle) < self.minconn and not close and not conn.closed:
+            self.idle.append(conn)
+        else:
+            conn.close()
+
+    def closeall(self):
+        for conn in self.idle:
+            conn.close()
+        self.idle = []
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    monkeypatch.setattr(database.pool, "ThreadedConnectionPool", FakePool)
+    monkeypatch.setitem(database.DB_POOL_CONFIG, "minconn", 1)
+    monkeypatch.setitem(database.DB_POOL_CONFIG, "maxconn", 4)
+    database.close_pool()
+    yield
+    database.close_pool()
+
+
+def counts():
+    stats = database.pool_stats()
+    return stats["open"], stats["in_use"], stats["idle"]
+
+
+def test_counts_follow_checkouts_and_returns(fake_pool):
+    assert counts() == (0, 0, 0)
+    with database.pooled_connection():
+        assert counts() == (1, 1, 0)
+        with database.pooled_connection():
+            assert counts() == (2, 2, 0)
+        assert counts() == (2, 1, 1)
+    # Beyond minconn idle connections the returned one is closed
+    assert counts() == (1, 0, 1)
+
+
+def test_broken_connection_is_discarded(fake_pool):
+    discarded = database.pool_stats()["discarded"]
+    with pytest.raises(database.psycopg2.OperationalError):
+        with database.pooled_connection():
+            raise database.psycopg2.OperationalError("server closed the connection")
+    stats = database.pool_stats()
+    assert (stats["open"], stats["in_use"], stats["idle"]) == (0, 0, 0)
+    assert stats["discarded"] == discarded + 1
+
+
+def test_close_pool_resets_counts(fake_pool):
+    with database.pooled_connection():
+        database.close_pool()
+        assert counts() == (0, 0, 0)
+    # Returning to the closed pool does not drive the counts negative
+    assert counts() == (0, 0, 0)
@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+from backend.models import INFERENCE_CONFIG
+from backend.stream_manager import DetectionBatcher
+
+
+class RecordingYOLO:
+    def __init__(self, block=None):
+        self.calls = []
+        self.block = block
+
+    def predict(self, frames, conf=None, verbose=False):
+        self.calls.append((len(frames), conf))
+        if self.block is not None:
+            self.block.wait(5)
+        return [f"result-{frame}" for frame in frames]
+
+
+class Models:
+    def __init__(self, yolo):
+        self.yolo = yolo
+        self.yolo_lock = threading.Lock()
+        self.detect_conf = INFERENCE_CONFIG["detect_conf"]
+
+
+def test_detect_uses_the_tracking_confidence_floor():
+    yolo = RecordingYOLO()
+    batcher = DetectionBatcher(Models(yolo), max_wait_ms=1)
+    try:
+        assert batcher.detect("a") == "result-a"
+    finally:
+        batcher.close()
+    assert yolo.calls == [(1, 0.1)]
+
+
+def test_frames_from_several_streams_share_one_call():
+    yolo = RecordingYOLO()
+    batcher = DetectionBatcher(Models(yolo), max_batch=4, max_wait_ms=200)
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, batcher.detect(i))) for i in range(4)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+    finally:
+        batcher.close()
+    assert results == {i: f"result-{i}" for i in range(4)}
+    assert sum(n for n, _ in yolo.calls) == 4 and len(yolo.calls) < 4
+
+
+def test_detect_times_out_and_closed_batcher_refuses():
+    release = threading.Event()
+    batcher = DetectionBatcher(Models(RecordingYOLO(block=release)), max_wait_ms=1, timeout_s=0.2)
+    try:
+        with pytest.raises(FutureTimeout):
+            batcher.detect("stuck")
+    finally:
+        release.set()
+        batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.detect("late")
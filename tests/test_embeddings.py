@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from database.embeddings import (
+    EMBEDDING_MODELS, copy_buffer, decode_embedding, decode_embeddings, encode_embedding,
+)
+
+
+@pytest.mark.parametrize("model", sorted(EMBEDDING_MODELS))
+@pytest.mark.parametrize("dtype", [np.float32, np.float64, ">f4"])
+def test_round_trip(model, dtype):
+    dim = EMBEDDING_MODELS[model]["dim"]
+    vector = np.random.default_rng(dim).standard_normal(dim).astype(dtype)
+    blob, tag, stored_dim = encode_embedding(vector)
+    assert (tag, stored_dim) == (model, dim)
+    # Matches the workers_embedding_size CHECK constraint
+    assert len(blob) == 4 * dim
+    np.testing.assert_array_equal(decode_embedding(blob), vector.astype(np.float32))
+
+
+def test_bytes_are_little_endian_float32():
+    blob, _, _ = encode_embedding(np.r_[1.0, np.zeros(127)])
+    assert blob[:4] == b"\x00\x00\x80\x3f"
+
+
+def test_decode_accepts_memoryview():
+    # psycopg2 returns bytea columns as memoryview
+    vector = np.arange(128, dtype=np.float32)
+    blob, _, _ = encode_embedding(vector)
+    np.testing.assert_array_equal(decode_embedding(memoryview(blob)), vector)
+
+
+def test_decode_many_into_one_matrix():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((5, 512)).astype(np.float32)
+    blobs = [memoryview(encode_embedding(v)[0]) for v in vectors]
+    matrix = decode_embeddings(blobs, 512)
+    assert matrix.dtype == np.float32 and matrix.shape == (5, 512)
+    np.testing.assert_array_equal(matrix, vectors)
+    assert decode_embeddings([], 128).shape == (0, 128)
+
+
+def test_model_tag_is_validated():
+    with pytest.raises(ValueError):
+        encode_embedding(np.zeros(128), "osnet_x1_0")
+    with pytest.raises(ValueError):
+        encode_embedding(np.zeros(100))
+    assert encode_embedding(np.zeros((1, 512)))[1:] == ("osnet_x1_0", 512)
+
+
+def parse_copy_field(field):
+    """Inverse of COPY text escaping, for the fields written here."""
+    if field == "\\N":
+        return None
+    if field.startswith("\\\\x"):
+        return bytes.fromhex(field[3:])
+    return (field.replace("\\t", "\t").replace("\\n", "\n").replace("\\r", "\r").replace("\\\\", "\\"))
+
+
+def test_copy_buffer_round_trips_bytea_and_text():
+    blob, model, dim = encode_embedding(np.linspace(-1, 1, 128))
+    rows = [(7, blob, model, dim, "tab\there"), (8, None, None, None, "back\\slash\nline")]
+    lines = copy_buffer(rows).getvalue().split("\n")
+    assert lines[-1] == ""
+    parsed = [[parse_copy_field(f) for f in line.split("\t")] for line in lines[:-1]]
+    assert parsed[0] == ["7", blob, model, "128", "tab\there"]
+    assert parsed[1] == ["8", None, None, None, "back\\slash\nline"]
+    np.testing.assert_array_equal(decode_embedding(parsed[0][1]), np.linspace(-1, 1, 128).astype(np.float32))
@@ -0,0 +1,92 @@
+import numpy as np
+
+from backend.identification import IdentificationScheduler
+from backend.track_store import TrackStore
+
+FRAME_SHAPE = (480, 640, 3)
+
+
+def blurry_crop():
+    return np.full((120, 60, 3), 128, np.uint8)   # flat: sharpness 0, never passes the gate
+
+
+def sharp_crop(seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (120, 60, 3), dtype=np.uint8)
+
+
+def run_frame(scheduler, store, crops, wait_for_face_limit=25):
+    """One frame of the pipeline's identification section; returns (face tids, reid tids)."""
+    states = {tid: store.touch(tid) for tid in crops}
+    scheduler.begin_frame(store.frame)
+    face = scheduler.plan_faces([(tid, states[tid], crop) for tid, crop in crops.items()], FRAME_SHAPE)
+    reid = scheduler.plan_reid([(tid, s) for tid, s in states.items() if s.frame_count > wait_for_face_limit])
+    scheduler.end_frame()
+    store.end_frame()
+    return face, reid
+
+
+def test_blurry_track_still_gets_reid_fallback():
+    scheduler, store = IdentificationScheduler(), TrackStore()
+    reid_frames = []
+    for i in range(300):
+        face, reid = run_frame(scheduler, store, {1: blurry_crop()})
+        assert face == []
+        if reid:
+            reid_frames.append(i)
+            store.get(1).final_uuid = "worker-1"   # the pipeline assigns the ReID identity
+            break
+    assert reid_frames == [25]   # first frame past wait_for_face_limit
+    assert store.get(1).final_uuid == "worker-1"
+
+
+def test_reid_runs_every_frame_while_unidentified():
+    scheduler, store = IdentificationScheduler(), TrackStore()
+    reid_count = 0
+    for _ in range(300):
+        _, reid = run_frame(scheduler, store, {1: blurry_crop()})
+        reid_count += len(reid)
+    assert reid_count == 300 - 25
+
+
+def test_face_failures_back_off_with_doubling_cooldown():
+    scheduler, store = IdentificationScheduler(), TrackStore()
+    checks = []
+    for i in range(60):
+        before = scheduler.metrics["gate_checks"]
+        run_frame(scheduler, store, {1: blurry_crop()})
+        if scheduler.metrics["gate_checks"] > before:
+            checks.append(i)
+    gaps = np.diff(checks).tolist()
+    assert gaps[:4] == [3, 6, 12, 24]
+    assert store.get(1).failures == {"face": len(checks), "reid": 0}
+
+
+def test_reid_failure_does_not_block_face():
+    scheduler, store = IdentificationScheduler(), TrackStore()
+    state = store.touch(1)
+    scheduler.begin_frame(store.frame)
+    scheduler.fail(state, "reid")
+    assert scheduler.plan_reid([(1, state)]) == []
+    assert scheduler.plan_faces([(1, state, sharp_crop())], FRAME_SHAPE) == [1]
+
+
+def test_failing_crowd_does_not_starve_sharp_track():
+    scheduler = IdentificationScheduler({"max_face_per_frame": 2})
+    store = TrackStore()
+    crowd = {tid: blurry_crop() for tid in range(2, 40)}
+    scheduled = []
+    for _ in range(20):
+        face, _ = run_frame(scheduler, store, {**crowd, 1: sharp_crop()})
+        scheduled.extend(face)
+        if 1 in face:
+            break
+    assert 1 in scheduled
+
+
+def test_min_per_frame_makes_progress_with_no_budget():
+    scheduler = IdentificationScheduler({"budget_ms": 0.0})
+    store = TrackStore()
+    crops = {tid: sharp_crop(tid) for tid in range(5)}
+    face, _ = run_frame(scheduler, store, crops)
+    assert len(face) == 1
+    assert scheduler.metrics["deferred"] == 4
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from backend.evidence import EvidenceStore
+from backend.motion import MotionGate
+from backend.pipeline_service import PPEPipeline
+from benchmarks.bench_pipeline import (
+    BENCH_CONFIG, PERSON_CLASS, InMemoryWriter, PassthroughTracker, StubModels, _Box, _Result,
+)
+
+
+def still(value=100):
+    return np.full((240, 320, 3), value, np.uint8)
+
+
+def moved(x):
+    frame = still()
+    frame[60:180, x:x + 60] = 250
+    return frame
+
+
+def gate(**config):
+    return MotionGate(dict({"hold_frames": 0, "refresh_frames": 1000}, **config))
+
+
+def test_first_frame_is_inferred_and_still_frames_are_skipped():
+    g = gate()
+    assert g.should_infer(still())
+    assert not any(g.should_infer(still()) for _ in range(5))
+    assert (g.metrics["inferred"], g.metrics["skipped"]) == (1, 5)
+
+
+def test_motion_is_inferred_and_becomes_the_reference():
+    g = gate()
+    g.should_infer(still())
+    assert g.should_infer(moved(20))
+    assert not g.should_infer(moved(20))
+    assert g.should_infer(moved(200))
+
+
+def test_slow_drift_adds_up_against_the_last_inferred_frame():
+    g = gate(min_changed_ratio=0.5, pixel_threshold=25)
+    g.should_infer(still(100))
+    # Each step changes 10 levels vs the previous frame, under the threshold on its own
+    assert not g.should_infer(still(110))
+    assert not g.should_infer(still(120))
+    assert g.should_infer(still(130))
+
+
+def test_hold_keeps_inferring_after_motion():
+    g = gate(hold_frames=2)
+    g.should_infer(still())
+    g.should_infer(moved(20))
+    assert [g.should_infer(moved(20)) for _ in range(3)] == [True, True, False]
+
+
+def test_refresh_forced_after_refresh_frames_skips():
+    g = gate(refresh_frames=3)
+    g.should_infer(still())
+    assert [g.should_infer(still()) for _ in range(8)] == [False, False, False, True] * 2
+    assert g.metrics["forced"] == 2
+
+
+def test_ignored_region_does_not_count_as_motion():
+    g = gate(ignore_regions=[[(0, 0), (0.5, 0), (0.5, 1), (0, 1)]])
+    g.should_infer(still())
+    assert not g.should_infer(moved(20))     # left half
+    assert g.should_infer(moved(240))        # right half
+
+
+def test_configure_applies_on_next_frame_and_starts_fresh():
+    g = gate()
+    g.should_infer(still())
+    assert not g.should_infer(still())
+    g.configure(min_changed_ratio=0.9, pixel_threshold=None)
+    assert g.config["pixel_threshold"] == 25   # None leaves a setting unchanged
+    assert g.should_infer(still())             # reference dropped by the reconfigure
+    assert g.config["min_changed_ratio"] == 0.9
+
+
+def test_disabled_gate_infers_everything():
+    g = gate(enabled=False)
+    assert all(g.should_infer(still()) for _ in range(3))
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    models = StubModels(dict(BENCH_CONFIG, face_hit_rate=0.0))
+    calls = []
+    predict = models.yolo.predict
+    models.yolo.predict = lambda frame, **kwargs: calls.append(frame) or predict(frame, **kwargs)
+    models.yolo.pending = _Result([_Box(PERSON_CLASS, 1, (100, 40, 160, 200), 0.9)])
+    p = PPEPipeline(models=models, name="motion-test", db_writer=InMemoryWriter(), tracker=PassthroughTracker(),
+                    evidence=EvidenceStore({"root": str(tmp_path)}),
+                    motion=gate(refresh_frames=3))
+    p.detector_calls = calls
+    yield p
+    p.close()
+
+
+def test_pipeline_skips_detection_but_advances_the_track_store(pipeline):
+    for _ in range(4):
+        pipeline._process_frame(still(), draw=False)
+    # Frame 1 inferred, frames 2-4 skipped
+    assert len(pipeline.detector_calls) == 1
+    assert pipeline.identity_manager.frame == 4
+    assert pipeline.identity_manager.get(1).last_frame == 0
+
+    pipeline._process_frame(still(), draw=False)   # forced refresh
+    assert len(pipeline.detector_calls) == 2
+    assert pipeline.identity_manager.get(1).last_frame == 4
+
+
+def test_skipped_frame_redraws_the_previous_boxes(pipeline):
+    first = pipeline._process_frame(still(), draw=True)
+    second = pipeline._process_frame(still(), draw=True)
+    assert len(pipeline.detector_calls) == 1
+    assert np.array_equal(first, second)
+    assert not np.array_equal(second, still())
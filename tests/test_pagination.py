@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import fastapi_main
+from backend.response_cache import ResponseCache, decode_cursor, encode_cursor
+
+T0 = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeViolations:
+    """violations table: keyset semantics of database.get_violations_page, plus max(id)."""
+
+    def __init__(self, n):
+        self.rows = []
+        self.page_queries = 0
+        for _ in range(n):
+            self.insert()
+
+    def insert(self):
+        row_id = len(self.rows) + 1
+        # Two rows per timestamp, so ties are broken by id
+        self.rows.append({
+            "id": row_id, "worker_id": 1, "equipped_items": "vest", "violated_items": "helmet",
+            "evidence_path": None, "timestamp": T0 + timedelta(seconds=row_id // 2), "worker_name": None,
+        })
+
+    def page(self, limit=50, cursor=None, worker_id=None, violated_item=None, since=None, until=None):
+        self.page_queries += 1
+        rows = sorted(self.rows, key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+        if cursor is not None:
+            ts, row_id = cursor
+            rows = [r for r in rows if (r["timestamp"], r["id"]) < (ts, int(row_id))]
+        return rows[:limit]
+
+    def state(self):
+        return (max((r["id"] for r in self.rows), default=None), 1)
+
+
+@pytest.fixture
+def table(monkeypatch):
+    fake = FakeViolations(7)
+    monkeypatch.setattr(fastapi_main, "get_violations_page", fake.page)
+    monkeypatch.setattr(fastapi_main, "get_table_state", fake.state)
+    monkeypatch.setattr(fastapi_main, "response_cache", ResponseCache())
+    return fake
+
+
+@pytest.fixture
+def client():
+    return TestClient(fastapi_main.app)   # not entered: no startup, so no model loading
+
+
+def test_cursor_round_trip():
+    ts = datetime(2026, 3, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, "42")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_keyset_pages_cover_every_row_once(table, client):
+    seen, cursor = [], None
+    while True:
+        params = {"since": 0, "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        res = client.get("/violations", params=params)
+        assert res.status_code == 200
+        seen.extend(v["id"] for v in res.json())
+        cursor = res.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_pages_are_stable_under_inserts(table, client):
+    first = client.get("/violations", params={"since": 0, "limit": 3})
+    table.insert()
+    table.insert()
+    second = client.get("/violations", params={"since": 0, "limit": 3, "cursor": first.headers["x-next-cursor"]})
+    assert [v["id"] for v in first.json()] == [7, 6, 5]
+    assert [v["id"] for v in second.json()] == [4, 3, 2]
+
+
+def test_malformed_cursor_is_a_400(table, client):
+    assert client.get("/violations", params={"since": 0, "cursor": "###"}).status_code == 400
+
+
+def test_current_etag_gets_304_without_the_page_query(table, client):
+    first = client.get("/violations", params={"since": 0})
+    etag = first.headers["etag"]
+    queries = table.page_queries
+    again = client.get("/violations", params={"since": 0}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert table.page_queries == queries
+
+
+def test_insert_from_another_process_changes_the_etag(table, client):
+    etag = client.get("/violations", params={"since": 0}).headers["etag"]
+    table.insert()   # no hook fires in this process
+    res = client.get("/violations", params={"since": 0}, headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["etag"] != etag
+    assert res.json()[0]["id"] == 8
+
+
+def test_etag_depends_on_the_query(table, client):
+    a = client.get("/violations", params={"since": 0, "limit": 3}).headers["etag"]
+    b = client.get("/violations", params={"since": 0, "limit": 4}).headers["etag"]
+    assert a != b
+
+
+def test_body_cache_is_reused_until_the_state_changes(table, client):
+    client.get("/violations", params={"since": 0})
+    client.get("/violations", params={"since": 0})
+    assert table.page_queries == 1
+    table.insert()
+    client.get("/violations", params={"since": 0})
+    assert table.page_queries == 2
+
+
+def test_body_cache_expires(monkeypatch):
+    cache = ResponseCache({"ttl_s": 10})
+    now = [1000.0]
+    monkeypatch.setattr("backend.response_cache.time.time", lambda: now[0])
+    cache.put("violations", ("q",), (1, 1), "page")
+    assert cache.get("violations", ("q",), (1, 1)) == "page"
+    now[0] += 11
+    assert cache.get("violations", ("q",), (1, 1)) is None
@@ -0,0 +1,28 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import fastapi_main
+
+
+@pytest.fixture
+def client():
+    # Not entered as a context manager: no startup hooks, so no model load
+    return TestClient(fastapi_main.app)
+
+
+@pytest.mark.parametrize("state, db_up, code", [
+    ("ready", True, 200),
+    ("ready", False, 503),
+    ("loading", True, 503),
+])
+def test_readyz_needs_models_and_database(client, monkeypatch, state, db_up, code):
+    monkeypatch.setattr(fastapi_main.model_loader, "state", state)
+    monkeypatch.setattr(fastapi_main, "health_check", lambda: db_up)
+    response = client.get("/readyz")
+    assert response.status_code == code
+    assert response.json()["database"] == ("ok" if db_up else "unreachable")
+
+
+def test_healthz_does_not_touch_the_database(client, monkeypatch):
+    monkeypatch.setattr(fastapi_main, "health_check", lambda: pytest.fail("liveness hit the database"))
+    assert client.get("/healthz").status_code == 200
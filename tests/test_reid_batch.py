@@ -0,0 +1,67 @@
+import cv2 as cv
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+transforms = pytest.importorskip("torchvision.transforms")
+
+from backend.reid_batch import BatchedReID, REID_MEAN, REID_STD  # noqa: E402
+
+# The per-crop transform the ReID stage used before batching (reid_manger.embedding_model)
+OLD_TRANSFORM = transforms.Compose([
+    transforms.ToPILImage(),
+    transforms.Resize((256, 128)),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=REID_MEAN.tolist(), std=REID_STD.tolist()),
+])
+
+
+def crop(rng, h, w):
+    """Smooth, contrast-stretched random image: closer to a camera crop than raw noise."""
+    noise = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    blurred = cv.GaussianBlur(noise, (0, 0), 3).astype(np.float32)
+    return np.clip((blurred - 128) * 4 + 128, 0, 255).astype(np.uint8)
+
+
+class MeanModel:
+    """Stands in for OSNet: per-channel means plus a constant, so outputs are easy to predict."""
+
+    def __call__(self, x):
+        return torch.cat([x.mean(dim=(2, 3)), torch.ones(len(x), 1)], dim=1)
+
+
+@pytest.mark.parametrize("h", [48, 128, 200, 256, 320, 400])
+def test_preprocess_within_tolerance_of_old_transform(h):
+    rng = np.random.default_rng(h)
+    crops = [crop(rng, h, h // 2) for _ in range(4)]
+    batch = BatchedReID(MeanModel()).preprocess(crops)
+    assert batch.shape == (4, 3, 256, 128) and batch.dtype == np.float32
+    for new, c in zip(batch, crops):
+        ref = OLD_TRANSFORM(c).numpy()
+        assert np.abs(new - ref).mean() < 0.05   # about 3 grey levels
+        cos = float(new.ravel() @ ref.ravel() / np.linalg.norm(new) / np.linalg.norm(ref))
+        assert cos > 0.995
+
+
+def test_same_size_crop_is_exact():
+    rng = np.random.default_rng(0)
+    c = crop(rng, 256, 128)
+    np.testing.assert_allclose(BatchedReID(MeanModel()).preprocess([c])[0], OLD_TRANSFORM(c).numpy(), atol=1e-5)
+
+
+def test_embed_batches_normalizes_and_keys_by_track():
+    rng = np.random.default_rng(1)
+    crops = {tid: crop(rng, 100 + tid, 50) for tid in range(7)}
+    crops[99] = np.zeros((0, 0, 3), np.uint8)
+    calls = []
+    reid = BatchedReID(MeanModel(), max_batch_size=3)
+    forward = reid._forward
+    reid._forward = lambda batch: calls.append(len(batch)) or forward(batch)
+
+    out = reid.embed(crops)
+    assert sorted(out) == list(range(7))
+    assert calls == [3, 3, 1]
+    for tid, emb in out.items():
+        assert np.linalg.norm(emb) == pytest.approx(1.0, abs=1e-6)
+        single = reid.embed({tid: crops[tid]})[tid]
+        np.testing.assert_allclose(emb, single, atol=1e-6)
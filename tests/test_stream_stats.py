@@ -0,0 +1,46 @@
+from fastapi.testclient import TestClient
+
+from backend import fastapi_main
+from backend.stream_manager import StreamManager
+
+
+class FakePipeline:
+    def __init__(self, **stats):
+        self.stats = stats
+
+    def get_stats(self):
+        return self.stats
+
+
+def manager_with(**pipelines):
+    manager = StreamManager(models=object())
+    manager._streams.update(pipelines)
+    return manager
+
+
+def test_aggregate_sums_every_stream():
+    manager = manager_with(
+        default=FakePipeline(total_workers=3, helmet_count=2, violations_today=5),
+        gate=FakePipeline(total_workers=1, helmet_count=0, violations_today=2),
+    )
+    assert [stream_id for stream_id, _ in manager.pipelines()] == ["default", "gate"]
+    assert manager.aggregate_stats() == {"total_workers": 4, "helmet_count": 2, "violations_today": 7}
+
+
+def test_stats_endpoint_serves_the_aggregate(monkeypatch):
+    manager = manager_with(
+        default=FakePipeline(total_workers=2, helmet_count=1, vest_count=1, mask_count=0, violations_today=1),
+        webcam=FakePipeline(total_workers=1, helmet_count=1, vest_count=0, mask_count=1, violations_today=3),
+    )
+    monkeypatch.setattr(fastapi_main, "stream_manager", manager)
+    response = TestClient(fastapi_main.app).get("/stats")
+    assert response.json() == {
+        "total_workers": 3, "helmet_count": 2, "vest_count": 1, "mask_count": 1, "violations_today": 4,
+    }
+
+
+def test_stats_endpoint_with_no_streams(monkeypatch):
+    monkeypatch.setattr(fastapi_main, "stream_manager", manager_with())
+    response = TestClient(fastapi_main.app).get("/stats")
+    assert response.status_code == 200
+    assert set(response.json().values()) == {0}
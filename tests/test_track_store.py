@@ -0,0 +1,102 @@
+from backend.track_store import TrackStore
+
+
+def run_frames(store, n, seen=(), now=0.0):
+    for _ in range(n):
+        for tid in seen:
+            store.touch(tid, now)
+        store.end_frame(now)
+
+
+def test_idle_track_evicted_after_max_idle_frames():
+    store = TrackStore({"max_idle_frames": 10, "sweep_every": 1, "max_idle_s": 1e9})
+    store.touch(1, 0.0)
+    store.touch(2, 0.0)
+    store.end_frame(0.0)
+    run_frames(store, 9, seen=[2])
+    assert 1 in store   # last seen max_idle_frames frames ago: kept
+    run_frames(store, 1, seen=[2])
+    assert 1 not in store and 2 in store
+    assert store.metrics["evicted_idle"] == 1
+
+
+def test_idle_track_evicted_after_max_idle_s():
+    store = TrackStore({"max_idle_frames": 10**6, "sweep_every": 1, "max_idle_s": 5.0})
+    store.touch(1, 0.0)
+    store.end_frame(0.0)
+    store.touch(2, 5.0)
+    store.end_frame(5.0)
+    assert 1 in store
+    store.touch(2, 5.1)
+    store.end_frame(5.1)
+    assert 1 not in store and 2 in store
+
+
+def test_sweep_only_runs_every_sweep_every_frames():
+    store = TrackStore({"max_idle_frames": 1, "sweep_every": 5, "max_idle_s": 1e9})
+    store.touch(1, 0.0)
+    run_frames(store, 4)
+    assert 1 in store
+    run_frames(store, 1)
+    assert 1 not in store
+
+
+def test_over_capacity_evicts_least_recently_seen():
+    store = TrackStore({"max_tracks": 3, "sweep_every": 10**6})
+    for tid in (1, 2, 3):
+        store.touch(tid, 0.0)
+    store.end_frame(0.0)
+    store.touch(1, 1.0)          # 2 is now the least recently seen
+    store.touch(4, 1.0)
+    store.end_frame(1.0)
+    assert sorted(s.tid for s in store.values()) == [1, 3, 4]
+    assert store.metrics["evicted_lru"] == 1
+
+
+def test_revived_track_gets_its_identity_back():
+    store = TrackStore({"max_tracks": 1, "sweep_every": 10**6, "handoff_ttl_s": 10.0})
+    state = store.touch(1, 0.0)
+    state.final_uuid, state.has_logged_violation = "42", True
+    store.touch(2, 0.0)
+    store.end_frame(0.0)
+    assert 1 not in store and store.metrics["handoffs"] == 1
+
+    revived = store.touch(1, 5.0)
+    assert (revived.final_uuid, revived.has_logged_violation) == ("42", True)
+    assert store.metrics["handoff_hits"] == 1
+
+
+def test_handoff_expires_after_ttl():
+    store = TrackStore({"max_idle_frames": 1, "sweep_every": 1, "max_idle_s": 1e9, "handoff_ttl_s": 10.0})
+    store.touch(1, 0.0).final_uuid = "42"
+    run_frames(store, 3, now=0.0)
+    assert store.stats()["handoff_cache"] == 1
+    run_frames(store, 1, now=10.5)
+    assert store.stats()["handoff_cache"] == 0
+    assert store.metrics["handoff_expired"] == 1
+    assert store.touch(1, 11.0).final_uuid is None
+
+
+def test_unidentified_tracks_are_not_handed_off():
+    store = TrackStore({"max_tracks": 1, "sweep_every": 10**6})
+    store.touch(1, 0.0)
+    store.touch(2, 0.0)
+    store.end_frame(0.0)
+    assert store.metrics["handoffs"] == 0
+    assert store.touch(1, 1.0).final_uuid is None
+
+
+def test_rename_identity_updates_live_and_handed_off_tracks():
+    store = TrackStore({"max_tracks": 1, "sweep_every": 10**6})
+    store.touch(1, 0.0).final_uuid = "provisional"
+    store.touch(2, 0.0).final_uuid = "provisional"
+    store.end_frame(0.0)        # 1 is evicted into the handoff cache
+    store.rename_identity("provisional", "7")
+    assert store.get(2).final_uuid == "7"
+    store.touch(1, 1.0)
+    assert store.get(1).final_uuid == "7"
+
+    store.get(1).final_uuid = "other"
+    store.end_frame(1.0)         # 2 is evicted now
+    store.rename_identity("7", None)
+    assert store.stats()["handoff_cache"] == 0
@@ -0,0 +1,112 @@
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import fastapi_main
+from backend.uploads import UploadError, UploadManager
+
+DATA = bytes(range(256)) * 40   # 10240 bytes
+
+
+async def chunks(data, size=1000, fail_after=None):
+    for i, start in enumerate(range(0, len(data), size)):
+        if fail_after is not None and i == fail_after:
+            raise ConnectionResetError("client went away")
+        yield data[start:start + size]
+
+
+def append(manager, upload_id, offset, data, **kwargs):
+    return asyncio.run(manager.append(upload_id, offset, chunks(data, **kwargs)))
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return UploadManager({"dir": str(tmp_path), "write_block": 4096})
+
+
+def test_offset_is_the_bytes_on_disk(manager):
+    session = manager.create("site.mp4", len(DATA))
+    assert session.offset == 0
+    append(manager, session.id, 0, DATA[:3000])
+    assert session.offset == 3000 and not session.complete
+    append(manager, session.id, 3000, DATA[3000:])
+    assert session.complete
+    with open(session.path, "rb") as f:
+        assert f.read() == DATA
+
+
+def test_dropped_connection_keeps_what_arrived(manager):
+    session = manager.create("site.mp4", len(DATA))
+    with pytest.raises(ConnectionResetError):
+        # 5 chunks of 1000 bytes arrive before the connection drops
+        append(manager, session.id, 0, DATA, fail_after=5)
+    assert session.offset == 5000
+    append(manager, session.id, session.offset, DATA[session.offset:])
+    assert session.complete
+    with open(session.path, "rb") as f:
+        assert f.read() == DATA
+
+
+@pytest.mark.parametrize("offset", [0, 1000, 3000])
+def test_offset_mismatch_reports_the_server_offset(manager, offset):
+    session = manager.create("site.mp4", len(DATA))
+    append(manager, session.id, 0, DATA[:2000])
+    with pytest.raises(UploadError) as e:
+        append(manager, session.id, offset, DATA[offset:offset + 1000])
+    assert (e.value.status, e.value.offset) == (409, 2000)
+    assert session.offset == 2000
+
+
+def test_more_than_the_declared_size_is_rejected(manager):
+    session = manager.create("site.mp4", 2500)
+    with pytest.raises(UploadError) as e:
+        append(manager, session.id, 0, DATA[:3000])
+    assert (e.value.status, e.value.offset) == (413, 2000)
+    assert session.offset == 2000 and not session.complete
+
+
+def test_resume_after_restart(manager, tmp_path):
+    session = manager.create("site.mp4", len(DATA))
+    append(manager, session.id, 0, DATA[:4096])
+
+    restarted = UploadManager({"dir": str(tmp_path)})
+    resumed = restarted.get(session.id)
+    assert resumed.offset == 4096 and restarted.metrics["resumed"] == 1
+    append(restarted, session.id, 4096, DATA[4096:])
+    assert restarted.get(session.id).complete
+
+
+def test_completed_upload_rejects_more_data(manager):
+    session = manager.create("site.mp4", 1000)
+    append(manager, session.id, 0, DATA[:1000])
+    with pytest.raises(UploadError) as e:
+        append(manager, session.id, 1000, b"x")
+    assert e.value.status == 409
+
+
+def test_unsupported_extension(manager):
+    with pytest.raises(UploadError) as e:
+        manager.create("notes.txt", 10)
+    assert e.value.status == 415
+    assert os.listdir(manager.dir) == []
+
+
+def test_http_resume_flow(manager, monkeypatch):
+    monkeypatch.setattr(fastapi_main, "upload_manager", manager)
+    client = TestClient(fastapi_main.app)
+    created = client.post("/uploads", json={"filename": "site.mp4", "size": len(DATA)})
+    assert created.status_code == 201
+    url = created.headers["Location"]
+
+    client.patch(url, content=DATA[:6000], headers={"Upload-Offset": "0"})
+    assert client.head(url).headers["Upload-Offset"] == "6000"
+
+    stale = client.patch(url, content=DATA[4000:], headers={"Upload-Offset": "4000"})
+    assert stale.status_code == 409
+    assert stale.headers["Upload-Offset"] == "6000"
+
+    done = client.patch(url, content=DATA[6000:], headers={"Upload-Offset": "6000"})
+    assert done.status_code == 200 and done.json()["complete"]
+    assert client.patch(url, content=b"", headers={}).status_code == 400
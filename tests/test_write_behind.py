@@ -0,0 +1,142 @@
+import queue
+from datetime import datetime
+
+import pytest
+
+from database import write_behind
+from database.write_behind import WriteBehindQueue
+
+
+class FakeDB:
+    def __init__(self):
+        self.next_id = 100
+        self.violations = []
+        self.fail_workers = False
+
+    def register_new_workers_bulk(self, rows):
+        if self.fail_workers:
+            raise RuntimeError("db down")
+        ids = list(range(self.next_id, self.next_id + len(rows)))
+        self.next_id += len(rows)
+        return ids
+
+    def log_violations_bulk(self, rows):
+        first = len(self.violations) + 1
+        self.violations.extend(rows)
+        return [(first + i, datetime(2026, 1, 1)) for i in range(len(rows))]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(write_behind, "register_new_workers_bulk", fake.register_new_workers_bulk)
+    monkeypatch.setattr(write_behind, "log_violations_bulk", fake.log_violations_bulk)
+    monkeypatch.setattr(write_behind.time, "sleep", lambda s: None)
+    return fake
+
+
+def make_queue(**config):
+    q = WriteBehindQueue(config)
+    q.start = lambda: None   # flushed by hand below instead of by the writer thread
+    q.notified = []
+    q.add_listener(lambda old, new: q.notified.append((old, new)))
+    return q
+
+
+def flush(q):
+    batch = q._carry
+    q._carry = []
+    while True:
+        try:
+            batch.append(q._queue.get_nowait())
+        except queue.Empty:
+            break
+    q._flush(batch)
+
+
+def test_violation_for_provisional_worker_is_written_with_real_id(db):
+    q = make_queue()
+    provisional = q.register_worker([0.1, 0.2], "faces/face_1.jpg")
+    assert not provisional.isdigit()
+    q.log_violation(provisional, "vest", "helmet", "alerts/violation_1.jpg")
+    flush(q)
+    assert db.violations == [("100", "vest", "helmet", "alerts/violation_1.jpg")]
+    assert q.notified == [(provisional, 100)]
+    assert q.resolve(provisional) == 100
+
+
+def test_violation_waits_for_a_registration_that_is_retried(db):
+    q = make_queue()
+    db.fail_workers = True
+    provisional = q.register_worker([0.1], "faces/face_1.jpg")
+    q.log_violation(provisional, "", "helmet", None)
+    flush(q)
+    assert db.violations == []
+    assert q.stats()["pending_workers"] == 1
+    db.fail_workers = False
+    flush(q)
+    assert db.violations == [("100", "", "helmet", None)]
+
+
+def test_given_up_registration_orphans_its_violations(db):
+    q = make_queue(max_retries=2)
+    db.fail_workers = True
+    provisional = q.register_worker([0.1], "faces/face_1.jpg")
+    q.log_violation(provisional, "", "helmet", None)
+    for _ in range(3):
+        flush(q)
+    assert db.violations == []
+    assert q.notified == [(provisional, None)]
+    assert q.metrics["dropped_workers"] == 1
+    assert q.metrics["orphaned_violations"] == 1
+    assert q._refs == {}
+
+
+def test_real_ids_pass_through(db):
+    q = make_queue()
+    q.log_violation(7, "helmet", "vest", None)
+    flush(q)
+    assert db.violations == [("7", "helmet", "vest", None)]
+    assert q._refs == {}
+
+
+def test_resolved_ids_are_bounded(db):
+    q = make_queue(resolved_keep=5)
+    for i in range(50):
+        q.register_worker([0.1], f"faces/face_{i}.jpg")
+    flush(q)
+    assert q.metrics["written_workers"] == 50
+    assert q.stats()["resolved_ids"] == 5
+
+
+def test_mapping_is_kept_while_violations_still_carry_it(db):
+    q = make_queue(resolved_keep=0)
+    provisional = q.register_worker([0.1], "faces/face_1.jpg")
+    q.log_violation(provisional, "", "helmet", None)
+    flush(q)   # registration and violation in one batch: resolved, written, released
+    assert db.violations == [("100", "", "helmet", None)]
+    assert q.stats()["resolved_ids"] == 0
+
+    other = q.register_worker([0.1], "faces/face_2.jpg")
+    q.log_violation(other, "", "vest", None)
+    q._flush([q._queue.get_nowait()])   # the registration lands, the violation is still queued
+    assert q.resolve(other) == 101
+    flush(q)
+    assert db.violations[-1] == ("101", "", "vest", None)
+    assert q.stats()["resolved_ids"] == 0
+
+
+def test_violation_listeners_get_committed_rows(db):
+    q = make_queue()
+    committed = []
+    q.add_violation_listener(committed.extend)
+    provisional = q.register_worker([0.1], "faces/face_1.jpg")
+    q.log_violation(provisional, "vest", "helmet", "alerts/a.jpg", stream="cam-1")
+    q.log_violation(7, "", "vest", None)
+    flush(q)
+    assert committed == [
+        {"id": 1, "worker_id": "100", "equipped_items": "vest", "violated_items": "helmet",
+         "evidence_path": "alerts/a.jpg", "timestamp": datetime(2026, 1, 1), "stream": "cam-1"},
+        {"id": 2, "worker_id": "7", "equipped_items": "", "violated_items": "vest",
+         "evidence_path": None, "timestamp": datetime(2026, 1, 1), "stream": None},
+    ]